@@ -0,0 +1,399 @@
+"""
+Background job analysis.
+
+Jobs waiting for analysis are stored in the jobs table itself
+(analysis_status = "pending"), so the queue survives a restart.
+A fixed number of asyncio workers drain the in-memory queue.
+
+Every analysis records the resume hash and prompt version it was based on.
+After the resume or the analysis prompt changes, queue_stale() puts only the
+jobs with outdated analyses back into the queue (active statuses first).
+
+In ANALYSIS_MODE="tiered" a new job first goes through the cheap extraction
+tier (extract.py heuristics and/or EXTRACT_MODEL) and gets title, company and
+the explicit visa statement; the reasoning tier runs right after it or only
+when requested (REASONING_SCHEDULE). It is given the extracted fields and asks
+OPENAI_MODEL only for the visa analysis and resume match (the complete prompt
+only when title or company is still missing).
+
+Jobs handed to the Batch API (batch.py) are "batched" and skipped by the
+workers; they come back "pending" only if the batch returned no result.
+
+Near-duplicates of a job still being analyzed (dedup.py) are skipped too:
+they get a copy of its analysis when it is saved.
+"""
+import asyncio
+import hashlib
+import json
+import time
+
+from sqlalchemy import case, or_
+
+from app.config import (
+    ANALYSIS_CONCURRENCY, ANALYSIS_MODE, EXTRACT_BACKEND, EXTRACT_MODEL, MAX_RESUME_LENGTH, OPENAI_MODEL,
+    REANALYSIS_STATUS_PRIORITY, REASONING_SCHEDULE, logger
+)
+from app.database import SessionLocal
+from app.models import Job
+from app import dedup, extract, ingest, llm, metrics
+from app import sync  # Stamps job writes for delta sync, also in processes without the API (python -m app.batch)
+from app.prompts import PROMPTS
+
+
+RESUME_PATH = "templates/user_resume.txt"
+
+_queue = None
+_workers = []
+
+
+def _short_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+# Changes when an analysis prompt template or the model is edited (the reasoning tier prompt counts in tiered mode)
+_ANALYSIS_PROMPTS = PROMPTS["analyze_job_complete"] + (PROMPTS["analyze_job_reasoning"] if ANALYSIS_MODE == "tiered" else "")
+PROMPT_VERSION = _short_hash(OPENAI_MODEL + "\n" + _ANALYSIS_PROMPTS)
+
+
+def current_version(resume: str) -> tuple:
+    """(resume hash, prompt version) an analysis made now would be based on
+
+    Only the part of the resume sent to the LLM counts, edits beyond MAX_RESUME_LENGTH don't make analyses stale.
+    """
+    return _short_hash(resume[:MAX_RESUME_LENGTH]), PROMPT_VERSION
+
+
+def read_resume():
+    """Resume text or None if the file is missing"""
+    try:
+        with open(RESUME_PATH, "r") as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+def enqueue(job_id: int, use_cache: bool = True, only_stale: bool = False, reasoning_only: bool = False,
+            done: asyncio.Future = None):
+    """Schedule analysis for a job already saved with analysis_status="pending"
+
+    only_stale=True: skip the LLM call if the job's analysis is already current when a worker picks it up.
+    reasoning_only=True: skip the extraction tier (job was extracted before).
+    done: resolved with the final analysis_status once a worker is done with the job.
+    """
+    _queue.put_nowait((job_id, use_cache, only_stale, reasoning_only, done))
+
+
+def workers_running() -> bool:
+    """True inside the app, where enqueued jobs are analyzed (not in CLI runs)"""
+    return bool(_workers)
+
+
+def queue_depth() -> int:
+    """Number of analyses waiting for a free worker"""
+    return _queue.qsize() if _queue else 0
+
+
+async def start_workers():
+    """Create the queue, requeue unfinished analyses and start the worker pool"""
+    global _queue
+    _queue = asyncio.Queue()
+
+    # Interrupted re-analyses are resumed here; jobs finished before the restart are not billed again
+    job_ids = await asyncio.to_thread(_load_unfinished_job_ids)
+    for job_id in job_ids:
+        enqueue(job_id, only_stale=True)
+    if job_ids:
+        logger.info(f"Analysis queue | {len(job_ids)} unfinished analyses requeued")
+
+    for number in range(ANALYSIS_CONCURRENCY):
+        _workers.append(asyncio.create_task(_worker(number)))
+    logger.info(f"Analysis queue | {ANALYSIS_CONCURRENCY} workers started")
+
+
+async def stop_workers():
+    """Cancel workers; interrupted jobs stay "running" and are requeued on next start"""
+    for worker in _workers:
+        worker.cancel()
+    await asyncio.gather(*_workers, return_exceptions=True)
+    _workers.clear()
+
+
+async def _worker(number: int):
+    while True:
+        job_id, use_cache, only_stale, reasoning_only, done = await _queue.get()
+        status = "failed"
+        try:
+            status = await analyze_job(job_id, use_cache, only_stale, reasoning_only)
+        except Exception as e:
+            logger.error(f"Analysis worker {number} | job {job_id} | {e}")
+            await asyncio.to_thread(_set_status, job_id, "failed")
+        finally:
+            if done is not None and not done.done():
+                done.set_result(status)
+            _queue.task_done()
+
+
+async def analyze_job(job_id: int, use_cache: bool = True, only_stale: bool = False,
+                      reasoning_only: bool = False) -> str:
+    """Run LLM analysis for a stored job and save results. Returns final analysis_status"""
+    resume = read_resume()
+    version = current_version(resume) if resume is not None else None
+
+    job_description = await asyncio.to_thread(_start_analysis, job_id, version if only_stale else None)
+    if job_description is None:
+        return "failed"
+    if job_description is CURRENT:
+        return "done"
+    if job_description is BATCHED:
+        return "batched"
+    if job_description is WAITING:
+        return "pending"
+
+    if ANALYSIS_MODE == "tiered" and not reasoning_only:
+        await _extraction_tier(job_id, job_description, use_cache)
+        if REASONING_SCHEDULE == "on_demand":
+            await asyncio.to_thread(_set_status, job_id, "extracted")
+            return "extracted"
+
+    if resume is None:
+        logger.warning(f"Resume file not found, job {job_id} left without analysis")
+        await asyncio.to_thread(_set_status, job_id, "failed")
+        return "failed"
+
+    extracted = await asyncio.to_thread(_extracted_fields, job_id) if ANALYSIS_MODE == "tiered" else None
+    start_time = time.perf_counter()
+    analysis = await llm.analyze_job_complete(job_description, resume, use_cache=use_cache, extracted=extracted)
+    if ANALYSIS_MODE == "tiered":
+        metrics.analysis_tier_duration.observe(time.perf_counter() - start_time, "reasoning", OPENAI_MODEL)
+    return await asyncio.to_thread(_save_analysis, job_id, analysis, version)
+
+
+async def _extraction_tier(job_id: int, job_description: str, use_cache: bool):
+    """Fill title, company and the explicit visa statement; the LLM is used only when configured or needed"""
+    start_time = time.perf_counter()
+    info = extract.extract_job_info(job_description) if EXTRACT_BACKEND != "llm" else None
+    backend = "heuristic"
+    if EXTRACT_BACKEND == "llm" or (
+        EXTRACT_BACKEND == "auto" and await asyncio.to_thread(_needs_llm_extraction, job_id, info)
+    ):
+        backend = EXTRACT_MODEL
+        found = await llm.extract_job_info(job_description, use_cache=use_cache)
+        if info is None:
+            info = found
+        else:
+            # Values found by the regexes are kept, the model fills the rest
+            info["title"] = info["title"] or found.get("title")
+            info["company"] = info["company"] or found.get("company")
+            if info["visa_sponsorship"] is None:
+                info["visa_sponsorship"], info["visa_statement"] = found.get("visa_sponsorship"), found.get("visa_statement")
+    metrics.analysis_tier_duration.observe(time.perf_counter() - start_time, "extraction", backend)
+    await asyncio.to_thread(_save_extraction, job_id, info)
+
+
+def queue_stale(limit: int = None, dry_run: bool = False) -> dict:
+    """Mark analyzed jobs whose resume hash / prompt version differ from the current ones as pending
+
+    Returns {"stale": total, "job_ids": [marked ids in priority order]}; the caller enqueues the ids.
+    Marked jobs stay "pending" in the database until analyzed, so an interrupted run continues on next start.
+    """
+    resume = read_resume()
+    if resume is None:
+        raise FileNotFoundError(RESUME_PATH)
+    resume_hash, prompt_version = current_version(resume)
+
+    db = SessionLocal()
+    try:
+        query = db.query(Job.id).filter(
+            Job.analysis_status == "done",
+            Job.job_description.isnot(None),
+            or_(
+                Job.analysis_resume_hash.is_(None),
+                Job.analysis_resume_hash != resume_hash,
+                Job.analysis_prompt_version.is_(None),
+                Job.analysis_prompt_version != prompt_version,
+            )
+        )
+        stale = query.count()
+        if dry_run:
+            return {"stale": stale, "job_ids": []}
+
+        job_ids = [row.id for row in query.order_by(*_priority_order()).limit(limit).all()]
+        if job_ids:
+            db.query(Job).filter(Job.id.in_(job_ids)).update(
+                {"analysis_status": "pending"}, synchronize_session=False
+            )
+            db.commit()
+        return {"stale": stale, "job_ids": job_ids}
+    finally:
+        db.close()
+
+
+def _priority_order() -> list:
+    """ORDER BY for re-analysis: REANALYSIS_STATUS_PRIORITY, then newest first"""
+    status_rank = case(
+        {status: rank for rank, status in enumerate(REANALYSIS_STATUS_PRIORITY)},
+        value=Job.status,
+        else_=len(REANALYSIS_STATUS_PRIORITY)
+    )
+    return [status_rank, Job.created_at.desc(), Job.id.desc()]
+
+
+def apply_analysis(job: Job, analysis: dict):
+    """Copy analyze_job_complete() results to job fields"""
+    # If title/company not specified, take from analysis
+    if not job.title:
+        job.title = analysis.get("title") or "Unknown Position"
+    if not job.company:
+        job.company = analysis.get("company") or "Unknown Company"
+
+    # Ensure correct type for has_visa_sponsorship (only bool or None)
+    visa_value = analysis.get("visa_sponsorship")
+    job.has_visa_sponsorship = visa_value if isinstance(visa_value, bool) else None
+
+    # Convert dict to JSON string if needed
+    visa_analysis = analysis.get("visa_analysis")
+    if isinstance(visa_analysis, dict):
+        visa_analysis = json.dumps(visa_analysis, ensure_ascii=False)
+        logger.warning("visa_analysis was dict, converted to JSON string")
+
+    match_analysis = analysis.get("match_analysis")
+    if isinstance(match_analysis, dict):
+        match_analysis = json.dumps(match_analysis, ensure_ascii=False)
+        logger.warning("match_analysis was dict, converted to JSON string")
+
+    job.sponsorship_analysis = visa_analysis
+    job.resume_match_percentage = analysis.get("match_percentage")
+    job.match_analysis = match_analysis
+    job.analysis_status = "failed" if analysis.get("error") else "done"
+
+
+def _needs_llm_extraction(job_id: int, info: dict) -> bool:
+    """True if the job has no title/company and the heuristics didn't find it either"""
+    db = SessionLocal()
+    try:
+        job = db.get(Job, job_id)
+        return bool(job) and (
+            (not job.title and not info["title"]) or (not job.company and not info["company"])
+        )
+    finally:
+        db.close()
+
+
+def extracted_fields(job):
+    """Title, company and visa_sponsorship stored for the job (or row), for the reasoning tier; None while title or company is missing"""
+    if job.title in (None, "", "Unknown Position") or job.company in (None, "", "Unknown Company"):
+        return None
+    return {"title": job.title, "company": job.company, "visa_sponsorship": job.has_visa_sponsorship}
+
+
+def _extracted_fields(job_id: int):
+    db = SessionLocal()
+    try:
+        job = db.get(Job, job_id)
+        return extracted_fields(job) if job else None
+    finally:
+        db.close()
+
+
+def _save_extraction(job_id: int, info: dict):
+    db = SessionLocal()
+    try:
+        job = db.get(Job, job_id)
+        if not job:
+            return
+        # Left empty when not found: the reasoning tier fills them later
+        job.title = job.title or info.get("title") or ""
+        job.company = job.company or info.get("company") or ""
+        job.has_visa_sponsorship = info.get("visa_sponsorship")
+        job.sponsorship_analysis = "Direct Statement: " + (
+            info.get("visa_statement") or "The job posting does not mention visa sponsorship."
+        )
+        db.commit()
+        logger.info(f"Job {job_id} extracted: title={job.title!r}, company={job.company!r}, visa={job.has_visa_sponsorship}")
+    finally:
+        db.close()
+
+
+def _load_unfinished_job_ids() -> list:
+    db = SessionLocal()
+    try:
+        rows = db.query(Job.id).filter(
+            Job.analysis_status.in_(["pending", "running"])
+        ).order_by(*_priority_order()).all()
+        return [row.id for row in rows]
+    finally:
+        db.close()
+
+
+# _start_analysis() results for a job whose analysis already matches the current version,
+# for a job submitted to the Batch API after it was queued and for a near-duplicate waiting for its original
+CURRENT = object()
+BATCHED = object()
+WAITING = object()
+
+
+def _start_analysis(job_id: int, version: tuple = None):
+    """Mark job as running and return its description (None if job is gone)
+
+    With version given, a job already analyzed for that version is set back to "done" and CURRENT returned.
+    """
+    db = SessionLocal()
+    try:
+        job = db.get(Job, job_id)
+        if not job or not job.job_description:
+            logger.warning(f"Analysis queue | job {job_id} deleted or has no description, skipped")
+            return None
+        if job.analysis_status == "batched":
+            logger.info(f"Analysis queue | job {job_id} is in a Batch API batch, skipped")
+            return BATCHED
+        if job.duplicate_of_id:
+            if job.analysis_status == "done":
+                logger.info(f"Analysis queue | job {job_id} got the analysis of job {job.duplicate_of_id}, skipped")
+                return CURRENT
+            original = db.get(Job, job.duplicate_of_id)
+            if original and original.analysis_status in dedup.ANALYZING_STATUSES:
+                logger.info(f"Analysis queue | job {job_id} waits for the analysis of job {original.id}, skipped")
+                job.analysis_status = "pending"  # Also when requeued "running" after a restart
+                db.commit()
+                return WAITING
+        if version and (job.analysis_resume_hash, job.analysis_prompt_version) == version:
+            job.analysis_status = "done"
+            db.commit()
+            logger.info(f"Analysis queue | job {job_id} analysis already current, skipped")
+            return CURRENT
+        job.analysis_status = "running"
+        description = ingest.description(job)  # Stored with the status for jobs saved without it
+        db.commit()
+        return description
+    finally:
+        db.close()
+
+
+def _save_analysis(job_id: int, analysis: dict, version: tuple) -> str:
+    db = SessionLocal()
+    try:
+        job = db.get(Job, job_id)
+        if not job:
+            logger.warning(f"Analysis queue | job {job_id} deleted during analysis, result dropped")
+            return "failed"
+        apply_analysis(job, analysis)
+        if job.analysis_status == "done":
+            job.analysis_resume_hash, job.analysis_prompt_version = version
+        dedup.settle_duplicates(job, db)
+        db.commit()
+        logger.info(f"Job {job_id} analyzed: visa={job.has_visa_sponsorship}, match={job.resume_match_percentage}%")
+        return job.analysis_status
+    finally:
+        db.close()
+
+
+def _set_status(job_id: int, status: str):
+    db = SessionLocal()
+    try:
+        job = db.get(Job, job_id)
+        if job:
+            job.analysis_status = status
+            dedup.settle_duplicates(job, db)
+            db.commit()
+    finally:
+        db.close()
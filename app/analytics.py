@@ -0,0 +1,220 @@
+"""
+Job search analytics for the dashboard (/api/analytics).
+
+Every figure is a GROUP BY over a few small columns, answered from covering
+indexes on jobs (see Job.__table_args__) without reading job descriptions;
+only the grouped rows (one per status, day, bucket) come back to Python.
+
+Results are cached in memory until a job is written: a commit that inserted,
+changed or deleted Job rows in this process clears the cache, so a dashboard
+reload costs nothing while the data is unchanged. Writes from other
+processes (python -m app.batch) show up after ANALYTICS_CACHE_TTL seconds.
+"""
+import threading
+import time
+from datetime import date, timedelta
+from itertools import chain
+
+from sqlalchemy import case, event, func
+
+from app.config import ANALYTICS_CACHE_TTL
+from app.database import SessionLocal
+from app.models import Job
+
+# Pipeline stages in order; a job counts for every stage it reached
+FUNNEL_STAGES = ["saved", "applied", "responded", "interview", "offer"]
+ACTIVE_STATUSES = ["applied", "interview", "offer", "rejected"]  # Jobs applied to (status past "new")
+RESPONSE_DAY_BINS = [(0, 6), (7, 13), (14, 29), (30, 59), (60, None)]
+MATCH_BUCKET_SIZE = 10
+
+_cache = {}
+_cache_lock = threading.Lock()
+_generation = 0  # Incremented by every invalidation
+_cache_hits = 0
+_cache_misses = 0
+
+
+def invalidate():
+    global _generation
+    with _cache_lock:
+        _cache.clear()
+        _generation += 1
+
+
+@event.listens_for(SessionLocal, "after_flush")
+def _mark_job_writes(session, flush_context):
+    if any(isinstance(obj, Job) for obj in chain(session.new, session.dirty, session.deleted)):
+        session.info["jobs_changed"] = True
+
+
+@event.listens_for(SessionLocal, "do_orm_execute")
+def _mark_job_statements(orm_execute_state):
+    """query(Job).update() / .delete() skip the flush"""
+    mapper = orm_execute_state.bind_mapper
+    if (orm_execute_state.is_update or orm_execute_state.is_delete) and mapper is not None and mapper.class_ is Job:
+        orm_execute_state.session.info["jobs_changed"] = True
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _invalidate_on_commit(session):
+    if session.info.pop("jobs_changed", False):
+        invalidate()
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _forget_rolled_back(session):
+    session.info.pop("jobs_changed", None)
+
+
+def cached(name: str, compute, *args):
+    """compute(db, *args) from the cache, computed at most once per job write (or ANALYTICS_CACHE_TTL)"""
+    global _cache_hits, _cache_misses
+    key = (name, *args)
+    with _cache_lock:
+        entry = _cache.get(key)
+        if entry is not None and time.monotonic() - entry[0] < ANALYTICS_CACHE_TTL:
+            _cache_hits += 1
+            return entry[1]
+        _cache_misses += 1
+        generation = _generation
+
+    db = SessionLocal()
+    try:
+        value = compute(db, *args)
+    finally:
+        db.close()
+    with _cache_lock:
+        # A job written while computing: the result may miss it, not cached
+        if generation == _generation:
+            _cache[key] = (time.monotonic(), value)
+    return value
+
+
+def cache_stats() -> dict:
+    with _cache_lock:
+        return {"entries": len(_cache), "hits": _cache_hits, "misses": _cache_misses}
+
+
+def funnel(db) -> dict:
+    """Jobs per status and per pipeline stage reached"""
+    rows = db.query(
+        Job.status, func.count(), func.count(Job.applied_date), func.count(Job.response_date)
+    ).group_by(Job.status).all()
+    by_status = {status or "new": count for status, count, _, _ in rows}
+    reached = {
+        "saved": sum(row[1] for row in rows),
+        "applied": sum(max(applied, count if status in ACTIVE_STATUSES else 0) for status, count, applied, _ in rows),
+        "responded": sum(max(responded, count if status in ("interview", "offer") else 0)
+                         for status, count, _, responded in rows),
+        "interview": by_status.get("interview", 0) + by_status.get("offer", 0),
+        "offer": by_status.get("offer", 0),
+    }
+    stages = []
+    for index, stage in enumerate(FUNNEL_STAGES):
+        previous = reached[FUNNEL_STAGES[index - 1]] if index else None
+        stages.append({
+            "stage": stage,
+            "count": reached[stage],
+            "conversion": round(reached[stage] / previous, 3) if previous else None
+        })
+    return {"by_status": by_status, "stages": stages}
+
+
+def weekly_applications(db, weeks: int) -> list:
+    """Applications and saved jobs per ISO week (Monday start), oldest first, the last `weeks` weeks"""
+    first_day = _week_start(date.today()) - timedelta(weeks=weeks - 1)
+    series = {first_day + timedelta(weeks=number): {"applied": 0, "saved": 0} for number in range(weeks)}
+
+    # Grouped by day in SQL (portable), folded into weeks here: at most 7 rows per week
+    for column, field in ((Job.applied_date, "applied"), (Job.created_at, "saved")):
+        day = func.date(column)
+        rows = db.query(day, func.count()).filter(column >= first_day).group_by(day).all()
+        for value, count in rows:
+            week = _week_start(value if isinstance(value, date) else date.fromisoformat(value))
+            if week in series:
+                series[week][field] += count
+
+    return [
+        {"week": f"{start.isocalendar()[0]}-W{start.isocalendar()[1]:02d}", "start": start.isoformat(), **counts}
+        for start, counts in sorted(series.items())
+    ]
+
+
+def _week_start(day: date) -> date:
+    return day - timedelta(days=day.weekday())
+
+
+def response_times(db) -> dict:
+    """days_to_response distribution: overall and per outcome, from per-(days, status) counts"""
+    rows = db.query(Job.days_to_response, Job.status, func.count()).filter(
+        Job.days_to_response.isnot(None)
+    ).group_by(Job.days_to_response, Job.status).all()
+
+    overall = {}
+    by_status = {}
+    for days, status, count in rows:
+        overall[days] = overall.get(days, 0) + count
+        by_status.setdefault(status or "new", {})
+        by_status[status or "new"][days] = by_status[status or "new"].get(days, 0) + count
+
+    histogram = []
+    for low, high in RESPONSE_DAY_BINS:
+        count = sum(n for days, n in overall.items() if days >= low and (high is None or days <= high))
+        histogram.append({"days": f"{low}-{high}" if high is not None else f"{low}+", "count": count})
+    return {
+        **_distribution(overall),
+        "histogram": histogram,
+        "by_status": {status: _distribution(counts) for status, counts in sorted(by_status.items())}
+    }
+
+
+def _distribution(counts: dict) -> dict:
+    """count / mean / median / p90 of values given as {value: occurrences}"""
+    total = sum(counts.values())
+    if not total:
+        return {"count": 0, "mean": None, "median": None, "p90": None}
+
+    def quantile(q):
+        seen = 0
+        for value in sorted(counts):
+            seen += counts[value]
+            if seen >= q * total:
+                return value
+
+    return {
+        "count": total,
+        "mean": round(sum(value * n for value, n in counts.items()) / total, 1),
+        "median": quantile(0.5),
+        "p90": quantile(0.9)
+    }
+
+
+def match_outcomes(db) -> list:
+    """Outcomes per resume match bucket (0-9%, 10-19%, ... 90-100%): does a higher match get more interviews?"""
+    last_bucket = 100 // MATCH_BUCKET_SIZE - 1  # 100% goes with 90-99%
+    bucket = case(
+        (Job.resume_match_percentage >= 100, last_bucket),
+        else_=Job.resume_match_percentage // MATCH_BUCKET_SIZE
+    )
+    rows = db.query(bucket, Job.status, func.count()).filter(
+        Job.resume_match_percentage.isnot(None)
+    ).group_by(bucket, Job.status).all()
+
+    buckets = {}
+    for number, status, count in rows:
+        counts = buckets.setdefault(number, {"jobs": 0, **dict.fromkeys(ACTIVE_STATUSES, 0)})
+        counts["jobs"] += count
+        if status in ACTIVE_STATUSES:
+            counts[status] += count
+
+    result = []
+    for number, counts in sorted(buckets.items()):
+        low = number * MATCH_BUCKET_SIZE
+        high = 100 if number == last_bucket else low + MATCH_BUCKET_SIZE - 1
+        applied = sum(counts[status] for status in ACTIVE_STATUSES)
+        result.append({
+            "match": f"{low}-{high}",
+            **counts,
+            "interview_rate": round((counts["interview"] + counts["offer"]) / applied, 3) if applied else None
+        })
+    return result
@@ -0,0 +1,467 @@
+"""
+Batch API analysis: analyze_job_complete for many jobs at the Batch API price.
+
+For backlogs nobody waits for (a whole saved-jobs import, re-analysis after a
+resume change) the requests go to the OpenAI Batch API instead of the worker
+pool: answered within BATCH_COMPLETION_WINDOW at BATCH_PRICE_RATIO of the
+normal price, without using the RPM/TPM quotas of interactive calls.
+
+  submit: pending jobs -> JSONL request file (one analyze_job_complete request
+          per job, custom_id "job-<id>") -> upload -> batch; jobs become "batched"
+  poll:   open batches are checked; the results of a finished batch are
+          applied to all of its jobs in one transaction. Failed requests leave
+          the job "failed", jobs without a result (expired / cancelled batch)
+          go back to "pending"
+
+In tiered mode a batch runs only the reasoning tier, like a worker re-analysis:
+jobs with a stored title and company get the reasoning prompt, the others the
+complete one (title and company come from its answer).
+The app polls every BATCH_POLL_INTERVAL seconds; without a running app:
+
+    python -m app.batch submit [--limit N]
+    python -m app.batch poll [--wait]
+
+With LLM_BACKEND=fake the batch is processed locally by fake_llm.py.
+"""
+import argparse
+import asyncio
+import json
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import openai
+from sqlalchemy import exists, func
+from sqlalchemy.orm import aliased
+
+from app.config import (
+    ANALYSIS_MODE, BATCH_COMPLETION_WINDOW, BATCH_MAX_FILE_BYTES, BATCH_MAX_REQUESTS, BATCH_POLL_INTERVAL,
+    BATCH_PRICE_RATIO, MAX_RESUME_LENGTH, OPENAI_MODEL, logger
+)
+from app.database import SessionLocal
+from app.models import AnalysisBatch, Job
+from app import analysis_queue, dedup, ingest, llm, resilience
+from app.llm_log import log_llm_call, price
+
+ENDPOINT = "/v1/chat/completions"
+# Local status while uploading, then the provider's status until the results are saved
+OPEN_STATUSES = ("submitting", "validating", "in_progress", "finalizing", "cancelling")
+# Provider statuses after which the output and error files are complete
+FINISHED_STATUSES = ("completed", "expired", "cancelled")
+RECENT_BATCHES = 20
+# Job ids per query (SQLite limits the number of bound parameters)
+ID_CHUNK = 500
+
+_poller = None
+_poll_lock = asyncio.Lock()
+
+
+def _chunks(items: list, size: int):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _now():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+async def submit_pending(limit: int = None, job_ids: list = None) -> list:
+    """Submit pending jobs (all, the first limit in re-analysis priority order, or only job_ids)
+
+    Returns the AnalysisBatch ids: backlogs above BATCH_MAX_REQUESTS / BATCH_MAX_FILE_BYTES are split.
+    Raises FileNotFoundError without a resume and resilience.LLMCallError when the upload fails
+    (the jobs of that batch are pending again).
+    """
+    resume = analysis_queue.read_resume()
+    if resume is None:
+        raise FileNotFoundError(analysis_queue.RESUME_PATH)
+    resume = resume[:MAX_RESUME_LENGTH]
+    version = analysis_queue.current_version(resume)
+
+    pending_ids = await asyncio.to_thread(_pending_job_ids, limit, job_ids)
+    batch_ids = []
+    lines, size = {}, 0
+    for chunk in _chunks(pending_ids, ID_CHUNK):
+        for job_id, description, extracted in await asyncio.to_thread(_descriptions, chunk):
+            params, _ = llm.analysis_request(description, resume, extracted)
+            line = json.dumps({"custom_id": f"job-{job_id}", "method": "POST", "url": ENDPOINT, "body": params})
+            line = (line + "\n").encode("utf-8")
+            if lines and (len(lines) >= BATCH_MAX_REQUESTS or size + len(line) > BATCH_MAX_FILE_BYTES):
+                batch_ids.append(await _submit(lines, version))
+                lines, size = {}, 0
+            lines[job_id] = line
+            size += len(line)
+    if lines:
+        batch_ids.append(await _submit(lines, version))
+    return [batch_id for batch_id in batch_ids if batch_id is not None]
+
+
+async def _submit(lines: dict, version: tuple):
+    """Claim the jobs, upload their request lines and create the batch; None if no job was pending anymore"""
+    batch_id, claimed = await asyncio.to_thread(_claim, list(lines), version)
+    if batch_id is None:
+        return None
+    # Jobs picked up by a worker in the meantime are left out
+    data = b"".join(lines[job_id] for job_id in claimed)
+    try:
+        uploaded, _ = await resilience.call(lambda: llm.client.files.create(
+            file=(f"analysis-batch-{batch_id}.jsonl", data), purpose="batch"
+        ))
+        batch, _ = await resilience.call(lambda: llm.client.batches.create(
+            input_file_id=uploaded.id, endpoint=ENDPOINT, completion_window=BATCH_COMPLETION_WINDOW,
+            metadata={"analysis_batch_id": str(batch_id)}
+        ))
+    except resilience.LLMCallError as e:
+        logger.error(f"Batch {batch_id} | submission failed: {e}")
+        _requeue(await asyncio.to_thread(_release, batch_id, f"Submission failed: {e}"))
+        raise
+    await asyncio.to_thread(_update_batch, batch_id, provider_batch_id=batch.id,
+                            input_file_id=uploaded.id, status=batch.status)
+    logger.info(f"Batch {batch_id} | {len(claimed)} jobs submitted ({len(data) / 1e6:.1f} MB) as {batch.id}")
+    return batch_id
+
+
+async def poll() -> list:
+    """Check open batches and save the results of finished ones; returns the ids of batches closed now"""
+    async with _poll_lock:
+        closed = []
+        for batch_id, provider_batch_id in await asyncio.to_thread(_open_batches):
+            try:
+                batch, _ = await resilience.call(lambda: llm.client.batches.retrieve(provider_batch_id))
+            except resilience.LLMCallError as e:
+                if isinstance(e.__cause__, openai.NotFoundError):
+                    _requeue(await asyncio.to_thread(_release, batch_id, f"Batch {provider_batch_id} not found"))
+                    closed.append(batch_id)
+                else:
+                    logger.warning(f"Batch {batch_id} | status check failed: {e}")
+                continue
+
+            if batch.status in FINISHED_STATUSES:
+                await _save(batch_id, batch)
+                closed.append(batch_id)
+            elif batch.status == "failed":
+                errors = "; ".join(error.message or error.code or "" for error in (batch.errors.data or [])) \
+                    if batch.errors else ""
+                logger.error(f"Batch {batch_id} | rejected by the provider: {errors}")
+                _requeue(await asyncio.to_thread(_release, batch_id, f"Batch failed: {errors}"))
+                closed.append(batch_id)
+            else:
+                counts = batch.request_counts
+                await asyncio.to_thread(
+                    _update_batch, batch_id, status=batch.status,
+                    completed_count=counts.completed if counts else 0, failed_count=counts.failed if counts else 0
+                )
+        return closed
+
+
+async def _save(batch_id: int, batch):
+    """Download the output and error files, parse every answer and apply all results at once"""
+    answers, results, failed = {}, {}, {}
+    usage = {"prompt_tokens": 0, "cached_tokens": 0, "completion_tokens": 0}
+    for file_id in (batch.output_file_id, batch.error_file_id):
+        if not file_id:
+            continue
+        content, _ = await resilience.call(lambda: llm.client.files.content(file_id))
+        for line in content.text.splitlines():
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            job_id = int(record["custom_id"].removeprefix("job-"))
+            response = record.get("response") or {}
+            if record.get("error") or response.get("status_code") != 200:
+                failed[job_id] = (record.get("error") or {}).get("message") or f"HTTP {response.get('status_code')}"
+                continue
+            body = response["body"]
+            body_usage = body.get("usage") or {}
+            usage["prompt_tokens"] += body_usage.get("prompt_tokens", 0)
+            usage["cached_tokens"] += (body_usage.get("prompt_tokens_details") or {}).get("cached_tokens", 0)
+            usage["completion_tokens"] += body_usage.get("completion_tokens", 0)
+            answers[job_id] = body["choices"][0]["message"]["content"] or ""
+
+    # Reasoning tier answers get the title, company and visa_sponsorship their request was built from
+    extracted = await asyncio.to_thread(_extracted, list(answers))
+    for job_id, text in answers.items():
+        try:
+            results[job_id] = await llm.parse_analysis(text, extracted.get(job_id))
+        except ValueError as e:
+            failed[job_id] = str(e)
+
+    cost = price(OPENAI_MODEL, usage["prompt_tokens"], usage["completion_tokens"], None,
+                 usage["cached_tokens"]) * BATCH_PRICE_RATIO
+    requeue = await asyncio.to_thread(_save_results, batch_id, batch, results, failed, usage, cost)
+    if requeue is None:
+        return  # Saved by another poll
+    _requeue(requeue)
+
+    await log_llm_call(
+        "analyze_job_batch", "success" if results else "error", time.time() - batch.created_at,
+        usage=SimpleNamespace(
+            prompt_tokens=usage["prompt_tokens"], completion_tokens=usage["completion_tokens"],
+            total_tokens=usage["prompt_tokens"] + usage["completion_tokens"],
+            prompt_tokens_details=SimpleNamespace(cached_tokens=usage["cached_tokens"])
+        ),
+        error_message=f"{len(failed)} of {len(results) + len(failed)} requests failed" if failed else None,
+        price_ratio=BATCH_PRICE_RATIO
+    )
+    logger.info(f"Batch {batch_id} | {batch.status} | {len(results)} analyzed, {len(failed)} failed, "
+                f"{len(requeue)} back to pending | ${cost:.4f}")
+
+
+def _requeue(job_ids: list):
+    """Analyze jobs that came back from a batch in the worker pool (at the next start outside the app)"""
+    if analysis_queue.workers_running():
+        for job_id in job_ids:
+            analysis_queue.enqueue(job_id, only_stale=True, reasoning_only=True)
+
+
+def _pending_job_ids(limit: int = None, job_ids: list = None) -> list:
+    db = SessionLocal()
+    try:
+        # Near-duplicates waiting for their original's analysis get a copy of it, not a request of their own
+        original = aliased(Job)
+        waiting = exists().where(original.id == Job.duplicate_of_id,
+                                 original.analysis_status.in_(dedup.ANALYZING_STATUSES))
+        query = db.query(Job.id).filter(Job.analysis_status == "pending", Job.job_description.isnot(None), ~waiting)
+        if job_ids is not None:
+            return [row.id for chunk in _chunks(job_ids, ID_CHUNK)
+                    for row in query.filter(Job.id.in_(chunk)).all()]
+        return [row.id for row in query.order_by(*analysis_queue._priority_order()).limit(limit).all()]
+    finally:
+        db.close()
+
+
+def _descriptions(job_ids: list) -> list:
+    """(job id, description, extracted fields for the reasoning tier or None) of the jobs with a description"""
+    db = SessionLocal()
+    try:
+        rows = db.query(
+            Job.id, Job.job_description, Job.clean_description, Job.title, Job.company, Job.has_visa_sponsorship
+        ).filter(Job.id.in_(job_ids)).all()
+        requests = {
+            row.id: (row.clean_description or (ingest.prepare(row.job_description).text if row.job_description else None),
+                     analysis_queue.extracted_fields(row) if ANALYSIS_MODE == "tiered" else None)
+            for row in rows
+        }
+        return [(job_id, *requests[job_id]) for job_id in job_ids if job_id in requests and requests[job_id][0]]
+    finally:
+        db.close()
+
+
+def _extracted(job_ids: list) -> dict:
+    """{job id: extracted fields} of the jobs whose batch request used the reasoning prompt"""
+    if ANALYSIS_MODE != "tiered":
+        return {}
+    db = SessionLocal()
+    try:
+        extracted = {}
+        for chunk in _chunks(job_ids, ID_CHUNK):
+            for row in db.query(Job.id, Job.title, Job.company, Job.has_visa_sponsorship).filter(Job.id.in_(chunk)):
+                extracted[row.id] = analysis_queue.extracted_fields(row)
+        return {job_id: fields for job_id, fields in extracted.items() if fields}
+    finally:
+        db.close()
+
+
+def _claim(job_ids: list, version: tuple):
+    """Create the batch row and mark the jobs still pending as "batched" in one transaction: (batch id, claimed ids)
+
+    (None, []) if none of the jobs is pending anymore.
+    """
+    db = SessionLocal()
+    try:
+        batch = AnalysisBatch(status="submitting", resume_hash=version[0], prompt_version=version[1])
+        db.add(batch)
+        db.flush()
+        for chunk in _chunks(job_ids, ID_CHUNK):
+            db.query(Job).filter(Job.id.in_(chunk), Job.analysis_status == "pending").update(
+                {"analysis_status": "batched", "analysis_batch_id": batch.id}, synchronize_session=False
+            )
+        claimed = [row.id for row in db.query(Job.id).filter(
+            Job.analysis_batch_id == batch.id, Job.analysis_status == "batched"
+        ).all()]
+        if not claimed:
+            db.rollback()
+            return None, []
+        batch.job_count = len(claimed)
+        db.commit()
+        return batch.id, claimed
+    finally:
+        db.close()
+
+
+def _release(batch_id: int, error_message: str) -> list:
+    """Close a batch without results: its jobs are pending again. Returns their ids"""
+    db = SessionLocal()
+    try:
+        job_ids = [row.id for row in db.query(Job.id).filter(
+            Job.analysis_batch_id == batch_id, Job.analysis_status == "batched"
+        ).all()]
+        db.query(Job).filter(Job.analysis_batch_id == batch_id, Job.analysis_status == "batched").update(
+            {"analysis_status": "pending"}, synchronize_session=False
+        )
+        db.query(AnalysisBatch).filter(AnalysisBatch.id == batch_id).update(
+            {"status": "failed", "error_message": error_message, "completed_at": _now()}, synchronize_session=False
+        )
+        db.commit()
+        return job_ids
+    finally:
+        db.close()
+
+
+def release_interrupted() -> int:
+    """Release batches left "submitting" by a stopped process (called at startup, before the workers start)"""
+    db = SessionLocal()
+    try:
+        batch_ids = [row.id for row in db.query(AnalysisBatch.id).filter(AnalysisBatch.status == "submitting").all()]
+    finally:
+        db.close()
+    for batch_id in batch_ids:
+        _release(batch_id, "Submission interrupted")
+    return len(batch_ids)
+
+
+def _update_batch(batch_id: int, **values):
+    db = SessionLocal()
+    try:
+        db.query(AnalysisBatch).filter(AnalysisBatch.id == batch_id).update(values, synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+
+def _open_batches() -> list:
+    db = SessionLocal()
+    try:
+        rows = db.query(AnalysisBatch.id, AnalysisBatch.provider_batch_id).filter(
+            AnalysisBatch.status.in_(OPEN_STATUSES), AnalysisBatch.provider_batch_id.isnot(None)
+        ).order_by(AnalysisBatch.id).all()
+        return [(row.id, row.provider_batch_id) for row in rows]
+    finally:
+        db.close()
+
+
+def _save_results(batch_id: int, batch, results: dict, failed: dict, usage: dict, cost: float):
+    """Apply all results of a batch in a single transaction; returns the ids set back to pending
+
+    Only jobs still "batched" in this batch are touched (deleted jobs are skipped). None if already saved.
+    """
+    db = SessionLocal()
+    try:
+        record = db.get(AnalysisBatch, batch_id)
+        if record is None or record.status not in OPEN_STATUSES:
+            return None
+        version = (record.resume_hash, record.prompt_version)
+        requeue = []
+        jobs = db.query(Job).filter(Job.analysis_batch_id == batch_id, Job.analysis_status == "batched").all()
+        for job in jobs:
+            if job.id in results:
+                analysis_queue.apply_analysis(job, results[job.id])
+                if job.analysis_status == "done":
+                    job.analysis_resume_hash, job.analysis_prompt_version = version
+            elif job.id in failed:
+                logger.warning(f"Batch {batch_id} | job {job.id} failed: {failed[job.id]}")
+                job.analysis_status = "failed"
+            else:
+                job.analysis_status = "pending"
+                requeue.append(job.id)
+            dedup.settle_duplicates(job, db)
+
+        record.status = "applied"
+        record.output_file_id = batch.output_file_id
+        record.error_file_id = batch.error_file_id
+        record.completed_count = len(results)
+        record.failed_count = len(failed)
+        record.prompt_tokens = usage["prompt_tokens"]
+        record.cached_tokens = usage["cached_tokens"]
+        record.completion_tokens = usage["completion_tokens"]
+        record.cost = cost
+        record.completed_at = _now()
+        if requeue:
+            record.error_message = f"Batch {batch.status}: {len(requeue)} jobs without result, pending again"
+        db.commit()
+        return requeue
+    finally:
+        db.close()
+
+
+def batch_stats(db) -> dict:
+    """Progress and cost of Batch API analyses for /api/stats"""
+    recent = db.query(AnalysisBatch).order_by(AnalysisBatch.id.desc()).limit(RECENT_BATCHES).all()
+    return {
+        "open": db.query(AnalysisBatch).filter(AnalysisBatch.status.in_(OPEN_STATUSES)).count(),
+        "jobs_waiting": db.query(Job).filter(Job.analysis_status == "batched").count(),
+        "total_cost": round(db.query(func.coalesce(func.sum(AnalysisBatch.cost), 0)).scalar(), 4),
+        "recent": [
+            {
+                "id": batch.id,
+                "status": batch.status,
+                "job_count": batch.job_count,
+                "completed_count": batch.completed_count,
+                "failed_count": batch.failed_count,
+                "prompt_tokens": batch.prompt_tokens,
+                "cached_tokens": batch.cached_tokens,
+                "completion_tokens": batch.completion_tokens,
+                "cost": round(batch.cost, 4),
+                "error_message": batch.error_message,
+                "created_at": batch.created_at.isoformat() if batch.created_at else None,
+                "completed_at": batch.completed_at.isoformat() if batch.completed_at else None
+            }
+            for batch in recent
+        ]
+    }
+
+
+async def start_poller():
+    """Release interrupted submissions and start checking open batches every BATCH_POLL_INTERVAL seconds"""
+    global _poller
+    released = await asyncio.to_thread(release_interrupted)
+    if released:
+        logger.info(f"Batch | {released} interrupted submissions released, jobs pending again")
+    _poller = asyncio.create_task(_poll_loop())
+
+
+async def stop_poller():
+    global _poller
+    if _poller is None:
+        return
+    _poller.cancel()
+    await asyncio.gather(_poller, return_exceptions=True)
+    _poller = None
+
+
+async def _poll_loop():
+    while True:
+        try:
+            await poll()
+        except Exception as e:
+            logger.error(f"Batch | poll failed: {e}")
+        await asyncio.sleep(BATCH_POLL_INTERVAL)
+
+
+async def _main(args):
+    from app.database import init_db
+    init_db()
+    try:
+        if args.command == "submit":
+            batch_ids = await submit_pending(args.limit)
+            print(f"Submitted batches: {batch_ids or 'none (no pending jobs)'}")
+            return
+        while True:
+            closed = await poll()
+            if closed:
+                print(f"Saved batches: {closed}")
+            if not args.wait or not await asyncio.to_thread(_open_batches):
+                return
+            await asyncio.sleep(BATCH_POLL_INTERVAL)
+    finally:
+        await llm.client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Batch API job analysis")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    submit_parser = subparsers.add_parser("submit", help="Submit pending jobs")
+    submit_parser.add_argument("--limit", type=int, help="At most this many jobs, active statuses first")
+    poll_parser = subparsers.add_parser("poll", help="Check open batches and save finished results")
+    poll_parser.add_argument("--wait", action="store_true", help="Keep polling until no batch is open")
+    asyncio.run(_main(parser.parse_args()))
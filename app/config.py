@@ -9,19 +9,157 @@ OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 OPENAI_MODEL = "gpt-4o"  # GPT-4 Omni - latest model with better quality
 OPENAI_TEMPERATURE = 0.5  # Increased for more detailed analysis
 OPENAI_MAX_TOKENS = 3000
-OPENAI_TIMEOUT = 30
+OPENAI_TIMEOUT = 30  # Seconds per HTTP attempt (read/write), and at most between two chunks of a stream
+
+# OpenAI resilience (see resilience.py): deadline for a call including all retries (and reading a streamed
+# cover letter), backoff with full jitter
+OPENAI_CALL_DEADLINE = 90
+OPENAI_MAX_RETRIES = 4
+OPENAI_BACKOFF_BASE = 0.5   # Seconds, doubled per attempt
+OPENAI_BACKOFF_MAX = 20
+# Circuit breaker: fail fast for CIRCUIT_RECOVERY_SECONDS after this many consecutive calls failed (retries exhausted)
+CIRCUIT_FAILURE_THRESHOLD = 5
+CIRCUIT_RECOVERY_SECONDS = 30
+# Shared HTTP connection pool
+OPENAI_HTTP2 = True
+OPENAI_CONNECT_TIMEOUT = 5
+OPENAI_MAX_CONNECTIONS = 20
+OPENAI_KEEPALIVE_CONNECTIONS = 10
+OPENAI_KEEPALIVE_EXPIRY = 60
+# Base URL override (e.g. a local mock server for resilience tests)
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL")
+
+# LLM backend: "openai" or "fake" - the offline deterministic client in fake_llm.py (no API key, for
+# benchmarks and development). The fake answers after FAKE_LLM_LATENCY seconds plus generation time
+LLM_BACKEND = os.getenv("LLM_BACKEND", "openai")
+FAKE_LLM_LATENCY = float(os.getenv("FAKE_LLM_LATENCY", "0.5"))
+FAKE_LLM_TOKENS_PER_SECOND = float(os.getenv("FAKE_LLM_TOKENS_PER_SECOND", "200"))
+FAKE_LLM_COMPLETION_TOKENS = int(os.getenv("FAKE_LLM_COMPLETION_TOKENS", "400"))  # Text answers (cover letters)
+FAKE_LLM_ERROR_RATE = float(os.getenv("FAKE_LLM_ERROR_RATE", "0"))  # Share of requests failing with 429 / 500
+FAKE_LLM_SEED = int(os.getenv("FAKE_LLM_SEED", "42"))
+
+# OpenAI account quotas (see https://platform.openai.com/settings/organization/limits)
+OPENAI_RPM_LIMIT = int(os.getenv("OPENAI_RPM_LIMIT", "500"))
+OPENAI_TPM_LIMIT = int(os.getenv("OPENAI_TPM_LIMIT", "30000"))
 
 # Database
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./data/jobs.db")
 
+# SQLite pragmas applied to every new connection. "tuned": WAL lets readers run while a
+# commit is in progress; "default" keeps SQLite defaults (rollback journal, full sync)
+SQLITE_PROFILES = {
+    "tuned": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",    # Safe with WAL: only the last commits can be lost on power failure
+        "cache_size": -65536,       # 64 MB page cache (negative value = KiB)
+        "mmap_size": 268435456,     # 256 MB memory-mapped reads
+        "busy_timeout": 5000,       # ms to wait for the write lock instead of failing
+        "temp_store": "MEMORY",
+    },
+    "default": {
+        "busy_timeout": 5000,
+    },
+}
+SQLITE_PROFILE = os.getenv("SQLITE_PROFILE", "tuned")
+
+# Connection pool: SQLite file connections are cheap but reused to keep the page cache warm;
+# Postgres gets a bounded pool with stale connection checks
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = 30
+DB_POOL_RECYCLE = 1800  # Postgres only: reconnect after 30 minutes
+
+# Background analysis: number of analyses running at the same time
+ANALYSIS_CONCURRENCY = 3
+
+# Analysis mode: "complete" - one OPENAI_MODEL call for everything; "tiered" - a cheap extraction tier
+# (title, company, explicit visa statement) first, then the reasoning tier (visa likelihood, match analysis; the
+# extracted fields are given to it, not requested again)
+ANALYSIS_MODE = os.getenv("ANALYSIS_MODE", "complete")
+# Extraction tier: "heuristic" (regular expressions, no API call), "llm" (EXTRACT_MODEL)
+# or "auto" (heuristic, EXTRACT_MODEL only when title or company is not found)
+EXTRACT_BACKEND = os.getenv("EXTRACT_BACKEND", "auto")
+EXTRACT_MODEL = "gpt-4o-mini"
+EXTRACT_MAX_TOKENS = 300
+# Reasoning tier: "background" (queued right after extraction) or "on_demand" (POST /api/jobs/{id}/analyze)
+REASONING_SCHEDULE = os.getenv("REASONING_SCHEDULE", "background")
+
+# Cover letters: the model writes only the [CUSTOM_CONTENT] section of the base template
+COVER_LETTER_MAX_TOKENS = 800
+
+# Responses that are cut off or malformed: missing fields are rebuilt by this cheaper model
+JSON_REPAIR_MODEL = "gpt-4o-mini"
+
+# Re-analysis of stale jobs (resume or prompt changed): job statuses in this order, newest first within each
+REANALYSIS_STATUS_PRIORITY = ["interview", "applied", "new", "offer", "rejected"]
+
+# Batch API analysis (batch.py): pending jobs are sent as one request file and answered within
+# BATCH_COMPLETION_WINDOW at BATCH_PRICE_RATIO of the normal price. Open batches are checked every
+# BATCH_POLL_INTERVAL seconds while the app runs
+BATCH_COMPLETION_WINDOW = "24h"
+BATCH_POLL_INTERVAL = int(os.getenv("BATCH_POLL_INTERVAL", "60"))
+BATCH_PRICE_RATIO = 0.5
+# OpenAI limits per batch: 50,000 requests and a 200 MB input file; larger backlogs are split
+BATCH_MAX_REQUESTS = 50000
+BATCH_MAX_FILE_BYTES = 190 * 1024 * 1024
+
+# LLM response cache: entries older than TTL are ignored, least recently used evicted above the limit
+LLM_CACHE_TTL_DAYS = 30
+LLM_CACHE_MAX_ENTRIES = 5000
+
+# Dashboard analytics (/api/analytics): results are cached until a job is written in this process;
+# writes by other processes (CLI) show up after this many seconds
+ANALYTICS_CACHE_TTL = 300
+ANALYTICS_WEEKS = 26  # Default range of the weekly application chart
+
+# Delta sync (sync.py, GET /api/jobs/changes): more changed jobs than this since a client's cursor - the client
+# reloads the full list instead; tombstones of deleted jobs are kept this many days
+SYNC_MAX_CHANGES = 500
+SYNC_TOMBSTONE_DAYS = 30
+
+# Full-text search (GET /api/jobs/search): only the newest matches, up to this many, are ranked by relevance
+# (more when too few of them pass the filters)
+SEARCH_RANK_WINDOW = 1000
+
+# HTTP (http_cache.py): responses from COMPRESS_MIN_SIZE bytes are compressed - brotli when the optional
+# brotli package is installed and accepted by the client, gzip otherwise. Static files requested with their
+# content hash (?v=, added to the pages' asset links) are cached by the browser for STATIC_MAX_AGE seconds
+COMPRESS_MIN_SIZE = 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+COMPRESS_THREAD_MIN_SIZE = 65536  # Larger bodies are compressed in a worker thread, not on the event loop
+STATIC_MAX_AGE = 31536000  # One year
+
+# LLM call log: rows are buffered and written in batches of LOG_BATCH_SIZE or every LOG_FLUSH_INTERVAL_MS,
+# callers wait when LOG_BUFFER_SIZE rows are pending
+LOG_BATCH_SIZE = 50
+LOG_FLUSH_INTERVAL_MS = 500
+LOG_BUFFER_SIZE = 1000
+
+# Local keyword match score (0-100) below which new jobs are not sent to the LLM (0 = analyze all)
+LOCAL_MATCH_THRESHOLD = 15
+
+# Near-duplicate detection: estimated Jaccard similarity of job descriptions
+DUPLICATE_SIMILARITY_THRESHOLD = 0.8
+
+# Job descriptions in prompts (ingest.py): cleaned of HTML and boilerplate, then cut to this many tokens
+# dropping the least useful sections first (counted with tiktoken)
+JOB_DESCRIPTION_MAX_TOKENS = 1200
+# Seconds until loading the tiktoken encoding is tried again after it failed (offline); estimated counts meanwhile
+TIKTOKEN_RETRY_INTERVAL = 300
+
 # Text length limits
-MAX_JOB_DESCRIPTION_LENGTH = 5000
 MAX_RESUME_LENGTH = 5000
 
-# Cost for statistics calculation
-# GPT-4o: ~$0.0025/1K input + $0.01/1K output tokens
-# Using average estimate for mixed usage
+# Cost for statistics calculation: USD per 1K (input, output) tokens, priced when a call is logged
+MODEL_PRICING = {
+    "gpt-4o": (0.0025, 0.01),
+    "gpt-4o-mini": (0.00015, 0.0006),
+}
+# Fallback for models missing above and for calls logged without the input/output split
 COST_PER_1K_TOKENS = 0.008
+# Input tokens served from the provider's prompt cache (repeated prompt prefix) are billed at this share
+CACHED_INPUT_PRICE_RATIO = 0.5
 
 # Logging configuration
 logging.basicConfig(
@@ -0,0 +1,121 @@
+"""
+Cover letter assembly from the base template.
+
+The model only writes the [CUSTOM_CONTENT] section (and values for template
+placeholders the app can't fill itself); the greeting, introduction and
+closing come from templates/cover_letter_base.txt unchanged. [POSITION] and
+[COMPANY] are filled in locally.
+
+Model output format: the custom text, preceded by one "[NAME]: value" line
+per requested placeholder and a "[CUSTOM_CONTENT]:" line when placeholders
+were requested.
+"""
+import re
+
+CUSTOM_CONTENT = "[CUSTOM_CONTENT]"
+_PLACEHOLDER = re.compile(r"\[([A-Z][A-Z0-9_]*)\]")
+_VALUE_LINE = re.compile(r"\[([A-Z][A-Z0-9_]*)\]:[ \t]*(.*)")
+# Placeholders filled from the job record: name -> argument of local_values()
+LOCAL_PLACEHOLDERS = {"POSITION": "job_title", "JOB_TITLE": "job_title", "COMPANY": "company", "COMPANY_NAME": "company"}
+
+
+def split_template(template: str):
+    """(text before, text after) the custom section; without [CUSTOM_CONTENT] it goes after the first paragraph"""
+    prefix, marker, suffix = template.partition(CUSTOM_CONTENT)
+    if marker:
+        return prefix, suffix
+    first, separator, rest = template.partition("\n\n")
+    return first + "\n\n", "\n\n" + rest if separator else ""
+
+
+def model_placeholders(template: str) -> list:
+    """Placeholders the model has to fill (not known locally), in template order"""
+    names = dict.fromkeys(_PLACEHOLDER.findall(template))
+    return [name for name in names if name not in LOCAL_PLACEHOLDERS and f"[{name}]" != CUSTOM_CONTENT]
+
+
+def local_values(job_title: str, company: str) -> dict:
+    arguments = {"job_title": job_title, "company": company}
+    return {name: arguments[argument] for name, argument in LOCAL_PLACEHOLDERS.items()}
+
+
+def fill(text: str, values: dict) -> str:
+    """Replace known placeholders, leave unknown ones as they are"""
+    return _PLACEHOLDER.sub(lambda match: values.get(match.group(1), match.group(0)), text)
+
+
+def parse_output(text: str, placeholders: list):
+    """Split model output into (placeholder values, custom text)"""
+    if not placeholders:
+        return {}, text.strip()
+    values = {}
+    lines = text.strip().split("\n")
+    for index, line in enumerate(lines):
+        match = _VALUE_LINE.fullmatch(line.strip())
+        if not match:
+            return values, "\n".join(lines[index:]).strip()
+        if f"[{match.group(1)}]" == CUSTOM_CONTENT:
+            return values, "\n".join([match.group(2)] + lines[index + 1:]).strip()
+        values[match.group(1)] = match.group(2).strip()
+    return values, ""
+
+
+def assemble(template: str, values: dict, content: str) -> str:
+    prefix, suffix = split_template(template)
+    return (fill(prefix, values) + content.strip() + fill(suffix, values)).strip()
+
+
+class LetterStream:
+    """Turns streamed model output into chunks of the final letter
+
+    The concatenated chunks equal assemble() of the complete output: the template
+    prefix is sent as soon as the placeholder lines (if any) are complete, whitespace
+    around the custom text is held back and the suffix is sent by finish().
+    """
+
+    def __init__(self, template: str, values: dict, placeholders: list):
+        self.template = template
+        self.values = dict(values)
+        self.placeholders = placeholders
+        self.header = ""           # Output before the custom text (placeholder lines)
+        self.started = False       # Prefix sent
+        self.pending_space = ""    # Trailing whitespace, sent only if more text follows
+
+    def _header_done(self) -> bool:
+        """Placeholder lines are complete when a line is not "[NAME]: value" or [CUSTOM_CONTENT]: was reached"""
+        lines = self.header.lstrip().split("\n")
+        for line in lines[:-1]:
+            match = _VALUE_LINE.fullmatch(line.strip())
+            if not match or f"[{match.group(1)}]" == CUSTOM_CONTENT:
+                return True
+        return bool(lines[-1].strip()) and not lines[-1].lstrip().startswith("[")
+
+    def feed(self, delta: str) -> str:
+        if self.started:
+            return self._text(delta)
+        self.header += delta
+        if self.placeholders and not self._header_done():
+            return ""
+        values, content = parse_output(self.header, self.placeholders)
+        if not content:
+            return ""
+        self.values.update(values)
+        self.started = True
+        prefix, _ = split_template(self.template)
+        trailing_space = self.header[len(self.header.rstrip()):]
+        return fill(prefix, self.values).lstrip() + self._text(content + trailing_space)
+
+    def _text(self, delta: str) -> str:
+        text = self.pending_space + delta
+        stripped = text.rstrip()
+        self.pending_space = text[len(stripped):]
+        return stripped
+
+    def finish(self) -> str:
+        """Rest of the letter after the stream ended (all of it if nothing was sent yet)"""
+        if not self.started:
+            values, content = parse_output(self.header, self.placeholders)
+            self.values.update(values)
+            return assemble(self.template, self.values, content)
+        _, suffix = split_template(self.template)
+        return fill(suffix, self.values).rstrip()
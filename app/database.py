@@ -1,13 +1,69 @@
-from sqlalchemy import create_engine
+import time
+
+from sqlalchemy import create_engine, event, inspect, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from app.config import DATABASE_URL, logger
-
-# Create engine for SQLite
-engine = create_engine(
-    DATABASE_URL, 
-    connect_args={"check_same_thread": False}  # Required for SQLite
+from app.config import (
+    DATABASE_URL,
+    SQLITE_PROFILES,
+    SQLITE_PROFILE,
+    DB_POOL_SIZE,
+    DB_MAX_OVERFLOW,
+    DB_POOL_TIMEOUT,
+    DB_POOL_RECYCLE,
+    logger
 )
+from app.metrics import db_queries, db_query_duration
+
+
+def make_engine(url: str = DATABASE_URL, sqlite_profile: str = SQLITE_PROFILE):
+    """Engine with pool settings for the backend; SQLite pragmas applied on every new connection"""
+    if not url.startswith("sqlite"):
+        return create_engine(
+            url,
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+            pool_recycle=DB_POOL_RECYCLE,
+            pool_pre_ping=True
+        )
+
+    pool_options = {}
+    if url not in ("sqlite://", "sqlite:///:memory:"):
+        # In-memory databases use a single shared connection, file databases a queue pool
+        pool_options = {"pool_size": DB_POOL_SIZE, "max_overflow": DB_MAX_OVERFLOW, "pool_timeout": DB_POOL_TIMEOUT}
+    sqlite_engine = create_engine(
+        url,
+        connect_args={"check_same_thread": False},  # Required for SQLite
+        **pool_options
+    )
+    pragmas = SQLITE_PROFILES[sqlite_profile]
+
+    @event.listens_for(sqlite_engine, "connect")
+    def _apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+    return sqlite_engine
+
+
+engine = make_engine()
+
+
+# Query count and latency for /metrics
+@event.listens_for(engine, "before_cursor_execute")
+def _query_started(conn, cursor, statement, parameters, context, executemany):
+    context.query_start = time.perf_counter()
+
+
+@event.listens_for(engine, "after_cursor_execute")
+def _query_finished(conn, cursor, statement, parameters, context, executemany):
+    operation = statement.split(None, 1)[0].upper()
+    db_query_duration.observe(time.perf_counter() - context.query_start, operation)
+    db_queries.inc(operation)
+
 
 # Session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -28,5 +84,72 @@ def get_db():
 def init_db():
     """Create all tables in database"""
     Base.metadata.create_all(bind=engine)
+    migrate_db()
+    create_search_index()
     logger.info("Database tables created successfully")
 
+
+def migrate_db():
+    """Add columns and indexes introduced after a table was first created
+
+    create_all() skips tables that already exist, so databases created by an
+    older version would miss new model fields.
+    """
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing:
+                    column_type = column.type.compile(dialect=engine.dialect)
+                    conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
+                    logger.info(f"Migration | added column {table.name}.{column.name}")
+            for index in table.indexes:
+                index.create(conn, checkfirst=True)
+
+
+
+# Job fields indexed for full-text search, and their BM25 weights (title matches rank highest)
+SEARCH_COLUMNS = {
+    "title": 10.0,
+    "company": 5.0,
+    "job_description": 1.0,
+    "match_analysis": 2.0,
+    "sponsorship_analysis": 2.0,
+}
+
+
+def create_search_index():
+    """Create the SQLite FTS5 index over jobs (kept in sync by triggers) and fill it from existing rows"""
+    if engine.dialect.name != "sqlite":
+        return
+
+    columns = ", ".join(SEARCH_COLUMNS)
+    new_values = ", ".join(f"new.{name}" for name in SEARCH_COLUMNS)
+    old_values = ", ".join(f"old.{name}" for name in SEARCH_COLUMNS)
+    weights = ", ".join(str(weight) for weight in SEARCH_COLUMNS.values())
+
+    with engine.begin() as conn:
+        if conn.execute(text("SELECT 1 FROM sqlite_master WHERE name = 'jobs_fts'")).first():
+            return
+        # External content table: the text is read from jobs, only the index is stored
+        conn.execute(text(
+            f"CREATE VIRTUAL TABLE jobs_fts USING fts5({columns}, "
+            f"content='jobs', content_rowid='id', tokenize='porter unicode61')"
+        ))
+        conn.execute(text(
+            f"CREATE TRIGGER jobs_fts_insert AFTER INSERT ON jobs BEGIN "
+            f"INSERT INTO jobs_fts(rowid, {columns}) VALUES (new.id, {new_values}); END"
+        ))
+        conn.execute(text(
+            f"CREATE TRIGGER jobs_fts_delete AFTER DELETE ON jobs BEGIN "
+            f"INSERT INTO jobs_fts(jobs_fts, rowid, {columns}) VALUES ('delete', old.id, {old_values}); END"
+        ))
+        conn.execute(text(
+            f"CREATE TRIGGER jobs_fts_update AFTER UPDATE OF {columns} ON jobs BEGIN "
+            f"INSERT INTO jobs_fts(jobs_fts, rowid, {columns}) VALUES ('delete', old.id, {old_values}); "
+            f"INSERT INTO jobs_fts(rowid, {columns}) VALUES (new.id, {new_values}); END"
+        ))
+        conn.execute(text(f"INSERT INTO jobs_fts(jobs_fts, rank) VALUES ('rank', 'bm25({weights})')"))
+        conn.execute(text("INSERT INTO jobs_fts(jobs_fts) VALUES ('rebuild')"))
+    logger.info("Migration | full-text search index created and filled from existing jobs")
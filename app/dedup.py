@@ -0,0 +1,244 @@
+"""
+Near-duplicate job detection.
+
+The same posting is often pasted twice with different tracking links or
+whitespace. Each description gets a MinHash signature (one-permutation
+hashing: every word 5-gram is hashed once into one of SIGNATURE_BINS bins)
+and signatures are indexed with LSH banding, so a lookup only compares
+against the few jobs that share a band instead of every stored job.
+
+A near-duplicate of a job whose analysis is still to come (same bulk import,
+or still queued) waits for it: it stays "pending" with duplicate_of_id set,
+the workers leave it alone and settle_duplicates() copies the analysis when
+the original's is saved.
+"""
+import re
+import threading
+import zlib
+from array import array
+
+from app.config import DUPLICATE_SIMILARITY_THRESHOLD, logger
+from app.database import SessionLocal
+from app.models import Job
+
+
+SHINGLE_SIZE = 5
+SIGNATURE_BINS = 64
+_BIN_BITS = 6
+_BIN_MASK = SIGNATURE_BINS - 1
+LSH_BANDS = 16
+LSH_ROWS = SIGNATURE_BINS // LSH_BANDS
+
+# Analysis statuses of an original that its near-duplicates wait for
+ANALYZING_STATUSES = ("pending", "running", "batched")
+
+_EMPTY = 0xFFFFFFFF
+_URL_PATTERN = re.compile(r"https?://\S+|www\.\S+")
+_WORD_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def compute_signature(text: str) -> tuple:
+    """MinHash signature of normalized word 5-grams (empty tuple for texts without words)"""
+    words = _WORD_PATTERN.findall(_URL_PATTERN.sub(" ", text.lower()))
+    if not words:
+        return ()
+    data = " ".join(words).encode()
+
+    # Byte offsets of every word inside data
+    starts = [0]
+    for word in words:
+        starts.append(starts[-1] + len(word) + 1)
+
+    # crc32 is deterministic (built-in hash() is salted per process, signatures are stored in DB)
+    # and runs in C over a slice of the normalized text - one call per shingle
+    bins = [_EMPTY] * SIGNATURE_BINS
+    crc32 = zlib.crc32
+    ends = starts[SHINGLE_SIZE:] or starts[-1:]
+    for start, end in zip(starts, ends):
+        value = crc32(data[start:end - 1])
+        index = value & _BIN_MASK
+        value >>= _BIN_BITS
+        if value < bins[index]:
+            bins[index] = value
+
+    # Densification: empty bins borrow the value of the next filled bin
+    if _EMPTY in bins:
+        filled = [i for i, value in enumerate(bins) if value != _EMPTY]
+        for i in range(SIGNATURE_BINS):
+            if bins[i] == _EMPTY:
+                source = next((j for j in filled if j > i), filled[0])
+                bins[i] = bins[source] + (source - i) % SIGNATURE_BINS
+    return tuple(bins)
+
+
+def signature_to_bytes(signature: tuple) -> bytes:
+    return array("I", signature).tobytes()
+
+
+def signature_from_bytes(data: bytes) -> tuple:
+    return tuple(array("I", data))
+
+
+def similarity(first: tuple, second: tuple) -> float:
+    """Estimated Jaccard similarity of two signatures"""
+    return sum(a == b for a, b in zip(first, second)) / SIGNATURE_BINS
+
+
+class DuplicateIndex:
+    """In-memory LSH index over job description signatures"""
+
+    def __init__(self):
+        self.signatures = {}
+        self.buckets = [{} for _ in range(LSH_BANDS)]
+        self.lock = threading.Lock()
+
+    def _bands(self, signature: tuple):
+        for band in range(LSH_BANDS):
+            yield band, signature[band * LSH_ROWS:(band + 1) * LSH_ROWS]
+
+    def add(self, job_id: int, signature: tuple):
+        """Insert or replace signature for a job"""
+        self.remove(job_id)
+        if not signature:
+            return
+        with self.lock:
+            self.signatures[job_id] = signature
+            for band, key in self._bands(signature):
+                self.buckets[band].setdefault(key, set()).add(job_id)
+
+    def remove(self, job_id: int):
+        with self.lock:
+            signature = self.signatures.pop(job_id, None)
+            if signature is None:
+                return
+            for band, key in self._bands(signature):
+                bucket = self.buckets[band].get(key)
+                if bucket:
+                    bucket.discard(job_id)
+                    if not bucket:
+                        del self.buckets[band][key]
+
+    def find(self, signature: tuple, exclude_id: int = None):
+        """Most similar indexed job above the threshold: (job_id, similarity) or None"""
+        if not signature:
+            return None
+        with self.lock:
+            candidates = set()
+            for band, key in self._bands(signature):
+                candidates.update(self.buckets[band].get(key, ()))
+            candidates.discard(exclude_id)
+
+            best = None
+            for job_id in candidates:
+                score = similarity(signature, self.signatures[job_id])
+                if score >= DUPLICATE_SIMILARITY_THRESHOLD and (best is None or score > best[1]):
+                    best = (job_id, score)
+        return best
+
+    def __len__(self):
+        return len(self.signatures)
+
+
+duplicate_index = DuplicateIndex()
+
+
+def load_index():
+    """Fill the index from the jobs table, computing signatures missing in older databases"""
+    db = SessionLocal()
+    try:
+        rows = db.query(Job.id, Job.job_description, Job.description_signature).filter(
+            Job.job_description.isnot(None)
+        ).all()
+        computed = 0
+        for row in rows:
+            if row.description_signature:
+                signature = signature_from_bytes(row.description_signature)
+            else:
+                signature = compute_signature(row.job_description)
+                db.query(Job).filter(Job.id == row.id).update(
+                    {"description_signature": signature_to_bytes(signature)},
+                    synchronize_session=False
+                )
+                computed += 1
+            duplicate_index.add(row.id, signature)
+        db.commit()
+        logger.info(f"Duplicate index | {len(duplicate_index)} jobs indexed, {computed} signatures computed")
+    finally:
+        db.close()
+
+
+def link_duplicate(job: Job, db) -> bool:
+    """Compute signature for a new/edited job; copy analysis from an analyzed near-duplicate
+
+    A pending job whose near-duplicate is still being analyzed is linked to it and waits for that analysis.
+    Returns True when analysis was copied (or will be) and no LLM call is needed.
+    """
+    if not job.job_description:
+        job.description_signature = None
+        job.duplicate_of_id = None
+        return False
+
+    signature = compute_signature(job.job_description)
+    job.description_signature = signature_to_bytes(signature)
+    match = duplicate_index.find(signature, exclude_id=job.id)
+    if not match:
+        job.duplicate_of_id = None
+        return False
+
+    original = db.get(Job, match[0])
+    if original and original.analysis_status in ANALYZING_STATUSES and job.analysis_status == "pending":
+        job.duplicate_of_id = original.id
+        logger.info(f"Duplicate index | job matches job {original.id} ({match[1]:.0%} similar), "
+                    f"waits for its analysis")
+        return True
+    if not original or original.analysis_status != "done":
+        return False
+
+    copy_analysis(job, original)
+    logger.info(f"Duplicate index | job matches job {original.id} ({match[1]:.0%} similar), analysis copied")
+    return True
+
+
+def copy_analysis(job: Job, original: Job):
+    job.duplicate_of_id = original.id
+    job.title = job.title or original.title
+    job.company = job.company or original.company
+    job.has_visa_sponsorship = original.has_visa_sponsorship
+    job.sponsorship_analysis = original.sponsorship_analysis
+    job.resume_match_percentage = original.resume_match_percentage
+    job.match_analysis = original.match_analysis
+    job.analysis_resume_hash = original.analysis_resume_hash
+    job.analysis_prompt_version = original.analysis_prompt_version
+    job.analysis_status = original.analysis_status
+
+
+def settle_duplicates(original: Job, db) -> int:
+    """Finish the jobs waiting for this job's analysis (before commit): copy it, or fail them with it"""
+    if original.analysis_status in ANALYZING_STATUSES:
+        return 0
+    waiting = db.query(Job).filter(Job.duplicate_of_id == original.id, Job.analysis_status == "pending").all()
+    for job in waiting:
+        if original.analysis_status in ("done", "extracted"):
+            copy_analysis(job, original)
+        else:
+            job.analysis_status = original.analysis_status
+    if waiting:
+        logger.info(f"Duplicate index | job {original.id} {original.analysis_status}, "
+                    f"{len(waiting)} near-duplicates settled")
+    return len(waiting)
+
+
+def release_duplicates(original_id: int, db) -> list:
+    """Jobs waiting for the analysis of a job being deleted: unlinked, analyzed on their own. Returns their ids"""
+    waiting = db.query(Job).filter(Job.duplicate_of_id == original_id, Job.analysis_status == "pending").all()
+    for job in waiting:
+        job.duplicate_of_id = None
+    return [job.id for job in waiting]
+
+
+def index_job(job: Job):
+    """Update index after the job was committed"""
+    if job.description_signature:
+        duplicate_index.add(job.id, signature_from_bytes(job.description_signature))
+    else:
+        duplicate_index.remove(job.id)
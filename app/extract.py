@@ -0,0 +1,97 @@
+"""
+Local extraction tier of the tiered analysis.
+
+Pulls the job title, company and explicit visa sponsorship statements out of
+a posting with regular expressions, no API call. Whatever it can't find is
+left None, so the caller can fall back to the small-model extraction.
+"""
+import re
+
+
+_TITLE_LABEL = re.compile(r"^\s*(?:job\s+title|position|role|title)\s*[:\-–]\s*(.+?)\s*$", re.IGNORECASE | re.MULTILINE)
+_COMPANY_LABEL = re.compile(r"^\s*(?:company|employer|organization)\s*[:\-–]\s*(.+?)\s*$", re.IGNORECASE | re.MULTILINE)
+# "Senior Python Developer at Acme Corp" / "Acme Corp is hiring a Backend Engineer"
+_TITLE_AT_COMPANY = re.compile(r"^\s*(.{3,80}?)\s+(?:at|@)\s+([A-Z][\w&.'-]*(?:[ \t]+[A-Z][\w&.'-]*){0,3})\s*$", re.MULTILINE)
+_COMPANY_HIRING = re.compile(
+    r"\b([A-Z][\w&.'-]*(?:[ \t]+[A-Z][\w&.'-]*){0,3})\s+is\s+(?:hiring|looking\s+for|seeking)\s+an?\s+"
+    r"([A-Z][\w/+#.-]*(?:[ \t]+[A-Z][\w/+#.-]*){0,5})"
+)
+_ABOUT_COMPANY = re.compile(r"^\s*About\s+([A-Z][\w&.'-]*(?:[ \t]+[A-Z][\w&.'-]*){0,3})\s*:?\s*$", re.MULTILINE)
+_NOT_COMPANY = {"Us", "The", "This", "You", "Role", "The Role", "The Job", "The Team", "The Company"}
+
+# Explicit statements only (same rule as the analysis prompt); negative phrases are checked first
+# because many of them contain a positive one ("will not sponsor" / "sponsor")
+_VISA_NEGATIVE = re.compile(
+    r"\b(?:no|not\s+(?:offer|provide)(?:ing)?)\s+(?:visa\s+)?sponsorship"
+    r"|\b(?:unable|not\s+(?:be\s+)?able)\s+to\s+sponsor"
+    r"|\b(?:cannot|can\s*not|can't|will\s+not|won't|do(?:es)?\s+not|don't)\s+(?:\w+\s+)?sponsor"
+    r"|\bwithout\s+(?:the\s+need\s+for\s+)?(?:visa\s+)?sponsorship"
+    r"|\bmust\s+(?:be|have)\s+(?:legally\s+)?(?:authorized|eligible|the\s+right)\s+to\s+work"
+    r"|\b(?:citizenship|security\s+clearance)\s+(?:is\s+)?required"
+    r"|\bmust\s+be\s+an?\s+(?:\w+\s+)?citizen",
+    re.IGNORECASE
+)
+_VISA_POSITIVE = re.compile(
+    r"\bvisa\s+sponsorship\s+(?:is\s+)?(?:available|offered|provided)"
+    r"|\b(?:will|can|able\s+to|happy\s+to|we)\s+(?:\w+\s+)?sponsor"
+    r"|\b(?:offer|provide|including)\s+(?:\w+\s+)?(?:visa\s+)?sponsorship"
+    r"|\b(?:visa|relocation\s+and\s+visa)\s+support",
+    re.IGNORECASE
+)
+_SENTENCE_END = re.compile(r"[.!?\n]")
+
+
+def _clean(value: str):
+    value = value.strip(" \t*#-–|,.")
+    return value if 1 < len(value) <= 200 else None
+
+
+def _sentence_around(text: str, start: int, end: int) -> str:
+    """The sentence containing text[start:end]"""
+    left = max((m.end() for m in _SENTENCE_END.finditer(text, 0, start)), default=0)
+    right = _SENTENCE_END.search(text, end)
+    return text[left:right.end() if right else len(text)].strip()
+
+
+def find_visa_statement(text: str):
+    """(True/False, sentence) for an explicit sponsorship statement, (None, None) otherwise"""
+    for value, pattern in ((False, _VISA_NEGATIVE), (True, _VISA_POSITIVE)):
+        match = pattern.search(text)
+        if match:
+            return value, _sentence_around(text, match.start(), match.end())
+    return None, None
+
+
+def extract_job_info(job_description: str) -> dict:
+    """Title, company, visa_sponsorship and visa_statement found in the posting (None when not found)"""
+    title = company = None
+
+    match = _TITLE_LABEL.search(job_description)
+    if match:
+        title = _clean(match.group(1))
+    match = _COMPANY_LABEL.search(job_description)
+    if match:
+        company = _clean(match.group(1))
+
+    if not title or not company:
+        match = _TITLE_AT_COMPANY.search(job_description[:500])
+        if match:
+            title = title or _clean(match.group(1))
+            company = company or _clean(match.group(2))
+    if not title or not company:
+        match = _COMPANY_HIRING.search(job_description[:1000])
+        if match:
+            company = company or _clean(match.group(1))
+            title = title or _clean(match.group(2))
+    if not company:
+        match = _ABOUT_COMPANY.search(job_description)
+        if match and match.group(1) not in _NOT_COMPANY:
+            company = _clean(match.group(1))
+
+    visa_sponsorship, visa_statement = find_visa_statement(job_description)
+    return {
+        "title": title,
+        "company": company,
+        "visa_sponsorship": visa_sponsorship,
+        "visa_statement": visa_statement
+    }
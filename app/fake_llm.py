@@ -0,0 +1,282 @@
+"""
+Offline LLM backend (LLM_BACKEND=fake): a deterministic stand-in for AsyncOpenAI.
+
+Implements the part of the client the app uses - chat.completions.create and
+.with_raw_response.create (plain, structured output and streaming) and
+close() - and returns the SDK's own response types, so llm.py, the
+resilience layer and the call log run unchanged without an API key:
+  - content depends only on FAKE_LLM_SEED and the request, so the same job
+    gets the same analysis in every run; JSON follows the requested schema
+  - latency: FAKE_LLM_LATENCY to the first token, then FAKE_LLM_TOKENS_PER_SECOND
+  - token counts: prompt ~4 characters per token, text answers FAKE_LLM_COMPLETION_TOKENS long
+    (at most max_tokens)
+  - prompt caching like OpenAI's: a system message of 1024+ tokens seen before is
+    reported as cached_tokens (in 128 token steps)
+  - FAKE_LLM_ERROR_RATE of the requests fail with 429 / 500 (seeded sequence)
+
+files and batches stand in for the Batch API (batch.py): a batch runs the
+lines of its input file through the same completions in the background and
+writes output / error files in the provider's format. Everything is kept in
+memory, a restart loses open batches.
+"""
+import asyncio
+import hashlib
+import json
+import random
+import time
+from types import SimpleNamespace
+
+import httpx
+import openai
+from openai.types import Batch, FileObject
+from openai.types.chat import ChatCompletion, ChatCompletionChunk
+
+from app.config import (
+    FAKE_LLM_LATENCY, FAKE_LLM_TOKENS_PER_SECOND, FAKE_LLM_COMPLETION_TOKENS, FAKE_LLM_ERROR_RATE, FAKE_LLM_SEED
+)
+
+WORDS = ("python backend team remote senior cloud aws data product growth visa relocation "
+         "kubernetes django api platform customers experience engineering ownership").split()
+SHORT_FIELDS = {"title", "company"}
+CHARS_PER_TOKEN = 4
+CACHE_MIN_TOKENS = 1024
+CACHE_STEP_TOKENS = 128
+FAKE_URL = "https://fake-llm.local/v1/chat/completions"
+BATCH_CONCURRENCY = 16  # Requests of a batch processed at the same time
+
+
+def _count_tokens(text: str) -> int:
+    return max(1, len(text) // CHARS_PER_TOKEN)
+
+
+def _sentence(rng: random.Random) -> str:
+    return " ".join(rng.choices(WORDS, k=rng.randint(6, 14))).capitalize() + "."
+
+
+def _schema_value(name: str, spec: dict, rng: random.Random):
+    """Value for one JSON schema property (string / integer / boolean, optionally nullable)"""
+    types = [option.get("type") for option in spec.get("anyOf", [spec])]
+    if "boolean" in types:
+        return rng.choice([True, False, None] if "null" in types else [True, False])
+    if "integer" in types:
+        return rng.randint(0, 100)
+    if name in SHORT_FIELDS:
+        return " ".join(rng.choices(WORDS, k=2)).title()
+    return " ".join(_sentence(rng) for _ in range(rng.randint(1, 4)))
+
+
+def _content(params: dict, rng: random.Random) -> str:
+    response_format = params.get("response_format") or {}
+    if response_format.get("type") == "json_schema":
+        properties = response_format["json_schema"]["schema"].get("properties", {})
+        return json.dumps({name: _schema_value(name, spec, rng) for name, spec in properties.items()})
+    sentences = []
+    length = min(FAKE_LLM_COMPLETION_TOKENS, params.get("max_tokens") or FAKE_LLM_COMPLETION_TOKENS)
+    while _count_tokens(" ".join(sentences)) < length:
+        sentences.append(_sentence(rng))
+    return " ".join(sentences)
+
+
+class FakeRawResponse:
+    """Same interface as the SDK's LegacyAPIResponse: synchronous parse()"""
+    retries_taken = 0
+
+    def __init__(self, parsed):
+        self.parsed = parsed
+        self.headers = httpx.Headers({"x-fake-llm": "1"})
+
+    def parse(self):
+        return self.parsed
+
+
+class FakeCompletions:
+    def __init__(self, client: "FakeAsyncOpenAI"):
+        self.client = client
+        self.with_raw_response = FakeRawCompletions(self)
+
+    async def create(self, **params):
+        client = self.client
+        client.requests += 1
+        prompt = "".join(message.get("content") or "" for message in params.get("messages", []))
+        digest = hashlib.sha256(f"{FAKE_LLM_SEED}:{params.get('model')}:{prompt}".encode()).digest()
+        rng = random.Random(digest)
+        content = _content(params, rng)
+        usage = {
+            "prompt_tokens": _count_tokens(prompt),
+            "completion_tokens": _count_tokens(content),
+        }
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        usage["prompt_tokens_details"] = {"cached_tokens": self._cached_tokens(params.get("messages", []))}
+
+        await asyncio.sleep(FAKE_LLM_LATENCY)
+        if client.error_rng.random() < FAKE_LLM_ERROR_RATE:
+            client.errors += 1
+            status = client.error_rng.choice([429, 500])
+            response = httpx.Response(status, request=httpx.Request("POST", FAKE_URL))
+            error_class = openai.RateLimitError if status == 429 else openai.InternalServerError
+            raise error_class(f"Fake LLM error {status}", response=response, body=None)
+
+        completion_id = "chatcmpl-fake-" + digest.hex()[:12]
+        if params.get("stream"):
+            return self._stream(completion_id, params.get("model"), content, usage,
+                                (params.get("stream_options") or {}).get("include_usage", False))
+
+        await asyncio.sleep(usage["completion_tokens"] / FAKE_LLM_TOKENS_PER_SECOND)
+        return ChatCompletion.model_validate({
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": params.get("model"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }],
+            "usage": usage,
+        })
+
+    def _cached_tokens(self, messages: list) -> int:
+        """Provider prompt cache: only a repeated prefix (the system message here) of 1024+ tokens is cached"""
+        if len(messages) < 2 or messages[0].get("role") != "system":
+            return 0
+        tokens = _count_tokens(messages[0]["content"])
+        if tokens < CACHE_MIN_TOKENS:
+            return 0
+        prefix = hashlib.sha256(messages[0]["content"].encode()).digest()
+        if prefix not in self.client.cached_prefixes:
+            self.client.cached_prefixes.add(prefix)
+            return 0
+        return tokens // CACHE_STEP_TOKENS * CACHE_STEP_TOKENS
+
+    async def _stream(self, completion_id: str, model: str, content: str, usage: dict, include_usage: bool):
+        """Word-sized deltas paced at FAKE_LLM_TOKENS_PER_SECOND, usage in a last chunk without choices"""
+        def chunk(choices, chunk_usage=None):
+            return ChatCompletionChunk.model_validate({
+                "id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()),
+                "model": model, "choices": choices, "usage": chunk_usage,
+            })
+
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        sent = 0
+        for index, word in enumerate(content.split(" ")):
+            delta = word if index == 0 else " " + word
+            sent += len(delta)
+            # Paced against the start time: many tiny sleeps would add up to more than the target rate
+            delay = start + sent / CHARS_PER_TOKEN / FAKE_LLM_TOKENS_PER_SECOND - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            yield chunk([{"index": 0, "delta": {"content": delta}, "finish_reason": None}])
+        yield chunk([{"index": 0, "delta": {}, "finish_reason": "stop"}])
+        if include_usage:
+            yield chunk([], usage)
+
+
+class FakeRawCompletions:
+    def __init__(self, completions: FakeCompletions):
+        self.completions = completions
+
+    async def create(self, **params):
+        return FakeRawResponse(await self.completions.create(**params))
+
+
+def _not_found(kind: str, object_id: str):
+    response = httpx.Response(404, request=httpx.Request("GET", FAKE_URL))
+    return openai.NotFoundError(f"No such {kind}: {object_id}", response=response, body=None)
+
+
+class FakeFiles:
+    def __init__(self):
+        self.files = {}
+
+    async def create(self, file, purpose: str):
+        """file is a (name, bytes) tuple like the SDK accepts"""
+        filename, data = file
+        file_id = f"file-fake-{len(self.files) + 1}"
+        self.files[file_id] = data
+        return FileObject(id=file_id, bytes=len(data), created_at=int(time.time()), filename=filename,
+                          object="file", purpose=purpose, status="processed")
+
+    def store(self, filename: str, lines: list) -> str:
+        file_id = f"file-fake-{len(self.files) + 1}"
+        self.files[file_id] = "".join(json.dumps(line) + "\n" for line in lines).encode()
+        return file_id
+
+    async def content(self, file_id: str):
+        """Same attributes as the SDK's binary response content: .content and .text"""
+        if file_id not in self.files:
+            raise _not_found("file", file_id)
+        data = self.files[file_id]
+        return SimpleNamespace(content=data, text=data.decode("utf-8"))
+
+
+class FakeBatches:
+    def __init__(self, client: "FakeAsyncOpenAI"):
+        self.client = client
+        self.batches = {}
+        self.tasks = set()
+
+    async def create(self, input_file_id: str, endpoint: str, completion_window: str, metadata: dict = None):
+        if input_file_id not in self.client.files.files:
+            raise _not_found("file", input_file_id)
+        batch_id = f"batch_fake_{len(self.batches) + 1}"
+        self.batches[batch_id] = Batch(
+            id=batch_id, completion_window=completion_window, created_at=int(time.time()), endpoint=endpoint,
+            input_file_id=input_file_id, object="batch", status="validating", metadata=metadata,
+            request_counts={"total": 0, "completed": 0, "failed": 0}
+        )
+        task = asyncio.create_task(self._run(batch_id))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        return self.batches[batch_id]
+
+    async def retrieve(self, batch_id: str):
+        if batch_id not in self.batches:
+            raise _not_found("batch", batch_id)
+        return self.batches[batch_id]
+
+    async def _run(self, batch_id: str):
+        """Answer every line of the input file, then write the output and error files"""
+        batch = self.batches[batch_id]
+        requests = [json.loads(line) for line in self.client.files.files[batch.input_file_id].splitlines() if line.strip()]
+        counts = batch.request_counts
+        counts.total = len(requests)
+        batch.status, batch.in_progress_at = "in_progress", int(time.time())
+        semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+
+        async def answer(request):
+            async with semaphore:
+                line = {"id": f"batch_req_{request['custom_id']}", "custom_id": request["custom_id"]}
+                try:
+                    completion = await self.client.chat.completions.create(**request["body"])
+                except openai.APIStatusError as e:
+                    counts.failed += 1
+                    return {**line, "response": {"status_code": e.status_code, "body": {"error": {"message": str(e)}}},
+                            "error": None}
+                counts.completed += 1
+                return {**line, "response": {"status_code": 200, "body": completion.model_dump()}, "error": None}
+
+        lines = await asyncio.gather(*(answer(request) for request in requests))
+        output = [line for line in lines if line["response"]["status_code"] == 200]
+        errors = [line for line in lines if line["response"]["status_code"] != 200]
+        batch.output_file_id = self.client.files.store(f"{batch_id}_output.jsonl", output) if output else None
+        batch.error_file_id = self.client.files.store(f"{batch_id}_error.jsonl", errors) if errors else None
+        batch.status, batch.completed_at = "completed", int(time.time())
+
+
+class FakeAsyncOpenAI:
+    """Drop-in for the AsyncOpenAI client in llm.py and batch.py; requests / errors count the calls served"""
+
+    def __init__(self):
+        self.chat = SimpleNamespace(completions=FakeCompletions(self))
+        self.files = FakeFiles()
+        self.batches = FakeBatches(self)
+        self.error_rng = random.Random(FAKE_LLM_SEED)
+        self.cached_prefixes = set()
+        self.requests = 0
+        self.errors = 0
+
+    async def close(self):
+        for task in list(self.batches.tasks):
+            task.cancel()
+        await asyncio.gather(*self.batches.tasks, return_exceptions=True)
@@ -0,0 +1,194 @@
+"""
+HTTP caching and compression.
+
+- ETags: weak_etag() builds a validator from a cheap version key (e.g. row count
+  and last change of the jobs table), not_modified() answers If-None-Match with 304
+- CompressionMiddleware: gzip (brotli when the optional `brotli` package is
+  installed and the client accepts it) for responses of COMPRESS_MIN_SIZE bytes
+  and more (from COMPRESS_THREAD_MIN_SIZE in a worker thread, so a large job
+  list doesn't stall other requests); event streams and NDJSON are passed
+  through unbuffered
+- Static assets: pages reference /static files with ?v=<content hash>
+  (render_page), and such requests are cached for STATIC_MAX_AGE; pages and
+  unversioned files are revalidated on every load
+"""
+import asyncio
+import gzip
+import hashlib
+import os
+import re
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import HTMLResponse, Response
+from starlette.staticfiles import StaticFiles
+
+from app.config import BROTLI_QUALITY, COMPRESS_MIN_SIZE, COMPRESS_THREAD_MIN_SIZE, GZIP_LEVEL, STATIC_MAX_AGE
+
+try:
+    import brotli
+except ImportError:  # Optional: gzip only
+    brotli = None
+
+STATIC_DIR = "app/static"
+COMPRESSIBLE_TYPES = ("text/", "application/json", "application/javascript", "image/svg+xml")
+# Streamed chunk by chunk (cover letter SSE, bulk import results): compression would hold them back
+STREAMING_TYPES = ("text/event-stream", "application/x-ndjson")
+_ASSET_PATTERN = re.compile(r'"(/static/[\w./-]+\.(?:js|css))"')
+
+_file_hashes = {}
+
+
+def weak_etag(key: str) -> str:
+    return 'W/"' + hashlib.sha256(key.encode("utf-8")).hexdigest()[:20] + '"'
+
+
+def _opaque_tag(etag: str) -> str:
+    """ETag without weak prefix and quotes: weak comparison, also of tags a client stored unquoted"""
+    return etag.strip().removeprefix("W/").strip('"')
+
+
+def _quoted(etag: str) -> str:
+    """Starlette (0.27) FileResponse sends its ETag without the quotes HTTP requires"""
+    return etag if etag.startswith('"') else f'"{etag}"'
+
+
+def not_modified(request, etag: str) -> bool:
+    """True if If-None-Match lists etag (weak comparison)"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    tags = {_opaque_tag(tag) for tag in header.split(",")}
+    return _opaque_tag(etag) in tags
+
+
+def not_modified_response(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+
+def file_hash(path: str) -> str:
+    """Short content hash of a file, recomputed only when its size or mtime changes"""
+    stat = os.stat(path)
+    cached = _file_hashes.get(path)
+    if cached and cached[0] == (stat.st_mtime_ns, stat.st_size):
+        return cached[1]
+    with open(path, "rb") as f:
+        digest = hashlib.sha256(f.read()).hexdigest()[:12]
+    _file_hashes[path] = ((stat.st_mtime_ns, stat.st_size), digest)
+    return digest
+
+
+def asset_url(url: str) -> str:
+    """/static/app.js -> /static/app.js?v=<content hash>"""
+    path = os.path.join(STATIC_DIR, url.removeprefix("/static/"))
+    return f"{url}?v={file_hash(path)}" if os.path.isfile(path) else url
+
+
+def render_page(request, path: str) -> Response:
+    """HTML page with versioned asset URLs; ETag over the result, so a changed asset also changes the page"""
+    with open(path, "r") as f:
+        html = _ASSET_PATTERN.sub(lambda match: f'"{asset_url(match.group(1))}"', f.read())
+    etag = weak_etag(html)
+    if not_modified(request, etag):
+        return not_modified_response(etag)
+    return HTMLResponse(html, headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+
+class HashedStaticFiles(StaticFiles):
+    """StaticFiles with Cache-Control: immutable for requests carrying the current content hash (?v=)"""
+
+    def file_response(self, full_path, stat_result, scope, status_code: int = 200) -> Response:
+        response = super().file_response(full_path, stat_result, scope, status_code)
+        if "etag" in response.headers:
+            response.headers["ETag"] = _quoted(response.headers["etag"])
+        query = scope.get("query_string", b"").decode()
+        version = dict(part.partition("=")[::2] for part in query.split("&") if part).get("v")
+        if version and version == file_hash(str(full_path)):
+            response.headers["Cache-Control"] = f"public, max-age={STATIC_MAX_AGE}, immutable"
+        else:
+            response.headers["Cache-Control"] = "no-cache"
+        return response
+
+    def is_not_modified(self, response_headers, request_headers) -> bool:
+        """Weak If-None-Match comparison: the ETag was weakened by CompressionMiddleware"""
+        etag = _opaque_tag(response_headers.get("etag", ""))
+        tags = {_opaque_tag(tag) for tag in request_headers.get("if-none-match", "").split(",")}
+        return bool(etag) and etag in tags or super().is_not_modified(response_headers, request_headers)
+
+
+def _accepted_encoding(accept_encoding: str):
+    encodings = {part.split(";")[0].strip().lower() for part in accept_encoding.split(",")}
+    if brotli is not None and "br" in encodings:
+        return "br"
+    if "gzip" in encodings:
+        return "gzip"
+    return None
+
+
+def _compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL)
+
+
+class CompressionMiddleware:
+    """Plain ASGI middleware compressing complete response bodies
+
+    Starlette's GZipMiddleware (0.27) would also compress streamed responses and
+    hold back SSE events until its buffer fills.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = _accepted_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = None      # Held back http.response.start of a response being compressed
+        passthrough = False
+        chunks = []
+
+        async def send_compressed(message):
+            nonlocal start, passthrough
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                content_type = headers.get("content-type", "")
+                if ("content-encoding" in headers or not content_type.startswith(COMPRESSIBLE_TYPES)
+                        or content_type.startswith(STREAMING_TYPES)):
+                    passthrough = True
+                    await send(message)
+                else:
+                    start = message
+                return
+            if passthrough or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            chunks.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+            body = b"".join(chunks)
+            headers = MutableHeaders(raw=start["headers"])
+            if len(body) >= COMPRESS_MIN_SIZE:
+                if len(body) >= COMPRESS_THREAD_MIN_SIZE:
+                    body = await asyncio.to_thread(_compress, body, encoding)
+                else:
+                    body = _compress(body, encoding)
+                headers["Content-Encoding"] = encoding
+                headers["Content-Length"] = str(len(body))
+                # The encoded bytes differ, so a strong validator (static files) becomes weak
+                etag = headers.get("etag")
+                if etag and not etag.startswith("W/"):
+                    headers["ETag"] = "W/" + _quoted(etag)
+            headers.add_vary_header("Accept-Encoding")
+            await send(start)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_compressed)
@@ -0,0 +1,355 @@
+"""
+Job description ingestion: the text the LLM prompts get instead of the raw posting.
+
+Pasted postings carry HTML, job board navigation ("Apply now", "Show more"),
+legal boilerplate (EEO statements, privacy notices) and repeated blocks.
+clean() streams the posting line by line through compiled pattern sets and
+drops all of that, fit() then cuts the result to JOB_DESCRIPTION_MAX_TOKENS
+by dropping the least useful sections first (benefits, about us) instead of
+the end of the text, which is usually where the requirements are.
+Visa and sponsorship statements are kept wherever they appear.
+
+prepare_job() runs both when a job is saved and stores the result in
+Job.clean_description / Job.description_tokens, so analyses, extraction,
+Batch API requests and cover letters reuse it. Jobs saved before: cleaned on
+their next analysis, or all at once with
+
+    python -m app.ingest backfill [--all]
+
+Tokens are counted with tiktoken (encoding of OPENAI_MODEL). Its encoding
+file is loaded at startup, downloaded once and cached (TIKTOKEN_CACHE_DIR);
+while that is not possible (offline) counts are estimated at ~4 characters per
+token, like the rate limiter does, and loading is tried again by the first
+count TIKTOKEN_RETRY_INTERVAL seconds later.
+"""
+import html
+import re
+import sys
+import threading
+import time
+from collections import namedtuple
+
+import tiktoken
+
+from app.config import JOB_DESCRIPTION_MAX_TOKENS, OPENAI_MODEL, TIKTOKEN_RETRY_INTERVAL, logger
+
+# HTML: only for text that contains tags, plain text with "<5 years" stays as it is
+_HTML_HINT = re.compile(r"</?(?:p|div|br|li|ul|ol|span|h[1-6]|strong|b|em|a|table|section)\b[^>]*>", re.IGNORECASE)
+_HTML_COMMENT = re.compile(r"<!--.*?-->", re.DOTALL)
+_HTML_HIDDEN = re.compile(r"<(script|style|noscript|svg|nav|footer|form|button|iframe|template)\b.*?</\1\s*>",
+                          re.IGNORECASE | re.DOTALL)
+_HTML_ITEM = re.compile(r"<li\b[^>]*>", re.IGNORECASE)
+_HTML_BREAK = re.compile(r"<(?:br|/?(?:p|div|h[1-6]|ul|ol|tr|section|article|header|main|table))\b[^>]*>",
+                         re.IGNORECASE)
+_HTML_TAG = re.compile(r"</?[a-zA-Z][^>]*>")
+
+_SPACES = re.compile(r"[ \t\u00a0\u2000-\u200b\u202f\u3000]+")
+_BULLET = re.compile(r"^(?:[•●▪◦·‣∙*+–—-]|\d{1,2}[.)])\s+")
+_KEY_CHARS = re.compile(r"\W+")
+_SENTENCE = re.compile(r"(?<=[.!?])\s+")
+
+# Whole lines of job board pages: buttons, counters, navigation (and lines of punctuation only)
+_NAV_LINE = re.compile(
+    r"^(?:apply(?:\s+now|\s+for\s+this\s+(?:job|position)|\s+on\s+company\s+(?:site|website))?|easy\s+apply"
+    r"|save(?:\s+(?:job|this\s+job))?|saved|share(?:\s+this\s+job)?|report(?:\s+this)?\s+job|show\s+(?:more|less)"
+    r"|see\s+more|read\s+more|back\s+to\s+(?:search|jobs|results)|sign\s+in|log\s+in|sign\s+up|join\s+now"
+    r"|skip\s+to\s+(?:main\s+)?content|promoted|actively\s+recruiting|be\s+an\s+early\s+applicant"
+    r"|(?:over\s+)?\d+\+?\s+applicants?|(?:re)?posted\s+\d+\s+\w+\s+ago|\d+\s+(?:minutes?|hours?|days?|weeks?)\s+ago"
+    r"|(?:accept|reject)(?:\s+all)?\s+cookies|cookie\s+(?:settings|preferences)|similar\s+jobs"
+    r"|people\s+also\s+viewed|jobs\s+you\s+may\s+(?:be\s+interested\s+in|like)|set\s+alert|job\s+alert"
+    r"|\W*)$",
+    re.IGNORECASE
+)
+# Legal and recruiting boilerplate, removed sentence by sentence
+_LEGAL = re.compile(
+    r"equal\s+(?:employment\s+)?opportunity|affirmative\s+action|without\s+regard\s+to|regardless\s+of\s+(?:race|gender|age)"
+    r"|protected\s+(?:veteran|characteristic|class|status)|reasonable\s+accommodation|e-verify|pay\s+transparency"
+    r"|privacy\s+(?:notice|policy|statement)|personal\s+data|unsolicited\s+(?:resumes|cvs|applications)"
+    r"|recruitment\s+agenc|third[- ]party\s+recruit|all\s+qualified\s+applicants|we\s+celebrate\s+diversity"
+    r"|background\s+check|drug[- ]free|fraudulent\s+(?:job|recruit|offer)|never\s+ask\s+(?:you\s+)?for\s+payment",
+    re.IGNORECASE
+)
+# Kept in any case: what the visa analysis looks for
+_VISA = re.compile(
+    r"visa|sponsor|relocat|work\s+permit|right\s+to\s+work|authori[sz]ed\s+to\s+work|h-?1b|green\s+card"
+    r"|must\s+be\s+an?\s+(?:\w+\s+)?citizen|citizenship\s+(?:is\s+)?required|security\s+clearance",
+    re.IGNORECASE
+)
+
+# Section headings and the value of the text under them: lower priority sections are dropped first
+# by fit(); the text before the first heading (title, company, summary) counts as PRIORITY_CORE
+PRIORITY_CORE = 3
+_SECTION_PRIORITIES = [
+    (re.compile(r"responsib|what\s+you(?:'ll|\s+will)\s+(?:do|work\s+on)|the\s+role|your\s+role|duties|day[- ]to[- ]day"
+                r"|tasks|about\s+the\s+(?:job|role|position)|the\s+job|the\s+position|mission", re.IGNORECASE), 3),
+    (re.compile(r"nice[- ]to[- ]have|bonus\s+points|preferred|good\s+to\s+have|a\s+plus", re.IGNORECASE), 2),
+    (re.compile(r"require|qualif|must[- ]have|what\s+you(?:'ll)?\s+(?:bring|need)|you\s+(?:have|bring|are)"
+                r"|about\s+you|who\s+you\s+are|skills|experience|profile|looking\s+for|tech(?:nology|nical)?\s+stack",
+                re.IGNORECASE), 3),
+    (re.compile(r"visa|sponsor|relocat|work\s+authori|location|remote|hybrid", re.IGNORECASE), 3),
+    # "About Acme" ("About the role" and "About you" are matched above)
+    (re.compile(r"about\s+\w|who\s+we\s+are|our\s+(?:company|team|story|culture)|why\s+join", re.IGNORECASE), 1),
+    (re.compile(r"benefit|perks|what\s+we\s+offer|we\s+offer|compensation|salary|package|rewards"
+                r"|how\s+to\s+apply|application\s+process|hiring\s+process|interview\s+process|next\s+steps"
+                r"|equal\s+opportunity|diversity|privacy|disclaimer", re.IGNORECASE), 0),
+]
+# Headings: "Requirements:", "## Requirements", "**Requirements**" and "REQUIREMENTS" name the section anywhere,
+# a plain short line has to start with the name ("Benefits", "What we offer", not "Python package development").
+# Headings naming none of the sections above don't start a new section
+_HEADING_MARKED = re.compile(r"^(?:#{1,6}\s*(?P<hash>.+?)|\*\*(?P<bold>.+?)\*\*:?|(?P<colon>[^:]{2,60}):)$")
+_HEADING_LEADING_WORDS = re.compile(r"^(?:(?:our|your|the|and|&)\s+)+", re.IGNORECASE)
+_HEADING_MAX_WORDS = 6
+MIN_LINE_TOKENS = 16  # fit(): a line left shorter than this is dropped, not shortened
+
+Section = namedtuple("Section", "priority lines")
+Prepared = namedtuple("Prepared", "text tokens")
+
+
+_encoding = None
+_encoding_retry_at = 0.0  # time.monotonic() before which a failed load is not tried again
+_encoding_lock = threading.Lock()
+
+
+def load_encoding():
+    """tiktoken encoding of OPENAI_MODEL, None while its encoding file is not available
+
+    Called by startup_event; a failed load is not cached, the first call after TIKTOKEN_RETRY_INTERVAL tries again.
+    Calls during a load estimate instead of waiting for the download.
+    """
+    global _encoding, _encoding_retry_at
+    if _encoding is not None or time.monotonic() < _encoding_retry_at:
+        return _encoding
+    if not _encoding_lock.acquire(blocking=False):
+        return None
+    try:
+        if _encoding is None and time.monotonic() >= _encoding_retry_at:
+            try:
+                _encoding = tiktoken.encoding_for_model(OPENAI_MODEL)
+            except KeyError as e:  # Unknown model: no download will help
+                _encoding_retry_at = float("inf")
+                logger.warning(f"Ingest | no tiktoken encoding for {OPENAI_MODEL}, token counts estimated: {e}")
+            except Exception as e:  # The encoding file can't be downloaded (offline)
+                _encoding_retry_at = time.monotonic() + TIKTOKEN_RETRY_INTERVAL
+                logger.warning(f"Ingest | tiktoken encoding unavailable, token counts estimated "
+                               f"(retry in {TIKTOKEN_RETRY_INTERVAL}s): {e}")
+        return _encoding
+    finally:
+        _encoding_lock.release()
+
+
+def count_tokens(text: str) -> int:
+    encoding = load_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return (len(text) + 3) // 4
+
+
+def _cut(text: str, max_tokens: int) -> str:
+    """First max_tokens tokens of text, ending at a line break (else a word break) when one is near"""
+    encoding = load_encoding()
+    if encoding is not None:
+        cut = encoding.decode(encoding.encode(text, disallowed_special=())[:max_tokens])
+    else:
+        cut = text[:max_tokens * 4]
+    if len(cut) == len(text):
+        return cut
+    for separator in ("\n", " "):
+        end = cut.rfind(separator)
+        if end > len(cut) * 0.8:
+            return cut[:end]
+    return cut
+
+
+def strip_html(text: str) -> str:
+    text = _HTML_COMMENT.sub("", text)
+    text = _HTML_HIDDEN.sub("", text)
+    text = _HTML_ITEM.sub("\n- ", text)
+    text = _HTML_BREAK.sub("\n", text)
+    return html.unescape(_HTML_TAG.sub("", text))
+
+
+def _lines(text: str):
+    """Normalized lines: single spaces, "- " for every bullet style"""
+    for line in text.splitlines():
+        line = _SPACES.sub(" ", line).strip()
+        yield _BULLET.sub("- ", line) if line else line
+
+
+def _drop_boilerplate(lines):
+    for line in lines:
+        if not line:
+            yield line
+        elif _VISA.search(line):
+            yield line
+        elif len(line) <= 60 and _NAV_LINE.match(line):
+            continue
+        elif _LEGAL.search(line):
+            kept = " ".join(sentence for sentence in _SENTENCE.split(line) if not _LEGAL.search(sentence))
+            if kept.strip(" -"):
+                yield kept
+        else:
+            yield line
+
+
+def _drop_repeats(lines):
+    """Skip lines (and so whole paragraphs) seen before, and runs of blank lines"""
+    seen = set()
+    blank = True  # No blank lines at the start
+    for line in lines:
+        if not line:
+            if not blank:
+                yield line
+            blank = True
+            continue
+        key = _KEY_CHARS.sub(" ", line.lower()).strip()
+        if key and key in seen:
+            continue
+        seen.add(key)
+        blank = False
+        yield line
+
+
+def clean(raw: str) -> str:
+    """Plain text without HTML, job board navigation, legal boilerplate and repeated lines or paragraphs"""
+    text = strip_html(raw) if _HTML_HINT.search(raw) else raw
+    return "\n".join(_drop_repeats(_drop_boilerplate(_lines(text)))).strip()
+
+
+def _heading_priority(line: str):
+    """Priority of the section a heading line starts, None if the line is no (known) heading"""
+    if len(line) > 80 or line.startswith("- "):
+        return None
+    match = _HEADING_MARKED.match(line)
+    if match:
+        title = match.group("hash") or match.group("bold") or match.group("colon")
+    elif line.isupper():
+        title = line
+    elif ":" not in line and not line.endswith((".", ",", ";")):
+        title = _HEADING_LEADING_WORDS.sub("", line)
+    else:
+        return None
+    if len(title.split()) > _HEADING_MAX_WORDS:
+        return None
+    marked = match is not None or line.isupper()
+    for pattern, priority in _SECTION_PRIORITIES:
+        if pattern.search(title) if marked else pattern.match(title):
+            return priority
+    return None
+
+
+def sections(text: str) -> list:
+    """Split cleaned text at headings: Section(priority, lines), the heading is the first line"""
+    result = [Section(PRIORITY_CORE, [])]
+    for line in text.split("\n"):
+        priority = _heading_priority(line) if line else None
+        if priority is not None:
+            result.append(Section(priority, []))
+        result[-1].lines.append(line)
+    return [section for section in result if any(section.lines)]
+
+
+def fit(text: str, max_tokens: int = JOB_DESCRIPTION_MAX_TOKENS) -> str:
+    """text within max_tokens, cut where it loses the least
+
+    Sections below PRIORITY_CORE are dropped first (lowest priority, later ones first), then the
+    largest remaining section loses lines from its end - a long last line (a posting pasted as one
+    paragraph) is shortened instead. Visa statements are kept in any case.
+    """
+    if len(text.encode("utf-8")) <= max_tokens:  # A token is at least one byte
+        return text
+    total = count_tokens(text)
+    if total <= max_tokens:
+        return text
+
+    parts = sections(text)
+    kept = [[(line, count_tokens(line + "\n"), bool(_VISA.search(line))) for line in section.lines] for section in parts]
+    tokens = sum(size for lines in kept for _, size, _ in lines)
+    budget = max_tokens * tokens / total  # Lines counted one by one add up to more than the whole text
+
+    drop_order = sorted(range(len(parts)), key=lambda i: (parts[i].priority, -i))
+    while True:
+        for index in drop_order:
+            if tokens <= budget or parts[index].priority >= PRIORITY_CORE:
+                break
+            tokens -= sum(size for _, size, visa in kept[index] if not visa)
+            kept[index] = [line for line in kept[index] if line[2]]
+        while tokens > budget:
+            sizes = [sum(size for _, size, visa in lines if not visa) for lines in kept]
+            largest = max(range(len(kept)), key=sizes.__getitem__)
+            if not sizes[largest]:
+                break  # Visa statements only
+            last = max(i for i, (_, _, visa) in enumerate(kept[largest]) if not visa)
+            line, size, _ = kept[largest][last]
+            keep = int(size - (tokens - budget))
+            shortened = _cut(line, keep) if keep >= MIN_LINE_TOKENS else ""
+            shortened_size = count_tokens(shortened + "\n") if shortened else 0
+            if shortened and shortened_size < size:
+                kept[largest][last] = (shortened, shortened_size, False)
+                tokens -= size - shortened_size
+            else:
+                tokens -= kept[largest].pop(last)[1]
+        result = "\n".join(line for lines in kept for line, _, _ in lines).strip()
+        overshoot = count_tokens(result) - max_tokens
+        if overshoot <= 0:
+            break
+        if not any(not visa for lines in kept for _, _, visa in lines):
+            result = _cut(result, max_tokens)
+            break
+        budget = min(budget, tokens) - overshoot  # Line estimates were low: drop more
+    
+    logger.info(f"Ingest | description cut from {total} to {count_tokens(result)} tokens")
+    return result
+
+
+def prepare(raw: str) -> Prepared:
+    """Cleaned and fitted description with its token count"""
+    text = fit(clean(raw)) or fit(raw)  # Nothing left after cleaning: better the raw text than nothing
+    return Prepared(text, count_tokens(text))
+
+
+def prepare_job(job):
+    """Set clean_description and description_tokens of a new or edited job (committed by the caller)"""
+    if not job.job_description:
+        job.clean_description = None
+        job.description_tokens = None
+        return
+    job.clean_description, job.description_tokens = prepare(job.job_description)
+
+
+def description(job) -> str:
+    """Description for the LLM prompts: the stored cleaned text, prepared now for jobs saved before it existed"""
+    if job.clean_description is None and job.job_description:
+        prepare_job(job)
+    return job.clean_description
+
+
+def backfill(redo: bool = False) -> int:
+    """Prepare jobs without cleaned description (redo: all jobs, after changing the patterns above)"""
+    from app.database import SessionLocal
+    from app.models import Job
+
+    db = SessionLocal()
+    try:
+        query = db.query(Job).filter(Job.job_description.isnot(None))
+        if not redo:
+            query = query.filter(Job.clean_description.is_(None))
+        count = raw_tokens = clean_tokens = 0
+        for job in query.yield_per(200):
+            prepare_job(job)
+            count += 1
+            raw_tokens += count_tokens(job.job_description)
+            clean_tokens += job.description_tokens
+        db.commit()
+        logger.info(f"Ingest | {count} jobs prepared | {raw_tokens} -> {clean_tokens} description tokens")
+        return count
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] not in (["backfill"], ["backfill", "--all"]):
+        sys.exit("Usage: python -m app.ingest backfill [--all]")
+    from app.database import init_db
+    from app import sync  # noqa: F401 - stamps the prepared jobs for delta sync
+    init_db()
+    backfill(redo="--all" in sys.argv)
@@ -1,113 +1,244 @@
+import asyncio
+import hashlib
 import time
 import json
 import re
-from openai import OpenAI
+from openai import AsyncOpenAI
 
 from app.config import (
     OPENAI_API_KEY, 
     OPENAI_MODEL, 
     OPENAI_TEMPERATURE, 
     OPENAI_MAX_TOKENS,
-    MAX_JOB_DESCRIPTION_LENGTH,
+    COVER_LETTER_MAX_TOKENS,
+    OPENAI_TIMEOUT,
+    OPENAI_CALL_DEADLINE,
+    OPENAI_BASE_URL,
+    LLM_BACKEND,
+    EXTRACT_MODEL,
+    EXTRACT_MAX_TOKENS,
+    JSON_REPAIR_MODEL,
     MAX_RESUME_LENGTH,
     logger
 )
 from app.prompts import PROMPTS
-from app.database import SessionLocal
-from app.models import LLMLog
+from app.schemas import JobAnalysis, JobExtraction, JobReasoning
+from app import tolerant_json, resilience, fake_llm, cover_letter, ingest
+from app.rate_limit import rate_limiter, estimate_tokens
+from app import llm_cache
+from app.llm_log import log_llm_call
+from app.metrics import llm_in_flight
 
 
-# Initialize OpenAI client
-client = OpenAI(api_key=OPENAI_API_KEY)
+def make_client():
+    """LLM backend selected by LLM_BACKEND: the OpenAI client or the offline fake (same interface)"""
+    if LLM_BACKEND == "fake":
+        logger.info("LLM backend: fake (offline, deterministic responses)")
+        return fake_llm.FakeAsyncOpenAI()
+    # Async client so LLM round trips don't block the event loop. Retries are done by the
+    # resilience layer (deadline, backoff, circuit breaker), not by the SDK
+    return AsyncOpenAI(
+        api_key=OPENAI_API_KEY,
+        base_url=OPENAI_BASE_URL,
+        timeout=OPENAI_TIMEOUT,
+        max_retries=0,
+        http_client=resilience.make_http_client()
+    )
 
 
-def log_llm_call(function_name: str, status: str, execution_time: float, 
-                 tokens_used: int = None, error_message: str = None):
-    """Log LLM call to database"""
-    db = SessionLocal()
+client = make_client()
+
+
+async def _create_completion(**params):
+    """Chat completion call: (response or stream, seconds until response headers, retries taken)
+
+    Raises resilience.LLMCallError (with outcome and retries for the log) when all attempts fail.
+    """
+    async def attempt():
+        request_start = time.time()
+        raw = await client.chat.completions.with_raw_response.create(**params)
+        return raw, time.time() - request_start
+    
+    llm_in_flight.inc()
     try:
-        log = LLMLog(
-            function_name=function_name,
-            status=status,
-            execution_time=execution_time,
-            tokens_used=tokens_used,
-            error_message=error_message
-        )
-        db.add(log)
-        db.commit()
+        (raw, ttfb), retries = await resilience.call(attempt)
+        return raw.parse(), ttfb, retries
     finally:
-        db.close()
+        llm_in_flight.dec()
 
 
-def analyze_job_complete(job_description: str, resume: str) -> dict:
-    """Comprehensive job analysis: extract info + sponsorship + resume match"""
-    start_time = time.time()
+def _response_format(schema_model) -> dict:
+    """Structured output: the API only returns JSON matching the pydantic model's fields"""
+    schema = schema_model.model_json_schema()
+    schema["additionalProperties"] = False
+    return {
+        "type": "json_schema",
+        "json_schema": {"name": schema_model.__name__, "strict": True, "schema": schema}
+    }
+
+
+async def _parse_json_response(text: str, schema_model) -> dict:
+    """Parse a JSON response; broken output (e.g. cut off at max_tokens) is parsed tolerantly
+    and only the fields still missing are requested from a cheap repair call
+
+    Raises ValueError when nothing could be recovered.
+    """
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError as e:
+        logger.warning(f"JSON parse failed at char {e.pos}: {e.msg}, parsing tolerantly")
     
-    # Truncate long texts
-    if len(job_description) > MAX_JOB_DESCRIPTION_LENGTH:
-        job_description = job_description[:MAX_JOB_DESCRIPTION_LENGTH]
-        logger.info(f"Job description truncated to {MAX_JOB_DESCRIPTION_LENGTH} chars")
+    try:
+        result = tolerant_json.loads(text)
+    except ValueError:
+        result = None
+    if not isinstance(result, dict):
+        result = {}
+    
+    missing = [field for field in schema_model.model_fields if field not in result]
+    if missing:
+        repaired = await repair_json(text, schema_model, missing)
+        result = {**repaired, **result}
+    if not result:
+        raise ValueError("No JSON could be recovered from the response")
+    return result
+
+
+async def repair_json(text: str, schema_model, missing: list) -> dict:
+    """Cheap JSON_REPAIR_MODEL call that rebuilds a broken response (no job description / resume resent)"""
+    start_time = time.time()
+    try:
+        prompt = PROMPTS["repair_json"].format(missing=", ".join(missing), text=text)
+        await rate_limiter.acquire(estimate_tokens(prompt, OPENAI_MAX_TOKENS))
+        response, ttfb, retries = await _create_completion(
+            model=JSON_REPAIR_MODEL,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=0,
+            max_tokens=OPENAI_MAX_TOKENS,
+            response_format=_response_format(schema_model)
+        )
+        result = tolerant_json.loads(response.choices[0].message.content)
+        execution_time = time.time() - start_time
+        await log_llm_call("repair_json", "success", execution_time, response.usage,
+                           ttfb=ttfb, retry_count=retries, model=JSON_REPAIR_MODEL)
+        logger.info(f"LLM | repair_json | SUCCESS | {execution_time:.2f}s | missing: {missing}")
+        return result if isinstance(result, dict) else {}
+    except Exception as e:
+        execution_time = time.time() - start_time
+        await log_llm_call("repair_json", getattr(e, "outcome", "error"), execution_time, error_message=str(e),
+                           retry_count=getattr(e, "retries", 0), model=JSON_REPAIR_MODEL)
+        logger.error(f"LLM | repair_json | ERROR | {execution_time:.2f}s | {e}")
+        return {}
+
+
+# Visa sponsorship found by the extraction tier, as told to the reasoning tier
+VISA_STATEMENTS = {True: "yes, explicitly offered", False: "no, explicitly excluded", None: "not mentioned"}
+
+
+def analysis_request(job_description: str, resume: str, extracted: dict = None):
+    """Truncate inputs and build (completion parameters, cache_key) for analyze_job_complete
+
+    With `extracted` (title, company and visa_sponsorship found by the extraction tier) only the
+    reasoning part is requested: visa analysis and resume match.
+    Also used for the lines of Batch API files (batch.py).
+    """
+    job_description = ingest.fit(job_description)  # Already fitted when prepared on save (ingest.description)
     if len(resume) > MAX_RESUME_LENGTH:
         resume = resume[:MAX_RESUME_LENGTH]
         logger.info(f"Resume truncated to {MAX_RESUME_LENGTH} chars")
     
+    template, schema_model, fields = PROMPTS["analyze_job_complete"], JobAnalysis, {}
+    if extracted:
+        template, schema_model = PROMPTS["analyze_job_reasoning"], JobReasoning
+        fields = {"job_title": extracted["title"], "company": extracted["company"],
+                  "visa_sponsorship": VISA_STATEMENTS[extracted["visa_sponsorship"]]}
+    
+    cache_key = llm_cache.make_key(
+        template,
+        job_description=job_description,
+        resume=resume,
+        **fields
+    )
+    prompt = template.format(
+        job_description=job_description,
+        resume=resume,
+        **fields
+    )
+    params = {
+        "model": OPENAI_MODEL,
+        "messages": [{"role": "user", "content": prompt}],
+        "temperature": OPENAI_TEMPERATURE,
+        "max_tokens": OPENAI_MAX_TOKENS,
+        "response_format": _response_format(schema_model)
+    }
+    return params, cache_key
+
+
+def normalize_analysis(result: dict) -> dict:
+    """Fix visa_sponsorship type in place - must be bool or None, not string"""
+    visa_val = result.get("visa_sponsorship")
+    logger.info(f"Raw visa_sponsorship value: {visa_val}, type: {type(visa_val)}")
+    
+    # Normalize value to Python bool or None
+    if visa_val is None or visa_val == "null" or visa_val == "None" or visa_val == "":
+        result["visa_sponsorship"] = None
+    elif visa_val is True or visa_val == "true" or visa_val == "True" or visa_val == 1:
+        result["visa_sponsorship"] = True
+    elif visa_val is False or visa_val == "false" or visa_val == "False" or visa_val == 0:
+        result["visa_sponsorship"] = False
+    else:
+        logger.warning(f"Unexpected visa_sponsorship value: {visa_val}, defaulting to None")
+        result["visa_sponsorship"] = None
+    
+    logger.info(f"Normalized visa_sponsorship: {result['visa_sponsorship']}, type: {type(result['visa_sponsorship'])}")
+    return result
+
+
+async def parse_analysis(text: str, extracted: dict = None) -> dict:
+    """Parsed and normalized analyze_job_complete response; raises ValueError when nothing could be recovered
+
+    A reasoning tier answer (`extracted` given) gets the extracted title, company and visa_sponsorship added.
+    """
+    if extracted:
+        result = await _parse_json_response(text, JobReasoning)
+        return {**result, "title": extracted["title"], "company": extracted["company"],
+                "visa_sponsorship": extracted["visa_sponsorship"]}
+    return normalize_analysis(await _parse_json_response(text, JobAnalysis))
+
+
+async def analyze_job_complete(job_description: str, resume: str, use_cache: bool = True,
+                               extracted: dict = None) -> dict:
+    """Comprehensive job analysis: extract info + sponsorship + resume match
+
+    With `extracted` (reasoning tier) title, company and visa_sponsorship are reused, not requested again.
+    """
+    start_time = time.time()
+    function_name = "analyze_job_reasoning" if extracted else "analyze_job_complete"
+    params, cache_key = analysis_request(job_description, resume, extracted)
+    
+    if use_cache:
+        cached = await asyncio.to_thread(llm_cache.get, cache_key)
+        if cached is not None:
+            execution_time = time.time() - start_time
+            await log_llm_call(function_name, "cache_hit", execution_time)
+            logger.info(f"LLM | {function_name} | CACHE HIT | {execution_time:.3f}s")
+            return json.loads(cached)
+    
+    response = None
     try:
-        prompt = PROMPTS["analyze_job_complete"].format(
-            job_description=job_description,
-            resume=resume
-        )
+        await rate_limiter.acquire(estimate_tokens(params["messages"][0]["content"], OPENAI_MAX_TOKENS))
+        response, ttfb, retries = await _create_completion(**params)
         
-        response = client.chat.completions.create(
-            model=OPENAI_MODEL,
-            messages=[{"role": "user", "content": prompt}],
-            temperature=OPENAI_TEMPERATURE,
-            max_tokens=OPENAI_MAX_TOKENS
-        )
-        
-        result_text = response.choices[0].message.content.strip()
+        result_text = response.choices[0].message.content or ""
         tokens_used = response.usage.total_tokens
         execution_time = time.time() - start_time
         
         # Log raw response for debugging
         logger.info(f"Raw LLM response (first 500 chars): {result_text[:500]}")
+        if response.choices[0].finish_reason == "length":
+            logger.warning(f"Response cut off at max_tokens={OPENAI_MAX_TOKENS}")
         
-        # Try to parse as JSON
-        try:
-            result = json.loads(result_text)
-        except json.JSONDecodeError as json_error:
-            # If failed, maybe LLM used real newlines instead of \\n
-            logger.warning(f"First JSON parse failed: {json_error}, trying to fix newlines")
-            logger.info(f"Problematic area: ...{result_text[max(0, json_error.pos-50):json_error.pos+50]}...")
-            
-            # Use json.dumps for proper string value escaping
-            # But first need to find and fix problematic strings
-            # Simple approach: replace only dangerous control chars, keeping newlines as \\n
-            result_text_fixed = result_text
-            # Replace real newlines with escaped versions
-            result_text_fixed = result_text_fixed.replace('\r\n', '\\n')  # Windows newlines
-            result_text_fixed = result_text_fixed.replace('\n', '\\n')    # Unix newlines
-            result_text_fixed = result_text_fixed.replace('\r', '\\n')    # Mac newlines
-            result_text_fixed = result_text_fixed.replace('\t', ' ')      # Tabs to spaces
-            
-            logger.info(f"Fixed text (first 500 chars): {result_text_fixed[:500]}")
-            result = json.loads(result_text_fixed)
-        
-        # Fix has_visa_sponsorship type - must be bool or None, not string
-        visa_val = result.get("visa_sponsorship")
-        logger.info(f"Raw visa_sponsorship value: {visa_val}, type: {type(visa_val)}")
-        
-        # Normalize value to Python bool or None
-        if visa_val is None or visa_val == "null" or visa_val == "None" or visa_val == "":
-            result["visa_sponsorship"] = None
-        elif visa_val is True or visa_val == "true" or visa_val == "True" or visa_val == 1:
-            result["visa_sponsorship"] = True
-        elif visa_val is False or visa_val == "false" or visa_val == "False" or visa_val == 0:
-            result["visa_sponsorship"] = False
-        else:
-            logger.warning(f"Unexpected visa_sponsorship value: {visa_val}, defaulting to None")
-            result["visa_sponsorship"] = None
-        
-        logger.info(f"Normalized visa_sponsorship: {result['visa_sponsorship']}, type: {type(result['visa_sponsorship'])}")
+        result = await parse_analysis(result_text, extracted)
         
         # Log analysis lengths for debugging
         visa_analysis_len = len(result.get("visa_analysis", "")) if result.get("visa_analysis") else 0
@@ -115,17 +246,18 @@ def analyze_job_complete(job_description: str, resume: str) -> dict:
         logger.info(f"Analysis lengths - visa: {visa_analysis_len} chars, match: {match_analysis_len} chars")
         logger.info(f"visa_analysis preview: {result.get('visa_analysis', '')[:200]}...")
         
-        log_llm_call("analyze_job_complete", "success", execution_time, tokens_used)
-        logger.info(f"LLM | analyze_job_complete | SUCCESS | {execution_time:.2f}s | {tokens_used} tokens")
-        
-        return result
+        await log_llm_call(function_name, "success", execution_time, response.usage,
+                           ttfb=ttfb, retry_count=retries)
+        logger.info(f"LLM | {function_name} | SUCCESS | {execution_time:.2f}s | {tokens_used} tokens")
         
-    except json.JSONDecodeError as e:
+    except ValueError as e:
         execution_time = time.time() - start_time
         error_msg = f"JSON parsing error: {str(e)}"
         
-        log_llm_call("analyze_job_complete", "error", execution_time, error_message=error_msg)
-        logger.error(f"LLM | analyze_job_complete | ERROR | {execution_time:.2f}s | {error_msg}")
+        # The response was paid for even if it could not be used
+        await log_llm_call(function_name, "error", execution_time, response.usage if response else None,
+                           error_message=error_msg)
+        logger.error(f"LLM | {function_name} | ERROR | {execution_time:.2f}s | {error_msg}")
         
         return {
             "title": "Unknown Position",
@@ -133,15 +265,17 @@ def analyze_job_complete(job_description: str, resume: str) -> dict:
             "visa_sponsorship": None,
             "visa_analysis": "Unable to analyze",
             "match_percentage": 0,
-            "match_analysis": "Unable to analyze"
+            "match_analysis": "Unable to analyze",
+            "error": error_msg
         }
         
     except Exception as e:
         execution_time = time.time() - start_time
         error_msg = str(e)
         
-        log_llm_call("analyze_job_complete", "error", execution_time, error_message=error_msg)
-        logger.error(f"LLM | analyze_job_complete | ERROR | {execution_time:.2f}s | {error_msg}")
+        await log_llm_call(function_name, getattr(e, "outcome", "error"), execution_time, error_message=error_msg,
+                           retry_count=getattr(e, "retries", 0))
+        logger.error(f"LLM | {function_name} | ERROR | {execution_time:.2f}s | {error_msg}")
         
         return {
             "title": "Unknown Position",
@@ -149,56 +283,230 @@ def analyze_job_complete(job_description: str, resume: str) -> dict:
             "visa_sponsorship": None,
             "visa_analysis": "Unable to analyze",
             "match_percentage": 0,
-            "match_analysis": "Unable to analyze"
+            "match_analysis": "Unable to analyze",
+            "error": error_msg
         }
+    
+    # Outside the error handling: a failed cache write never turns a paid answer into "Unable to analyze"
+    await llm_cache.store(cache_key, function_name, json.dumps(result, ensure_ascii=False))
+    return result
 
 
-def generate_cover_letter(resume: str, template: str, job_description: str, 
-                         job_title: str, company: str) -> dict:
-    """Generate personalized cover letter"""
+async def extract_job_info(job_description: str, use_cache: bool = True) -> dict:
+    """Extraction tier: title, company and explicit visa statement with the small EXTRACT_MODEL"""
     start_time = time.time()
+    job_description = ingest.fit(job_description)
     
-    # Truncate long texts
-    if len(resume) > MAX_RESUME_LENGTH:
-        resume = resume[:MAX_RESUME_LENGTH]
-        logger.info(f"Resume truncated to {MAX_RESUME_LENGTH} chars")
-    if len(job_description) > MAX_JOB_DESCRIPTION_LENGTH:
-        job_description = job_description[:MAX_JOB_DESCRIPTION_LENGTH]
-        logger.info(f"Job description truncated to {MAX_JOB_DESCRIPTION_LENGTH} chars")
+    cache_key = llm_cache.make_key(PROMPTS["extract_job_info"], model=EXTRACT_MODEL, job_description=job_description)
+    if use_cache:
+        cached = await asyncio.to_thread(llm_cache.get, cache_key)
+        if cached is not None:
+            execution_time = time.time() - start_time
+            await log_llm_call("extract_job_info", "cache_hit", execution_time, model=EXTRACT_MODEL)
+            logger.info(f"LLM | extract_job_info | CACHE HIT | {execution_time:.3f}s")
+            return json.loads(cached)
     
     try:
-        prompt = PROMPTS["cover_letter"].format(
-            resume=resume,
-            template=template,
-            job_title=job_title,
-            company=company,
-            job_description=job_description
+        prompt = PROMPTS["extract_job_info"].format(job_description=job_description)
+        await rate_limiter.acquire(estimate_tokens(prompt, EXTRACT_MAX_TOKENS))
+        response, ttfb, retries = await _create_completion(
+            model=EXTRACT_MODEL,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=0,
+            max_tokens=EXTRACT_MAX_TOKENS,
+            response_format=_response_format(JobExtraction)
         )
         
-        response = client.chat.completions.create(
-            model=OPENAI_MODEL,
-            messages=[{"role": "user", "content": prompt}],
-            temperature=OPENAI_TEMPERATURE,
-            max_tokens=OPENAI_MAX_TOKENS
+        result = await _parse_json_response(response.choices[0].message.content or "", JobExtraction)
+        if not isinstance(result.get("visa_sponsorship"), bool):
+            result["visa_sponsorship"] = None
+        execution_time = time.time() - start_time
+        
+        await log_llm_call("extract_job_info", "success", execution_time, response.usage,
+                           ttfb=ttfb, retry_count=retries, model=EXTRACT_MODEL)
+        logger.info(f"LLM | extract_job_info | SUCCESS | {execution_time:.2f}s | {response.usage.total_tokens} tokens")
+        
+    except Exception as e:
+        execution_time = time.time() - start_time
+        error_msg = str(e)
+        
+        await log_llm_call("extract_job_info", getattr(e, "outcome", "error"), execution_time, error_message=error_msg,
+                           retry_count=getattr(e, "retries", 0), model=EXTRACT_MODEL)
+        logger.error(f"LLM | extract_job_info | ERROR | {execution_time:.2f}s | {error_msg}")
+        return {"title": None, "company": None, "visa_sponsorship": None, "visa_statement": None, "error": error_msg}
+    
+    await llm_cache.store(cache_key, "extract_job_info", json.dumps(result, ensure_ascii=False))
+    return result
+
+
+def _cover_letter_request(resume: str, template: str, job_description: str,
+                          job_title: str, company: str):
+    """Truncate inputs and build (messages, cache_key, placeholders the model fills) for cover letter generation
+
+    The system message depends only on the resume and template: byte-identical for every job,
+    so the provider's prompt cache serves it (reported as cached_tokens).
+    """
+    if len(resume) > MAX_RESUME_LENGTH:
+        resume = resume[:MAX_RESUME_LENGTH]
+        logger.info(f"Resume truncated to {MAX_RESUME_LENGTH} chars")
+    job_description = ingest.fit(job_description)  # Already fitted when prepared on save (ingest.description)
+    
+    placeholders = cover_letter.model_placeholders(template)
+    placeholder_instructions = ""
+    if placeholders:
+        placeholder_instructions = PROMPTS["cover_letter_placeholders"].format(
+            placeholders=", ".join(f"[{name}]" for name in placeholders)
         )
+    system = PROMPTS["cover_letter_system"].format(
+        placeholder_instructions=placeholder_instructions,
+        resume=resume,
+        template=template
+    )
+    user = PROMPTS["cover_letter"].format(
+        job_title=job_title,
+        company=company,
+        job_description=job_description
+    )
+    messages = [{"role": "system", "content": system}, {"role": "user", "content": user}]
+    cache_key = llm_cache.make_key(
+        PROMPTS["cover_letter_system"] + PROMPTS["cover_letter"],
+        resume=resume,
+        template=template,
+        job_title=job_title,
+        company=company,
+        job_description=job_description
+    )
+    return messages, cache_key, placeholders
+
+
+def _cover_letter_params(messages: list) -> dict:
+    """Completion parameters; prompt_cache_key routes requests with the same system message to the same cache"""
+    prefix_hash = hashlib.sha256(messages[0]["content"].encode("utf-8")).hexdigest()[:16]
+    return {
+        "model": OPENAI_MODEL,
+        "messages": messages,
+        "temperature": OPENAI_TEMPERATURE,
+        "max_tokens": COVER_LETTER_MAX_TOKENS,
+        "prompt_cache_key": f"cover_letter-{prefix_hash}"
+    }
+
+
+def _prompt_text(messages: list) -> str:
+    return "\n".join(message["content"] for message in messages)
+
+
+async def generate_cover_letter(resume: str, template: str, job_description: str, 
+                               job_title: str, company: str, use_cache: bool = True) -> dict:
+    """Generate personalized cover letter"""
+    start_time = time.time()
+    messages, cache_key, placeholders = _cover_letter_request(resume, template, job_description, job_title, company)
+    
+    if use_cache:
+        cached = await asyncio.to_thread(llm_cache.get, cache_key)
+        if cached is not None:
+            execution_time = time.time() - start_time
+            await log_llm_call("generate_cover_letter", "cache_hit", execution_time)
+            logger.info(f"LLM | generate_cover_letter | CACHE HIT | {execution_time:.3f}s")
+            return {"cover_letter": cached}
+    
+    try:
+        await rate_limiter.acquire(estimate_tokens(_prompt_text(messages), COVER_LETTER_MAX_TOKENS))
+        response, ttfb, retries = await _create_completion(**_cover_letter_params(messages))
         
-        result_text = response.choices[0].message.content.strip()
+        # The model wrote the custom section only; the rest of the letter is the template
+        values, content = cover_letter.parse_output(response.choices[0].message.content or "", placeholders)
+        values = {**cover_letter.local_values(job_title, company), **values}
+        result_text = cover_letter.assemble(template, values, content)
         tokens_used = response.usage.total_tokens
         execution_time = time.time() - start_time
         
-        # For cover letter return just text (not JSON)
-        # Log success
-        log_llm_call("generate_cover_letter", "success", execution_time, tokens_used)
+        await log_llm_call("generate_cover_letter", "success", execution_time, response.usage,
+                           ttfb=ttfb, retry_count=retries)
         logger.info(f"LLM | generate_cover_letter | SUCCESS | {execution_time:.2f}s | {tokens_used} tokens")
         
-        return {"cover_letter": result_text}
-        
     except Exception as e:
         execution_time = time.time() - start_time
         error_msg = str(e)
         
-        log_llm_call("generate_cover_letter", "error", execution_time, error_message=error_msg)
+        await log_llm_call("generate_cover_letter", getattr(e, "outcome", "error"), execution_time, error_message=error_msg,
+                           retry_count=getattr(e, "retries", 0))
         logger.error(f"LLM | generate_cover_letter | ERROR | {execution_time:.2f}s | {error_msg}")
         
         return {"cover_letter": "Unable to generate cover letter"}
+    
+    # For cover letter return just text (not JSON)
+    await llm_cache.store(cache_key, "generate_cover_letter", result_text)
+    return {"cover_letter": result_text}
+
+
+async def stream_cover_letter(resume: str, template: str, job_description: str,
+                              job_title: str, company: str, use_cache: bool = True):
+    """Generate cover letter with the streaming API, yielding text chunks as they arrive
 
+    Raises on API errors (after logging) so the caller can report them to the client.
+    """
+    start_time = time.time()
+    messages, cache_key, placeholders = _cover_letter_request(resume, template, job_description, job_title, company)
+    
+    if use_cache:
+        cached = await asyncio.to_thread(llm_cache.get, cache_key)
+        if cached is not None:
+            execution_time = time.time() - start_time
+            await log_llm_call("generate_cover_letter", "cache_hit", execution_time)
+            logger.info(f"LLM | generate_cover_letter | CACHE HIT | {execution_time:.3f}s")
+            yield cached
+            return
+    
+    try:
+        await rate_limiter.acquire(estimate_tokens(_prompt_text(messages), COVER_LETTER_MAX_TOKENS))
+        request_start = time.time()
+        deadline = time.monotonic() + OPENAI_CALL_DEADLINE  # Opening and reading the stream
+        stream, _, retries = await _create_completion(
+            **_cover_letter_params(messages),
+            stream=True,
+            stream_options={"include_usage": True}
+        )
+        
+        # Template text is sent as soon as the model starts the custom section
+        letter = cover_letter.LetterStream(template, cover_letter.local_values(job_title, company), placeholders)
+        parts = []
+        usage = None
+        ttfb = None
+        llm_in_flight.inc()
+        try:
+            async for chunk in resilience.read_stream(stream, deadline, retries):
+                # Last chunk carries usage and no choices
+                if chunk.usage:
+                    usage = chunk.usage
+                if chunk.choices and chunk.choices[0].delta.content:
+                    if ttfb is None:
+                        ttfb = time.time() - request_start
+                    text = letter.feed(chunk.choices[0].delta.content)
+                    if text:
+                        parts.append(text)
+                        yield text
+        finally:
+            llm_in_flight.dec()
+        text = letter.finish()
+        if text:
+            parts.append(text)
+            yield text
+        
+        result_text = "".join(parts)
+        execution_time = time.time() - start_time
+        tokens_used = usage.total_tokens if usage else None
+        
+        await log_llm_call("generate_cover_letter", "success", execution_time, usage,
+                           ttfb=ttfb, retry_count=retries)
+        logger.info(f"LLM | generate_cover_letter | STREAM SUCCESS | {execution_time:.2f}s | {tokens_used} tokens")
+        
+    except Exception as e:
+        execution_time = time.time() - start_time
+        error_msg = str(e)
+        
+        await log_llm_call("generate_cover_letter", getattr(e, "outcome", "error"), execution_time, error_message=error_msg,
+                           retry_count=getattr(e, "retries", 0))
+        logger.error(f"LLM | generate_cover_letter | STREAM ERROR | {execution_time:.2f}s | {error_msg}")
+        raise
+    
+    await llm_cache.store(cache_key, "generate_cover_letter", result_text)
@@ -0,0 +1,134 @@
+"""
+Persistent LLM response cache.
+
+The same posting is often added twice (LinkedIn + company site), so identical
+prompts are answered from the llm_cache table instead of paying for a new call.
+
+Several workers can answer the same prompt at once (a posting imported twice
+in one bulk request): entries are written with an upsert, and callers store
+answers with store(), which never lets a cache failure fail the answer.
+"""
+import asyncio
+import hashlib
+import json
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app.config import (
+    OPENAI_MODEL,
+    OPENAI_TEMPERATURE,
+    LLM_CACHE_TTL_DAYS,
+    LLM_CACHE_MAX_ENTRIES,
+    logger
+)
+from app.database import SessionLocal
+from app.models import LLMCache
+
+
+# Hit/miss counters since application start
+cache_counters = {"hits": 0, "misses": 0}
+
+# INSERT ... ON CONFLICT per database backend
+_UPSERTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def make_key(prompt_template: str, **inputs) -> str:
+    """Hash of everything that determines the LLM answer"""
+    payload = json.dumps(
+        [OPENAI_MODEL, OPENAI_TEMPERATURE, prompt_template, inputs],
+        sort_keys=True,
+        ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def get(cache_key: str):
+    """Return cached response text or None (missing or expired)"""
+    db = SessionLocal()
+    try:
+        entry = db.query(LLMCache.response, LLMCache.created_at).filter(LLMCache.cache_key == cache_key).first()
+        # Statements instead of ORM objects: a concurrent put() or eviction of the row is not an error
+        if entry and entry.created_at < _utcnow() - timedelta(days=LLM_CACHE_TTL_DAYS):
+            db.query(LLMCache).filter(LLMCache.cache_key == cache_key).delete(synchronize_session=False)
+            db.commit()
+            entry = None
+
+        if not entry:
+            cache_counters["misses"] += 1
+            return None
+
+        db.query(LLMCache).filter(LLMCache.cache_key == cache_key).update(
+            {"hit_count": LLMCache.hit_count + 1, "last_used_at": _utcnow()}, synchronize_session=False
+        )
+        db.commit()
+        cache_counters["hits"] += 1
+        return entry.response
+    finally:
+        db.close()
+
+
+def put(cache_key: str, function_name: str, response: str):
+    """Store response and evict expired / least recently used entries"""
+    db = SessionLocal()
+    try:
+        now = _utcnow()
+        # Upsert: the same prompt answered by two workers at once replaces the entry instead of failing
+        insert = _UPSERTS[db.get_bind().dialect.name](LLMCache).values(
+            cache_key=cache_key,
+            function_name=function_name,
+            response=response,
+            hit_count=0,
+            created_at=now,
+            last_used_at=now
+        )
+        db.execute(insert.on_conflict_do_update(
+            index_elements=[LLMCache.cache_key],
+            set_={"response": insert.excluded.response, "created_at": now, "last_used_at": now}
+        ))
+
+        expired = db.query(LLMCache).filter(
+            LLMCache.created_at < now - timedelta(days=LLM_CACHE_TTL_DAYS)
+        ).delete(synchronize_session=False)
+
+        overflow = db.query(LLMCache).count() - LLM_CACHE_MAX_ENTRIES
+        if overflow > 0:
+            oldest = db.query(LLMCache.id).order_by(LLMCache.last_used_at).limit(overflow)
+            db.query(LLMCache).filter(LLMCache.id.in_(oldest.scalar_subquery())).delete(
+                synchronize_session=False
+            )
+
+        db.commit()
+        if expired or overflow > 0:
+            logger.info(f"LLM cache | evicted {expired} expired, {max(overflow, 0)} least recently used")
+    finally:
+        db.close()
+
+
+async def store(cache_key: str, function_name: str, response: str):
+    """put() off the event loop; a failed write is logged - the answer was paid for and is still returned"""
+    try:
+        await asyncio.to_thread(put, cache_key, function_name, response)
+    except Exception as e:
+        logger.warning(f"LLM cache | {function_name} response not cached: {e}")
+
+
+def get_stats() -> dict:
+    """Hit/miss counters and current cache size"""
+    db = SessionLocal()
+    try:
+        entries = db.query(LLMCache).count()
+    finally:
+        db.close()
+
+    lookups = cache_counters["hits"] + cache_counters["misses"]
+    return {
+        "hits": cache_counters["hits"],
+        "misses": cache_counters["misses"],
+        "hit_rate": round(cache_counters["hits"] / lookups, 2) if lookups else 0,
+        "entries": entries
+    }
@@ -0,0 +1,260 @@
+"""
+Buffered LLM call log.
+
+Writing one llm_logs row per call (new session + commit) puts a SQLite write
+on every LLM request and competes with job inserts for the write lock.
+Records are queued in memory instead and a background writer inserts them
+in batches. A full buffer makes callers wait (backpressure), flush() is used
+before reading statistics and on shutdown.
+
+Every batch also updates llm_usage_daily (per-function, per-day totals) in the
+same transaction, so /api/stats never scans llm_logs. Databases with logs
+written before the rollup existed are filled with:
+
+    python -m app.llm_log backfill
+"""
+import asyncio
+import sys
+from datetime import datetime, timezone
+
+from app.config import (
+    OPENAI_MODEL,
+    MODEL_PRICING,
+    COST_PER_1K_TOKENS,
+    CACHED_INPUT_PRICE_RATIO,
+    LOG_BATCH_SIZE,
+    LOG_FLUSH_INTERVAL_MS,
+    LOG_BUFFER_SIZE,
+    logger
+)
+from app.database import SessionLocal
+from app import metrics
+from app.models import LLMLog, LLMUsageDaily
+from app.sketch import QuantileSketch
+
+
+_FLUSH = None  # Queue marker: write collected records immediately
+
+_queue = None
+_writer = None
+
+
+async def log_llm_call(function_name: str, status: str, execution_time: float, usage=None,
+                       error_message: str = None, ttfb: float = None, retry_count: int = 0,
+                       model: str = OPENAI_MODEL, price_ratio: float = 1):
+    """Queue LLM call record for writing (written directly if the writer is not running)
+
+    usage is the OpenAI usage object of the response (None for cache hits and errors).
+    price_ratio scales the list price (Batch API discount).
+    """
+    prompt_tokens = getattr(usage, "prompt_tokens", None)
+    cached_tokens = getattr(getattr(usage, "prompt_tokens_details", None), "cached_tokens", None)
+    completion_tokens = getattr(usage, "completion_tokens", None)
+    tokens_used = getattr(usage, "total_tokens", 0 if status == "cache_hit" else None)
+    record = {
+        "function_name": function_name,
+        "model": model,
+        "status": status,
+        "execution_time": execution_time,
+        "ttfb": ttfb,
+        "tokens_used": tokens_used,
+        "prompt_tokens": prompt_tokens,
+        "cached_tokens": cached_tokens,
+        "completion_tokens": completion_tokens,
+        "retry_count": retry_count,
+        "cost": price(model, prompt_tokens, completion_tokens, tokens_used, cached_tokens) * price_ratio,
+        "error_message": error_message,
+        "created_at": datetime.now(timezone.utc).replace(tzinfo=None)
+    }
+    _export_metrics(record)
+    if _queue is None:
+        await asyncio.to_thread(_write_batch, [record])
+        return
+    await _queue.put(record)
+
+
+def _export_metrics(record: dict):
+    function_name = record["function_name"]
+    metrics.llm_calls.inc(function_name, record["status"])
+    metrics.llm_call_duration.observe(record["execution_time"], function_name)
+    metrics.llm_tokens.inc(function_name, "prompt", amount=record["prompt_tokens"] or 0)
+    metrics.llm_tokens.inc(function_name, "cached", amount=record["cached_tokens"] or 0)
+    metrics.llm_tokens.inc(function_name, "completion", amount=record["completion_tokens"] or 0)
+    metrics.llm_cost.inc(function_name, amount=record["cost"])
+    metrics.llm_retries.inc(function_name, amount=record["retry_count"] or 0)
+
+
+def price(model: str, prompt_tokens: int, completion_tokens: int, tokens_used: int, cached_tokens: int = None) -> float:
+    """Call cost in USD: input and output tokens priced separately when the split is known,
+    prompt-cached input tokens at CACHED_INPUT_PRICE_RATIO of the input price"""
+    if prompt_tokens is None or completion_tokens is None:
+        return (tokens_used or 0) / 1000 * COST_PER_1K_TOKENS
+    input_price, output_price = MODEL_PRICING.get(model, (COST_PER_1K_TOKENS, COST_PER_1K_TOKENS))
+    cached_tokens = cached_tokens or 0
+    input_cost = ((prompt_tokens - cached_tokens) + cached_tokens * CACHED_INPUT_PRICE_RATIO) / 1000 * input_price
+    return input_cost + completion_tokens / 1000 * output_price
+
+
+def pending_count() -> int:
+    """Records waiting to be written"""
+    return _queue.qsize() if _queue else 0
+
+
+async def flush():
+    """Wait until every queued record is in the database"""
+    if _queue is None:
+        return
+    await _queue.put(_FLUSH)
+    await _queue.join()
+
+
+async def start_writer():
+    global _queue, _writer
+    _queue = asyncio.Queue(maxsize=LOG_BUFFER_SIZE)
+    _writer = asyncio.create_task(_write_loop())
+    logger.info(f"LLM log | writer started (batch {LOG_BATCH_SIZE}, every {LOG_FLUSH_INTERVAL_MS}ms)")
+
+
+async def stop_writer():
+    """Write remaining records and stop the writer"""
+    global _queue, _writer
+    if _writer is None:
+        return
+    await flush()
+    _writer.cancel()
+    await asyncio.gather(_writer, return_exceptions=True)
+    _queue = None
+    _writer = None
+
+
+async def _write_loop():
+    loop = asyncio.get_running_loop()
+    while True:
+        items = [await _queue.get()]
+        deadline = loop.time() + LOG_FLUSH_INTERVAL_MS / 1000
+
+        # Collect until the batch is full, the interval has passed or a flush is requested
+        while items[-1] is not _FLUSH and len(items) < LOG_BATCH_SIZE:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                items.append(await asyncio.wait_for(_queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+        records = [item for item in items if item is not _FLUSH]
+        try:
+            if records:
+                await asyncio.to_thread(_write_batch, records)
+        except Exception as e:
+            logger.error(f"LLM log | failed to write {len(records)} records: {e}")
+        finally:
+            for _ in items:
+                _queue.task_done()
+
+
+def _write_batch(records: list):
+    db = SessionLocal()
+    try:
+        db.bulk_insert_mappings(LLMLog, records)
+        _update_rollups(db, records)
+        db.commit()
+    finally:
+        db.close()
+
+
+_SUM_FIELDS = (
+    "call_count", "success_count", "cache_hit_count", "tokens_used", "prompt_tokens",
+    "cached_tokens", "completion_tokens", "retry_count", "cost_total", "execution_time_total"
+)
+
+
+def _update_rollups(db, records: list):
+    """Add batch totals to llm_usage_daily rows"""
+    for (function_name, day), values in _aggregate(records).items():
+        rollup = db.query(LLMUsageDaily).filter(
+            LLMUsageDaily.function_name == function_name,
+            LLMUsageDaily.day == day
+        ).first()
+        if rollup is None:
+            rollup = LLMUsageDaily(function_name=function_name, day=day)
+            db.add(rollup)
+        _add_to_rollup(rollup, values)
+
+
+def _aggregate(records) -> dict:
+    """Totals and latency sketches per (function_name, day)"""
+    totals = {}
+    for record in records:
+        key = (record["function_name"], record["created_at"].date())
+        row = totals.get(key)
+        if row is None:
+            row = totals[key] = {
+                **dict.fromkeys(_SUM_FIELDS, 0),
+                "latency_sketch": QuantileSketch(),
+                "ttfb_sketch": QuantileSketch()
+            }
+        row["call_count"] += 1
+        row["success_count"] += record["status"] == "success"
+        row["cache_hit_count"] += record["status"] == "cache_hit"
+        row["tokens_used"] += record["tokens_used"] or 0
+        row["prompt_tokens"] += record["prompt_tokens"] or 0
+        row["cached_tokens"] += record.get("cached_tokens") or 0
+        row["completion_tokens"] += record["completion_tokens"] or 0
+        row["retry_count"] += record["retry_count"] or 0
+        row["cost_total"] += record["cost"] or 0
+        row["execution_time_total"] += record["execution_time"] or 0
+        row["latency_sketch"].add(record["execution_time"])
+        row["ttfb_sketch"].add(record["ttfb"])
+    return totals
+
+
+def _add_to_rollup(rollup: LLMUsageDaily, values: dict):
+    for field in _SUM_FIELDS:
+        setattr(rollup, field, (getattr(rollup, field) or 0) + values[field])
+    for field in ("latency_sketch", "ttfb_sketch"):
+        sketch = QuantileSketch.from_bytes(getattr(rollup, field))
+        sketch.merge(values[field])
+        setattr(rollup, field, sketch.to_bytes())
+
+
+def backfill():
+    """Rebuild llm_usage_daily from all llm_logs rows"""
+    db = SessionLocal()
+    try:
+        columns = [
+            LLMLog.function_name, LLMLog.model, LLMLog.status, LLMLog.execution_time, LLMLog.ttfb,
+            LLMLog.tokens_used, LLMLog.prompt_tokens, LLMLog.cached_tokens, LLMLog.completion_tokens,
+            LLMLog.retry_count, LLMLog.cost, LLMLog.created_at
+        ]
+
+        def records():
+            for row in db.query(*columns).yield_per(1000):
+                record = row._asdict()
+                if record["cost"] is None:
+                    # Logged before per-call pricing
+                    record["cost"] = price(record["model"], record["prompt_tokens"], record["completion_tokens"],
+                                           record["tokens_used"], record["cached_tokens"])
+                yield record
+
+        totals = _aggregate(records())
+
+        db.query(LLMUsageDaily).delete(synchronize_session=False)
+        for (function_name, day), values in totals.items():
+            rollup = LLMUsageDaily(function_name=function_name, day=day)
+            _add_to_rollup(rollup, values)
+            db.add(rollup)
+        db.commit()
+        calls = sum(values["call_count"] for values in totals.values())
+        logger.info(f"LLM log | rollup rebuilt from {calls} calls: {len(totals)} function/day rows")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] != ["backfill"]:
+        sys.exit("Usage: python -m app.llm_log backfill")
+    from app.database import init_db
+    init_db()
+    backfill()
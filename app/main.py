@@ -1,22 +1,42 @@
-from fastapi import FastAPI, Depends, HTTPException
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
-from sqlalchemy import text
+from fastapi import FastAPI, Depends, HTTPException, Request, Response, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import text, and_, or_, case, func, literal_column, table, type_coerce, String
 from sqlalchemy.orm import Session
-from typing import List
-from datetime import datetime
+from typing import List, Optional
+from datetime import date, datetime
+import asyncio
+import base64
 import json
-
-from app.config import logger
-from app.database import init_db, get_db
-from app.models import Job
-from app.schemas import JobCreate, JobUpdate, JobResponse
-from app.llm import analyze_job_complete, generate_cover_letter
+import re
+import time
+
+from app.config import ANALYTICS_WEEKS, LOCAL_MATCH_THRESHOLD, LLM_BACKEND, SEARCH_RANK_WINDOW, SYNC_MAX_CHANGES, logger
+from app.database import init_db, get_db, SessionLocal
+from app.models import Job, JobDeletion
+from app.schemas import JobCreate, JobUpdate, JobResponse, JobListItem, JobSearchResult, JobChanges, AnalysisStatusResponse
+from app.llm import generate_cover_letter, stream_cover_letter
+from app import llm, resilience
+from app import llm_cache
+from app.llm_log import start_writer, stop_writer, flush as flush_llm_log, pending_count
+from app.analysis_queue import start_workers, stop_workers, enqueue, queue_depth, queue_stale
+from app import metrics
+from app.dedup import duplicate_index, load_index, link_duplicate, index_job, release_duplicates
+from app import scoring
+from app import batch as analysis_batch
+from app import analytics
+from app import http_cache
+from app import sync
+from app import ingest
 
 app = FastAPI(title="Job Search Helper")
+app.add_middleware(metrics.MetricsMiddleware)
+app.add_middleware(http_cache.CompressionMiddleware)
+metrics.analysis_queue_depth.function = queue_depth
+metrics.llm_log_pending.function = pending_count
+metrics.llm_circuit_open.function = resilience.circuit_open
 
-# Mount static files
-app.mount("/static", StaticFiles(directory="app/static"), name="static")
+# Mount static files (long-lived browser cache when requested with their content hash)
+app.mount("/static", http_cache.HashedStaticFiles(directory="app/static"), name="static")
 
 
 @app.on_event("startup")
@@ -24,90 +44,182 @@ async def startup_event():
     logger.info("Application started on http://127.0.0.1:8000")
     init_db()
     logger.info("Database initialized")
+    await asyncio.to_thread(sync.prune_tombstones)
+    await asyncio.to_thread(ingest.load_encoding)  # Not in the first request: may download the encoding file
+    await asyncio.to_thread(load_index)
+    await asyncio.to_thread(scoring.load_index)
+    await start_writer()
+    # Before the workers: jobs of interrupted batch submissions are pending again and get requeued
+    await analysis_batch.start_poller()
+    await start_workers()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await analysis_batch.stop_poller()
+    await stop_workers()
+    await stop_writer()
+    await llm.client.close()
 
 
 @app.get("/")
-async def serve_frontend():
+def serve_frontend(request: Request):
     """Serve main page"""
-    return FileResponse("app/static/index.html")
+    return http_cache.render_page(request, "app/static/index.html")
 
 
 @app.get("/stats")
-async def serve_stats():
+def serve_stats(request: Request):
     """Serve statistics page"""
-    return FileResponse("app/static/stats.html")
+    return http_cache.render_page(request, "app/static/stats.html")
 
 
 @app.get("/api/health")
-async def health_check(db: Session = Depends(get_db)):
+def health_check(db: Session = Depends(get_db)):
     """Health check endpoint to verify database connection"""
     try:
         # Check database connection
         db.execute(text("SELECT 1"))
-        return {"status": "ok", "database": "connected"}
+        return {"status": "ok", "database": "connected", "llm_backend": LLM_BACKEND,
+                "openai_circuit": resilience.circuit_breaker.state}
     except Exception as e:
         logger.error(f"Database health check failed: {e}")
         return {"status": "error", "database": "disconnected"}
 
 
+@app.get("/metrics")
+def get_metrics():
+    """Prometheus metrics"""
+    return Response(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
 @app.get("/api/stats")
-async def get_stats(db: Session = Depends(get_db)):
+async def get_stats(
+    start: Optional[date] = Query(None, description="First day (UTC), inclusive"),
+    end: Optional[date] = Query(None, description="Last day (UTC), inclusive"),
+    db: Session = Depends(get_db)
+):
     """LLM usage statistics"""
-    from sqlalchemy import func
-    from app.models import LLMLog
-    from app.config import COST_PER_1K_TOKENS
+    # Buffered log records must be in the rollup before counting
+    await flush_llm_log()
+    return await asyncio.to_thread(_llm_usage_stats, db, start, end)
+
+
+def _llm_usage_stats(db: Session, start: Optional[date], end: Optional[date]) -> dict:
+    from app.models import LLMUsageDaily
+    from app.sketch import QuantileSketch
     
-    # Overall statistics
-    total_calls = db.query(func.count(LLMLog.id)).scalar()
-    successful_calls = db.query(func.count(LLMLog.id)).filter(
-        LLMLog.status == "success"
-    ).scalar()
-    total_tokens = db.query(func.sum(LLMLog.tokens_used)).scalar() or 0
-    total_cost = (total_tokens / 1000) * COST_PER_1K_TOKENS
+    # Daily rollups: one row per function and day, no scan of llm_logs
+    query = db.query(LLMUsageDaily)
+    if start:
+        query = query.filter(LLMUsageDaily.day >= start)
+    if end:
+        query = query.filter(LLMUsageDaily.day <= end)
     
-    # Breakdown by function
-    stats_by_function = db.query(
-        LLMLog.function_name,
-        func.count(LLMLog.id).label("count"),
-        func.sum(LLMLog.tokens_used).label("tokens"),
-        func.avg(LLMLog.execution_time).label("avg_time")
-    ).group_by(LLMLog.function_name).all()
+    sum_fields = (
+        "call_count", "success_count", "cache_hit_count", "tokens_used", "prompt_tokens",
+        "cached_tokens", "completion_tokens", "retry_count", "cost_total", "execution_time_total"
+    )
+    by_function = {}
+    for rollup in query.all():
+        stat = by_function.get(rollup.function_name)
+        if stat is None:
+            stat = by_function[rollup.function_name] = {
+                **dict.fromkeys(sum_fields, 0),
+                "latency": QuantileSketch(),
+                "ttfb": QuantileSketch()
+            }
+        for field in sum_fields:
+            stat[field] += getattr(rollup, field) or 0
+        stat["latency"].merge(QuantileSketch.from_bytes(rollup.latency_sketch))
+        stat["ttfb"].merge(QuantileSketch.from_bytes(rollup.ttfb_sketch))
     
+    def seconds(value):
+        return round(value, 3) if value is not None else None
+    
+    # Breakdown by function
     function_stats = []
-    for stat in stats_by_function:
-        tokens = stat.tokens or 0
-        cost = (tokens / 1000) * COST_PER_1K_TOKENS
+    for function_name, stat in sorted(by_function.items()):
         function_stats.append({
-            "function_name": stat.function_name,
-            "call_count": stat.count,
-            "tokens_used": tokens,
-            "avg_execution_time": round(stat.avg_time, 2) if stat.avg_time else 0,
-            "estimated_cost": round(cost, 4)
+            "function_name": function_name,
+            "call_count": stat["call_count"],
+            "cache_hit_count": stat["cache_hit_count"],
+            "retry_count": stat["retry_count"],
+            "tokens_used": stat["tokens_used"],
+            "prompt_tokens": stat["prompt_tokens"],
+            "cached_tokens": stat["cached_tokens"],
+            "completion_tokens": stat["completion_tokens"],
+            "avg_execution_time": round(stat["execution_time_total"] / stat["call_count"], 2),
+            "latency_p50": seconds(stat["latency"].quantile(0.5)),
+            "latency_p90": seconds(stat["latency"].quantile(0.9)),
+            "latency_p99": seconds(stat["latency"].quantile(0.99)),
+            "ttfb_p50": seconds(stat["ttfb"].quantile(0.5)),
+            "estimated_cost": round(stat["cost_total"], 4)
         })
     
+    # Overall statistics
+    return {
+        "total_calls": sum(stat["call_count"] for stat in by_function.values()),
+        "successful_calls": sum(stat["success_count"] for stat in by_function.values()),
+        "total_tokens": sum(stat["tokens_used"] for stat in by_function.values()),
+        "cached_tokens": sum(stat["cached_tokens"] for stat in by_function.values()),
+        "estimated_cost": round(sum(stat["cost_total"] for stat in by_function.values()), 2),
+        "by_function": function_stats,
+        "cache": llm_cache.get_stats(),
+        "batches": analysis_batch.batch_stats(db)
+    }
+
+
+# Analytics (cached until the next job write, see analytics.py)
+
+
+@app.get("/api/analytics")
+def get_analytics(weeks: int = Query(ANALYTICS_WEEKS, ge=1, le=260)):
+    """All dashboard figures in one response"""
     return {
-        "total_calls": total_calls,
-        "successful_calls": successful_calls,
-        "total_tokens": total_tokens,
-        "estimated_cost": round(total_cost, 2),
-        "by_function": function_stats
+        "funnel": analytics.cached("funnel", analytics.funnel),
+        "weekly": analytics.cached("weekly", analytics.weekly_applications, weeks),
+        "response_times": analytics.cached("response_times", analytics.response_times),
+        "match_outcomes": analytics.cached("match_outcomes", analytics.match_outcomes),
+        "cache": analytics.cache_stats()
     }
 
 
+@app.get("/api/analytics/funnel")
+def get_funnel():
+    """Jobs per status and per pipeline stage reached (saved -> applied -> responded -> interview -> offer)"""
+    return analytics.cached("funnel", analytics.funnel)
+
+
+@app.get("/api/analytics/weekly")
+def get_weekly_applications(weeks: int = Query(ANALYTICS_WEEKS, ge=1, le=260)):
+    """Applications and saved jobs per week"""
+    return analytics.cached("weekly", analytics.weekly_applications, weeks)
+
+
+@app.get("/api/analytics/response-times")
+def get_response_times():
+    """days_to_response distribution, overall and per outcome"""
+    return analytics.cached("response_times", analytics.response_times)
+
+
+@app.get("/api/analytics/match-outcomes")
+def get_match_outcomes():
+    """Application outcomes per resume match bucket"""
+    return analytics.cached("match_outcomes", analytics.match_outcomes)
+
+
 # LLM Endpoints
 
 
-@app.post("/api/generate-cover-letter/{job_id}", response_model=JobResponse)
-async def generate_cover_letter_endpoint(job_id: int, db: Session = Depends(get_db)):
-    """Generate personalized cover letter"""
-    job = db.query(Job).filter(Job.id == job_id).first()
-    if not job:
-        raise HTTPException(status_code=404, detail="Job not found")
-    
-    if not job.job_description:
-        raise HTTPException(status_code=400, detail="Job description is required")
-    
-    # Read resume and base template
+def _commit_and_refresh(db: Session, obj):
+    """Commit session and reload object (run in thread pool from async endpoints)"""
+    db.commit()
+    db.refresh(obj)
+
+
+def _read_cover_letter_templates():
+    """Read resume and base template"""
     try:
         with open("templates/user_resume.txt", "r") as f:
             resume = f.read()
@@ -115,118 +227,635 @@ async def generate_cover_letter_endpoint(job_id: int, db: Session = Depends(get_
             template = f.read()
     except FileNotFoundError as e:
         raise HTTPException(status_code=404, detail=f"Template file not found: {str(e)}")
+    return resume, template
+
+
+@app.post("/api/generate-cover-letter/{job_id}", response_model=JobResponse)
+async def generate_cover_letter_endpoint(job_id: int, force: bool = False, db: Session = Depends(get_db)):
+    """Generate personalized cover letter (force=true skips the response cache)"""
+    job = await asyncio.to_thread(db.get, Job, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    if not job.job_description:
+        raise HTTPException(status_code=400, detail="Job description is required")
+    
+    resume, template = _read_cover_letter_templates()
+    job_description, job_title, company = ingest.description(job), job.title, job.company
+    # Return the pooled connection while the LLM call runs (job is reloaded for the update)
+    await asyncio.to_thread(db.rollback)
     
-    result = generate_cover_letter(
+    result = await generate_cover_letter(
         resume=resume,
         template=template,
-        job_description=job.job_description,
-        job_title=job.title,
-        company=job.company
+        job_description=job_description,
+        job_title=job_title,
+        company=company,
+        use_cache=not force
     )
     
     # Save result
     job.cover_letter = result.get("cover_letter")
-    db.commit()
-    db.refresh(job)
+    await asyncio.to_thread(_commit_and_refresh, db, job)
     
     logger.info(f"POST /api/generate-cover-letter/{job_id} | Cover letter generated")
     return job
 
 
+@app.post("/api/generate-cover-letter/{job_id}/stream")
+async def stream_cover_letter_endpoint(job_id: int, force: bool = False, db: Session = Depends(get_db)):
+    """Generate cover letter as Server-Sent Events: text deltas, then a "done" or "error" event"""
+    job = await asyncio.to_thread(db.get, Job, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    if not job.job_description:
+        raise HTTPException(status_code=400, detail="Job description is required")
+    
+    resume, template = _read_cover_letter_templates()
+    chunks = stream_cover_letter(
+        resume=resume,
+        template=template,
+        job_description=ingest.description(job),
+        job_title=job.title,
+        company=job.company,
+        use_cache=not force
+    )
+    # The session stays open until the stream ends: don't hold its pooled connection meanwhile
+    await asyncio.to_thread(db.rollback)
+    
+    async def events():
+        parts = []
+        try:
+            async for chunk in chunks:
+                parts.append(chunk)
+                yield f"data: {json.dumps({'delta': chunk})}\n\n"
+        except Exception as e:
+            yield f"event: error\ndata: {json.dumps({'detail': str(e)})}\n\n"
+            return
+        
+        cover_letter = "".join(parts).strip()
+        await asyncio.to_thread(_save_cover_letter, job_id, cover_letter)
+        logger.info(f"POST /api/generate-cover-letter/{job_id}/stream | Cover letter generated")
+        yield f"event: done\ndata: {json.dumps({'cover_letter': cover_letter})}\n\n"
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+def _save_cover_letter(job_id: int, cover_letter: str):
+    db = SessionLocal()
+    try:
+        job = db.get(Job, job_id)
+        if job:
+            job.cover_letter = cover_letter
+            db.commit()
+    finally:
+        db.close()
+
+
 # CRUD Endpoints for Jobs
 
 
 @app.post("/api/jobs", response_model=JobResponse, status_code=201)
 async def create_job(job: JobCreate, db: Session = Depends(get_db)):
-    """Create new job with automatic AI analysis"""
+    """Create new job; AI analysis runs in the background"""
+    db_job = Job(**job.dict())
     
-    # If description exists, do comprehensive analysis
+    # Comprehensive analysis (title, company, visa, match) is done by the worker pool
     if job.job_description:
-        try:
-            with open("templates/user_resume.txt", "r") as f:
-                resume = f.read()
-            
-            # Comprehensive analysis: title, company, visa, match
-            analysis = analyze_job_complete(job.job_description, resume)
-            
-            # If title/company not specified, take from analysis
-            title = job.title if job.title else analysis.get("title", "Unknown Position")
-            company = job.company if job.company else analysis.get("company", "Unknown Company")
-            
-            # Ensure correct type for has_visa_sponsorship (only bool or None)
-            visa_value = analysis.get("visa_sponsorship")
-            if visa_value is True or visa_value == True:
-                has_visa = True
-            elif visa_value is False or visa_value == False:
-                has_visa = False
+        db_job.analysis_status = "pending"
+    
+    await asyncio.to_thread(_insert_jobs, db, [db_job])
+    await asyncio.to_thread(db.refresh, db_job)
+    
+    if db_job.analysis_status == "pending":
+        enqueue(db_job.id)
+    
+    logger.info(f"POST /api/jobs | 201 Created | Job ID: {db_job.id} | analysis: {db_job.analysis_status}")
+    return db_job
+
+
+@app.post("/api/jobs/bulk", status_code=201)
+async def create_jobs_bulk(request: Request, batch: bool = False, db: Session = Depends(get_db)):
+    """Import many jobs at once (JSON array or NDJSON), streaming back per-record analysis results
+
+    batch=true: analyses go to the Batch API (half price, results within a day) instead of running now.
+    """
+    body = await request.body()
+    try:
+        if "ndjson" in request.headers.get("content-type", ""):
+            records = [json.loads(line) for line in body.splitlines() if line.strip()]
+        else:
+            records = json.loads(body)
+        if not isinstance(records, list):
+            raise ValueError("expected a JSON array of jobs")
+        jobs = [JobCreate(**record) for record in records]
+    except (ValueError, TypeError) as e:
+        raise HTTPException(status_code=422, detail=f"Invalid bulk payload: {e}")
+    
+    db_jobs = []
+    for job in jobs:
+        db_job = Job(**job.dict())
+        if job.job_description:
+            db_job.analysis_status = "pending"
+        db_jobs.append(db_job)
+    
+    inserted = await asyncio.to_thread(_insert_jobs, db, db_jobs)
+    logger.info(f"POST /api/jobs/bulk | 201 Created | {len(inserted)} jobs")
+    
+    if batch:
+        statuses = await _submit_batch([job_id for job_id, status in inserted if status == "pending"], db)
+        lines = (
+            json.dumps({"index": index, "id": job_id, "analysis_status": statuses.get(job_id, status)}) + "\n"
+            for index, (job_id, status) in enumerate(inserted)
+        )
+        return StreamingResponse(lines, status_code=201, media_type="application/x-ndjson")
+    
+    # Through the worker pool like every other analysis (ANALYSIS_CONCURRENCY applies to imports too),
+    # queued now and not when the response is read
+    analyses = {}
+    for job_id, status in inserted:
+        if status == "pending":
+            analyses[job_id] = asyncio.get_running_loop().create_future()
+            enqueue(job_id, done=analyses[job_id])
+    
+    async def analyze_all():
+        async def analyze(index, job_id):
+            return {"index": index, "id": job_id, "analysis_status": await analyses[job_id]}
+        
+        tasks = []
+        for index, (job_id, status) in enumerate(inserted):
+            if job_id in analyses:
+                tasks.append(analyze(index, job_id))
             else:
-                has_visa = None
-            
-            # Convert dict to JSON string if needed
-            visa_analysis = analysis.get("visa_analysis")
-            if isinstance(visa_analysis, dict):
-                visa_analysis = json.dumps(visa_analysis, ensure_ascii=False)
-                logger.warning(f"visa_analysis was dict, converted to JSON string")
-            
-            match_analysis = analysis.get("match_analysis")
-            if isinstance(match_analysis, dict):
-                match_analysis = json.dumps(match_analysis, ensure_ascii=False)
-                logger.warning(f"match_analysis was dict, converted to JSON string")
-            
-            # Log what will be saved
-            logger.info(f"Saving to DB - visa_analysis length: {len(visa_analysis) if visa_analysis else 0} chars")
-            logger.info(f"Saving to DB - visa_analysis preview: {visa_analysis[:200] if visa_analysis else 'None'}...")
-            logger.info(f"Saving to DB - match_analysis length: {len(match_analysis) if match_analysis else 0} chars")
-            
-            # Create job with analysis results
-            db_job = Job(
-                title=title,
-                company=company,
-                job_url=job.job_url,
-                job_description=job.job_description,
-                status=job.status,
-                has_visa_sponsorship=has_visa,
-                sponsorship_analysis=visa_analysis,
-                resume_match_percentage=analysis.get("match_percentage"),
-                match_analysis=match_analysis
-            )
-            logger.info(f"Job analyzed: visa={analysis.get('visa_sponsorship')}, match={analysis.get('match_percentage')}%")
-            
-        except FileNotFoundError:
-            logger.warning("Resume file not found, creating job without analysis")
-            db_job = Job(**job.dict())
-        except Exception as e:
-            logger.error(f"Error during job analysis: {e}")
-            db_job = Job(**job.dict())
+                yield json.dumps({"index": index, "id": job_id, "analysis_status": status}) + "\n"
+        
+        # Results are sent in completion order
+        waiting = []
+        for task in asyncio.as_completed(tasks):
+            result = await task
+            if result["analysis_status"] == "pending":
+                waiting.append(result)  # Near-duplicate: settled when its original's analysis is saved
+            else:
+                yield json.dumps(result) + "\n"
+        if waiting:
+            statuses = dict(await asyncio.to_thread(get_analysis_status, ",".join(str(r["id"]) for r in waiting), db))
+            for result in waiting:
+                yield json.dumps({**result, "analysis_status": statuses.get(result["id"], "failed")}) + "\n"
+    
+    return StreamingResponse(analyze_all(), status_code=201, media_type="application/x-ndjson")
+
+
+async def _submit_batch(job_ids: list, db: Session) -> dict:
+    """Submit pending jobs to the Batch API: {job id: analysis status} of the jobs in a batch
+
+    Jobs that could not be submitted are analyzed by the worker pool instead.
+    """
+    if not job_ids:
+        return {}
+    try:
+        batch_ids = await analysis_batch.submit_pending(job_ids=job_ids)
+    except FileNotFoundError:
+        # The workers mark them failed the same way as without batch mode
+        for job_id in job_ids:
+            enqueue(job_id)
+        return {}
+    except resilience.LLMCallError:
+        return {}  # Released by submit_pending and queued for the workers
+    
+    def batched():
+        rows = db.query(Job.id, Job.analysis_status).filter(Job.analysis_batch_id.in_(batch_ids)).all()
+        return {row.id: row.analysis_status for row in rows}
+    
+    return await asyncio.to_thread(batched)
+
+
+def _insert_jobs(db: Session, db_jobs: list) -> list:
+    """Insert all jobs in a single transaction and return (id, analysis_status) pairs
+
+    Near-duplicates of already analyzed jobs get a copy of that analysis instead of a new LLM call, near-duplicates
+    of jobs still to be analyzed (also earlier in the same import) wait for that analysis; jobs with a local match
+    score below LOCAL_MATCH_THRESHOLD are not analyzed at all.
+    """
+    for db_job in db_jobs:
+        ingest.prepare_job(db_job)
+    db.add_all(db_jobs)
+    try:
+        db.flush()
+        for db_job in db_jobs:
+            # Indexed as soon as it is accepted (id from the flush): later jobs of the import are compared with it
+            link_duplicate(db_job, db)
+            index_job(db_job)
+            scoring.score_job(db_job)
+            score = db_job.local_match_score
+            if db_job.analysis_status == "pending" and score is not None and score < LOCAL_MATCH_THRESHOLD:
+                db_job.analysis_status = "skipped"
+        inserted = [(db_job.id, db_job.analysis_status) for db_job in db_jobs]
+        db.commit()
+    except Exception:
+        # Ids of the flush, read before the rollback expires them
+        job_ids = [db_job.id for db_job in db_jobs if db_job.id is not None]
+        db.rollback()
+        for job_id in job_ids:
+            duplicate_index.remove(job_id)
+            scoring.scoring_index.remove(job_id)
+        raise
+    return inserted
+
+
+@app.get("/api/jobs/analysis-status", response_model=List[AnalysisStatusResponse])
+def get_analysis_status(ids: str, db: Session = Depends(get_db)):
+    """Analysis progress for comma-separated job IDs (polled by the frontend)"""
+    try:
+        job_ids = [int(job_id) for job_id in ids.split(",") if job_id]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids must be comma-separated integers")
+    
+    return db.query(Job.id, Job.analysis_status).filter(Job.id.in_(job_ids)).all()
+
+
+@app.post("/api/jobs/rescore")
+def rescore_jobs():
+    """Recompute local match scores of all jobs (after editing the resume)"""
+    start_time = time.perf_counter()
+    changed = scoring.rescore_all()
+    elapsed_ms = (time.perf_counter() - start_time) * 1000
+    logger.info(f"POST /api/jobs/rescore | {changed} scores changed | {elapsed_ms:.0f}ms")
+    return {"jobs": len(scoring.scoring_index), "changed": changed, "elapsed_ms": round(elapsed_ms, 1)}
+
+
+@app.post("/api/jobs/reanalyze-stale", status_code=202)
+async def reanalyze_stale_jobs(limit: Optional[int] = Query(None, ge=1), dry_run: bool = False, batch: bool = False):
+    """Queue analyses made for an older resume or prompt version (limit caps the number of LLM calls)
+
+    Jobs already current are never queued; the rest go through the worker pool, active statuses first,
+    or with batch=true to the Batch API.
+    """
+    try:
+        result = await asyncio.to_thread(queue_stale, limit, dry_run)
+    except FileNotFoundError:
+        raise HTTPException(status_code=400, detail="Resume file not found")
+    
+    batched = 0
+    if batch and result["job_ids"]:
+        try:
+            batch_ids = await analysis_batch.submit_pending(job_ids=result["job_ids"])
+            batched = len(result["job_ids"]) if batch_ids else 0
+        except resilience.LLMCallError as e:
+            # Jobs not submitted were released and queued for the workers by submit_pending
+            logger.error(f"POST /api/jobs/reanalyze-stale | batch submission failed, analyzing in the worker pool: {e}")
     else:
-        db_job = Job(**job.dict())
+        for job_id in result["job_ids"]:
+            enqueue(job_id, only_stale=True, reasoning_only=True)
+    logger.info(f"POST /api/jobs/reanalyze-stale | {result['stale']} stale | {len(result['job_ids'])} queued"
+                f"{' in a batch' if batched else ''}")
+    return {"stale": result["stale"], "queued": len(result["job_ids"]), "batched": batched}
+
+
+@app.post("/api/jobs/{job_id}/analyze", response_model=JobResponse, status_code=202)
+def reanalyze_job(job_id: int, force: bool = False, db: Session = Depends(get_db)):
+    """Queue AI analysis again (force=true skips the response cache)
+
+    Also runs the reasoning tier for jobs left "extracted" by the tiered mode with on-demand reasoning.
+    """
+    job = db.query(Job).filter(Job.id == job_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    if not job.job_description:
+        raise HTTPException(status_code=400, detail="Job description is required")
     
-    db.add(db_job)
+    if job.analysis_status in ["pending", "running", "batched"]:
+        raise HTTPException(status_code=409, detail="Analysis is already in progress")
+    
+    job.analysis_status = "pending"
     db.commit()
-    db.refresh(db_job)
-    logger.info(f"POST /api/jobs | 201 Created | Job ID: {db_job.id}")
-    return db_job
+    db.refresh(job)
+    enqueue(job.id, use_cache=not force, reasoning_only=True)
+    logger.info(f"POST /api/jobs/{job_id}/analyze | 202 Accepted | force={force}")
+    return job
+
 
+# Batch API analysis
 
-@app.get("/api/jobs", response_model=List[JobResponse])
-async def get_jobs(db: Session = Depends(get_db)):
-    """Get list of all jobs"""
-    jobs = db.query(Job).all()
-    logger.info(f"GET /api/jobs | 200 OK | {len(jobs)} jobs returned")
+
+@app.post("/api/batches", status_code=202)
+async def submit_batches(limit: Optional[int] = Query(None, ge=1)):
+    """Send pending analyses to the Batch API (limit: at most this many jobs, active statuses first)"""
+    try:
+        batch_ids = await analysis_batch.submit_pending(limit)
+    except FileNotFoundError:
+        raise HTTPException(status_code=400, detail="Resume file not found")
+    except resilience.LLMCallError as e:
+        raise HTTPException(status_code=502, detail=f"Batch submission failed: {e}")
+    logger.info(f"POST /api/batches | 202 Accepted | batches {batch_ids}")
+    return {"batch_ids": batch_ids}
+
+
+@app.get("/api/batches")
+def get_batches(db: Session = Depends(get_db)):
+    """Open and recent batches with progress and cost"""
+    return analysis_batch.batch_stats(db)
+
+
+@app.post("/api/batches/poll")
+async def poll_batches():
+    """Check open batches now instead of waiting for the next poll; returns the batches saved"""
+    return {"closed": await analysis_batch.poll()}
+
+
+# Columns returned by GET /api/jobs; large text fields only via include=
+LIST_COLUMNS = [
+    Job.id, Job.title, Job.company, Job.job_url, Job.has_visa_sponsorship,
+    Job.resume_match_percentage, Job.local_match_score, Job.analysis_status, Job.duplicate_of_id, Job.status,
+    Job.applied_date, Job.response_date, Job.days_to_response, Job.created_at, Job.updated_at
+]
+HEAVY_COLUMNS = {
+    "job_description": Job.job_description,
+    "sponsorship_analysis": Job.sponsorship_analysis,
+    "match_analysis": Job.match_analysis,
+    "cover_letter": Job.cover_letter
+}
+# status sorts in pipeline order, has_visa_sponsorship as no < unknown < yes (the order of the table badges)
+SORT_COLUMNS = {
+    "created_at": Job.created_at,
+    "updated_at": Job.updated_at,
+    "title": Job.title,
+    "company": Job.company,
+    "status": case({"new": 1, "applied": 2, "interview": 3, "offer": 4, "rejected": 5}, value=Job.status),
+    "has_visa_sponsorship": case((Job.has_visa_sponsorship.is_(False), 1), (Job.has_visa_sponsorship.is_(True), 3), else_=2),
+    "resume_match_percentage": Job.resume_match_percentage,
+    "local_match_score": Job.local_match_score,
+    "applied_date": Job.applied_date,
+    "response_date": Job.response_date,
+    "days_to_response": Job.days_to_response
+}
+DATE_SORT_FIELDS = {"created_at", "updated_at", "applied_date", "response_date"}
+
+
+def _encode_cursor(value, job_id: int) -> str:
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    return base64.urlsafe_b64encode(json.dumps([value, job_id]).encode()).decode()
+
+
+def _decode_cursor(cursor: str):
+    try:
+        value, job_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return value, int(job_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _after_cursor(column, descending: bool, value, job_id: int):
+    """Keyset condition for rows after (value, job_id); NULLs sort first in asc, last in desc"""
+    if descending:
+        if value is None:
+            return and_(column.is_(None), Job.id < job_id)
+        return or_(column < value, and_(column == value, Job.id < job_id), column.is_(None))
+    if value is None:
+        return or_(column.isnot(None), and_(column.is_(None), Job.id > job_id))
+    return or_(column > value, and_(column == value, Job.id > job_id))
+
+
+def _parse_include(include: Optional[str]) -> list:
+    included = [field for field in (include or "").split(",") if field]
+    unknown = [field for field in included if field not in HEAVY_COLUMNS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown include fields: {', '.join(unknown)}")
+    return included
+
+
+def _jobs_etag(cursor: int, request: Request) -> str:
+    """Weak ETag of a job list response: every insert, update and delete advances the change cursor"""
+    return http_cache.weak_etag(f"{cursor}|{request.url.query}")
+
+
+VISA_FILTERS = {
+    "true": Job.has_visa_sponsorship.is_(True),
+    "false": Job.has_visa_sponsorship.is_(False),
+    "null": Job.has_visa_sponsorship.is_(None),
+}
+
+
+def _check_visa(visa: Optional[List[str]]):
+    if visa and any(value not in VISA_FILTERS for value in visa):
+        raise HTTPException(status_code=400, detail="visa must be true, false or null")
+
+
+def _filter_jobs(query, status, visa, min_match, max_match):
+    """Apply the list filters shared by GET /api/jobs and GET /api/jobs/search"""
+    if status:
+        query = query.filter(Job.status.in_(status))
+    if visa:
+        _check_visa(visa)
+        query = query.filter(or_(*[VISA_FILTERS[value] for value in visa]))
+    if min_match is not None:
+        query = query.filter(Job.resume_match_percentage >= min_match)
+    if max_match is not None:
+        query = query.filter(Job.resume_match_percentage <= max_match)
+    return query
+
+
+@app.get("/api/jobs", response_model=List[JobListItem], response_model_exclude_unset=True)
+def get_jobs(
+    request: Request,
+    response: Response,
+    status: Optional[List[str]] = Query(None),
+    visa: Optional[List[str]] = Query(None, description="true / false / null"),
+    min_match: Optional[int] = None,
+    max_match: Optional[int] = None,
+    sort: str = "created_at",
+    order: str = "desc",
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    include: Optional[str] = Query(None, description="Comma-separated: job_description, sponsorship_analysis, match_analysis, cover_letter"),
+    db: Session = Depends(get_db)
+):
+    """Get list of jobs with filters, sorting and keyset pagination (next page cursor in X-Next-Cursor)
+
+    Conditional: If-None-Match with the ETag of an earlier response returns 304 while no job changed.
+    X-Change-Cursor: pass as `since` to GET /api/jobs/changes to get later changes only.
+    """
+    if sort not in SORT_COLUMNS:
+        raise HTTPException(status_code=400, detail=f"sort must be one of: {', '.join(SORT_COLUMNS)}")
+    if order not in ["asc", "desc"]:
+        raise HTTPException(status_code=400, detail="order must be asc or desc")
+    
+    included = _parse_include(include)
+    query = db.query(*LIST_COLUMNS, *[HEAVY_COLUMNS[field] for field in included])
+    query = _filter_jobs(query, status, visa, min_match, max_match)
+    
+    # Dates are compared as stored text: SQLite keeps server_default timestamps without
+    # microseconds, so a datetime parameter would never equal them
+    column = SORT_COLUMNS[sort]
+    if sort in DATE_SORT_FIELDS:
+        column = type_coerce(column, String)
+    descending = order == "desc"
+    if cursor:
+        value, job_id = _decode_cursor(cursor)
+        query = query.filter(_after_cursor(column, descending, value, job_id))
+    if descending:
+        query = query.order_by(column.desc().nulls_last(), Job.id.desc())
+    else:
+        query = query.order_by(column.asc().nulls_first(), Job.id.asc())
+    
+    # After validation, so a bad request gets 400 and not 304
+    change_cursor, _ = sync.sequence(db)  # Before the query: a change during the query is sent again, not lost
+    etag = _jobs_etag(change_cursor, request)
+    if http_cache.not_modified(request, etag):
+        return http_cache.not_modified_response(etag)
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Change-Cursor"] = str(change_cursor)
+    
+    if limit:
+        rows = query.add_columns(column.label("sort_key")).limit(limit + 1).all()
+        if len(rows) > limit:
+            rows = rows[:limit]
+            response.headers["X-Next-Cursor"] = _encode_cursor(rows[-1].sort_key, rows[-1].id)
+    else:
+        rows = query.all()
+    
+    logger.info(f"GET /api/jobs | 200 OK | {len(rows)} jobs returned")
+    jobs = [row._asdict() for row in rows]
+    for job in jobs:
+        job.pop("sort_key", None)
     return jobs
 
 
+SEARCH_TABLE = literal_column("jobs_fts")
+SEARCH_ROWID = literal_column("jobs_fts.rowid")
+_SEARCH_TERM_PATTERN = re.compile(r"\w+")
+
+
+def _search_expression(q: str) -> str:
+    """FTS5 query from free text: every word must match, the last one as a prefix (search as you type)"""
+    terms = _SEARCH_TERM_PATTERN.findall(q)
+    if not terms:
+        raise HTTPException(status_code=400, detail="q must contain at least one word")
+    return " ".join(f'"{term}"' for term in terms) + "*"
+
+
+def _search_page(db: Session, matches, window: int, status, visa, min_match, max_match, limit: int, offset: int) -> dict:
+    """{job id: rank} of a search results page, best first, ranked among the newest `window` matches only.
+
+    rank is the weighted bm25() configured on the index. It costs ~2us per match, while walking matches in rowid
+    order is free in FTS5, so a word found in 20k jobs is ranked in ~5ms instead of ~50ms
+    """
+    candidates = db.query(SEARCH_ROWID.label("id"), literal_column("jobs_fts.rank").label("rank")).select_from(
+        table("jobs_fts")
+    ).filter(matches).order_by(SEARCH_ROWID.desc()).limit(window).subquery()
+    page = db.query(candidates.c.id, candidates.c.rank)
+    if status or visa or min_match is not None or max_match is not None:
+        page = _filter_jobs(page.join(Job, Job.id == candidates.c.id), status, visa, min_match, max_match)
+    return dict(page.order_by(candidates.c.rank, candidates.c.id.desc()).limit(limit).offset(offset).all())
+
+
+@app.get("/api/jobs/search", response_model=List[JobSearchResult], response_model_exclude_unset=True)
+def search_jobs(
+    request: Request,
+    response: Response,
+    q: str,
+    status: Optional[List[str]] = Query(None),
+    visa: Optional[List[str]] = Query(None, description="true / false / null"),
+    min_match: Optional[int] = None,
+    max_match: Optional[int] = None,
+    limit: int = Query(50, ge=1, le=200),
+    offset: int = Query(0, ge=0),
+    include: Optional[str] = Query(None, description="Comma-separated: job_description, sponsorship_analysis, match_analysis, cover_letter"),
+    db: Session = Depends(get_db)
+):
+    """Full-text search over title, company, description and analyses, best matches first"""
+    if db.get_bind().dialect.name != "sqlite":
+        raise HTTPException(status_code=501, detail="Full-text search requires SQLite FTS5")
+    
+    included = _parse_include(include)
+    matches = SEARCH_TABLE.op("MATCH")(_search_expression(q))
+    _check_visa(visa)  # Before the 304 check, like q and include
+    
+    etag = _jobs_etag(sync.sequence(db)[0], request)
+    if http_cache.not_modified(request, etag):
+        return http_cache.not_modified_response(etag)
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
+    
+    # Page of (rowid, rank) first, ranked and cut inside jobs_fts before jobs are joined for the filters.
+    # The window grows when too few of its matches pass the filters
+    window = max(SEARCH_RANK_WINDOW, offset + limit)
+    ranks = _search_page(db, matches, window, status, visa, min_match, max_match, limit, offset)
+    if len(ranks) < limit and (status or visa or min_match is not None or max_match is not None):
+        found = db.query(func.count()).select_from(table("jobs_fts")).filter(matches).scalar()
+        while len(ranks) < limit and window < found:
+            window *= 4
+            ranks = _search_page(db, matches, window, status, visa, min_match, max_match, limit, offset)
+    if not ranks:
+        logger.info(f"GET /api/jobs/search | q={q!r} | 0 results")
+        return []
+    
+    # Job columns and highlighted snippets for that page in one scan of the index: a rowid range instead of one
+    # MATCH per job (each opens a cursor, ~1.5ms for a common prefix); "+" keeps IN from becoming such lookups
+    snippet = func.snippet(SEARCH_TABLE, -1, "<mark>", "</mark>", "…", 16)
+    rows = db.query(
+        *LIST_COLUMNS, *[HEAVY_COLUMNS[field] for field in included], snippet.label("snippet")
+    ).select_from(table("jobs_fts")).join(Job, Job.id == SEARCH_ROWID).filter(
+        matches, SEARCH_ROWID.between(min(ranks), max(ranks)), literal_column("+jobs_fts.rowid").in_(list(ranks))
+    ).all()
+    results = sorted(({**row._asdict(), "rank": ranks[row.id]} for row in rows), key=lambda result: (result["rank"], -result["id"]))
+    
+    logger.info(f"GET /api/jobs/search | q={q!r} | {len(results)} results")
+    return results
+
+
+@app.get("/api/jobs/changes", response_model=JobChanges, response_model_exclude_unset=True)
+def get_job_changes(
+    since: int = Query(..., ge=0, description="X-Change-Cursor of GET /api/jobs or cursor of the previous call"),
+    include: Optional[str] = Query(None, description="Comma-separated: job_description, sponsorship_analysis, match_analysis, cover_letter"),
+    db: Session = Depends(get_db)
+):
+    """Jobs inserted or updated and ids of jobs deleted after cursor `since`, oldest change first
+
+    Apply deletions first: SQLite may give the id of the last deleted job to the next new one.
+    """
+    included = _parse_include(include)
+    cursor, pruned = sync.sequence(db)
+    if since > cursor or since < pruned:
+        return {"cursor": cursor, "reset": True, "jobs": [], "deleted": []}
+    
+    rows = db.query(*LIST_COLUMNS, *[HEAVY_COLUMNS[field] for field in included]).filter(
+        Job.change_seq > since
+    ).order_by(Job.change_seq).limit(SYNC_MAX_CHANGES + 1).all()
+    if len(rows) > SYNC_MAX_CHANGES:
+        return {"cursor": cursor, "reset": True, "jobs": [], "deleted": []}
+    deleted = db.query(JobDeletion.job_id).filter(JobDeletion.change_seq > since).order_by(JobDeletion.change_seq)
+    
+    return {
+        "cursor": cursor,
+        "reset": False,
+        "jobs": [row._asdict() for row in rows],
+        "deleted": [row.job_id for row in deleted]
+    }
+
+
 @app.get("/api/jobs/{job_id}", response_model=JobResponse)
-async def get_job(job_id: int, db: Session = Depends(get_db)):
-    """Get single job by ID"""
+def get_job(job_id: int, request: Request, db: Session = Depends(get_db)):
+    """Get single job by ID (ETag over the response body, If-None-Match returns 304)"""
     job = db.query(Job).filter(Job.id == job_id).first()
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
-    return job
+    body = JobResponse.model_validate(job).model_dump_json()
+    etag = http_cache.weak_etag(body)
+    if http_cache.not_modified(request, etag):
+        return http_cache.not_modified_response(etag)
+    return Response(body, media_type="application/json", headers={"ETag": etag, "Cache-Control": "no-cache"})
 
 
 @app.put("/api/jobs/{job_id}", response_model=JobResponse)
-async def update_job(job_id: int, job_update: JobUpdate, db: Session = Depends(get_db)):
+def update_job(job_id: int, job_update: JobUpdate, db: Session = Depends(get_db)):
     """Update job"""
     job = db.query(Job).filter(Job.id == job_id).first()
     if not job:
@@ -245,24 +874,44 @@ async def update_job(job_id: int, job_update: JobUpdate, db: Session = Depends(g
                 logger.info(f"Job {job_id}: response_date and days_to_response set automatically")
     
     # Update fields
-    for field, value in job_update.dict(exclude_unset=True).items():
+    update_data = job_update.dict(exclude_unset=True)
+    for field, value in update_data.items():
         setattr(job, field, value)
     
+    if "job_description" in update_data:
+        ingest.prepare_job(job)
+        if not link_duplicate(job, db):
+            # Stored analysis was made for the old description: stale until analyzed again
+            job.analysis_resume_hash = None
+            job.analysis_prompt_version = None
+        scoring.score_job(job)
+    
     db.commit()
     db.refresh(job)
+    index_job(job)
     logger.info(f"PUT /api/jobs/{job_id} | 200 OK")
     return job
 
 
 @app.delete("/api/jobs/{job_id}", status_code=204)
 async def delete_job(job_id: int, db: Session = Depends(get_db)):
-    """Delete job"""
-    job = db.query(Job).filter(Job.id == job_id).first()
-    if not job:
-        raise HTTPException(status_code=404, detail="Job not found")
+    """Delete job; near-duplicates waiting for its analysis are analyzed on their own"""
+    def delete():
+        job = db.query(Job).filter(Job.id == job_id).first()
+        if not job:
+            return None
+        released = release_duplicates(job_id, db)
+        db.delete(job)
+        db.commit()
+        return released
     
-    db.delete(job)
-    db.commit()
+    released = await asyncio.to_thread(delete)
+    if released is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    for released_id in released:
+        enqueue(released_id)
+    duplicate_index.remove(job_id)
+    scoring.scoring_index.remove(job_id)
     logger.info(f"DELETE /api/jobs/{job_id} | 204 No Content")
 
 
@@ -0,0 +1,181 @@
+"""
+Prometheus metrics.
+
+Small in-process registry rendered in the Prometheus text format at
+/metrics (no client library needed). Recording a value is a dict update
+under a lock, and requests are timed by a plain ASGI middleware, so the
+per-request overhead stays in the microseconds.
+"""
+import time
+from bisect import bisect_left
+from threading import Lock
+
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+_registry = []
+
+
+def _format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class Counter:
+    """Monotonic value per label combination"""
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.values = {}
+        self.lock = Lock()
+        _registry.append(self)
+
+    def inc(self, *label_values, amount: float = 1):
+        with self.lock:
+            self.values[label_values] = self.values.get(label_values, 0) + amount
+
+    def samples(self):
+        with self.lock:
+            values = list(self.values.items())
+        for label_values, value in values:
+            yield f"{self.name}{_format_labels(self.labels, label_values)} {value}"
+
+
+class Gauge(Counter):
+    """Value that goes up and down, or is read from a function when rendered"""
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, function=None):
+        super().__init__(name, documentation)
+        self.function = function
+
+    def dec(self, amount: float = 1):
+        self.inc(amount=-amount)
+
+    def samples(self):
+        if self.function is not None:
+            yield f"{self.name} {self.function()}"
+        else:
+            yield f"{self.name} {self.values.get((), 0)}"
+
+
+class Histogram:
+    """Cumulative bucket counts, sum and count per label combination"""
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.buckets = buckets
+        self.values = {}  # label values -> [bucket counts..., +Inf count, sum]
+        self.lock = Lock()
+        _registry.append(self)
+
+    def observe(self, value: float, *label_values):
+        index = bisect_left(self.buckets, value)
+        with self.lock:
+            series = self.values.get(label_values)
+            if series is None:
+                series = self.values[label_values] = [0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    def samples(self):
+        with self.lock:
+            values = [(label_values, list(series)) for label_values, series in self.values.items()]
+        for label_values, series in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), series):
+                cumulative += count
+                labels = _format_labels(self.labels, label_values, f'le="{bound}"')
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.labels, label_values)
+            yield f"{self.name}_sum{labels} {series[-1]}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+def render() -> str:
+    """All metrics in the Prometheus text exposition format"""
+    lines = []
+    for metric in _registry:
+        lines.append(f"# HELP {metric.name} {metric.documentation}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        lines.extend(metric.samples())
+    return "\n".join(lines) + "\n"
+
+
+# HTTP
+http_requests = Counter("http_requests_total", "HTTP requests", ("method", "route", "status"))
+http_request_duration = Histogram("http_request_duration_seconds", "HTTP request latency", ("method", "route"))
+
+# Database
+db_queries = Counter("db_queries_total", "SQL statements executed", ("operation",))
+db_query_duration = Histogram("db_query_duration_seconds", "SQL statement latency", ("operation",))
+
+# LLM
+llm_in_flight = Gauge("llm_requests_in_flight", "OpenAI requests waiting for a response")
+llm_calls = Counter("llm_calls_total", "Logged LLM calls", ("function", "status"))
+llm_call_duration = Histogram("llm_call_duration_seconds", "LLM call latency", ("function",))
+llm_tokens = Counter("llm_tokens_total", "LLM tokens used", ("function", "type"))
+llm_cost = Counter("llm_cost_usd_total", "Estimated LLM cost in USD", ("function",))
+llm_retries = Counter("llm_retries_total", "OpenAI request retries", ("function",))
+llm_circuit_open = Gauge("llm_circuit_open", "1 while the OpenAI circuit breaker fails calls fast")
+
+# Background work (functions are attached in main.py to avoid import cycles)
+analysis_queue_depth = Gauge("analysis_queue_depth", "Analyses waiting for a free worker")
+llm_log_pending = Gauge("llm_log_pending_records", "LLM log records waiting to be written")
+analysis_tier_duration = Histogram(
+    "analysis_tier_duration_seconds", "Tiered analysis latency per tier", ("tier", "backend")
+)
+
+
+class MetricsMiddleware:
+    """Plain ASGI middleware: request count and latency per route template
+
+    BaseHTTPMiddleware would add a task and a memory stream per request;
+    wrapping send() only costs a function call per message.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.route_paths = None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = self._route(scope)
+            http_request_duration.observe(time.perf_counter() - start, scope["method"], route)
+            http_requests.inc(scope["method"], route, status)
+
+    def _route(self, scope) -> str:
+        """Path template of the matched route ("/api/jobs/{job_id}"), keeps label count bounded"""
+        if self.route_paths is None:
+            self.route_paths = {}
+            for route in scope["app"].routes:
+                endpoint = getattr(route, "endpoint", None) or getattr(route, "app", None)
+                self.route_paths[endpoint] = route.path
+        return self.route_paths.get(scope.get("endpoint"), "unmatched")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, Float
+from sqlalchemy import Column, Integer, String, Text, Boolean, Date, DateTime, Float, Index, LargeBinary, UniqueConstraint
 from sqlalchemy.sql import func
 from app.database import Base
 
@@ -13,23 +13,104 @@ class Job(Base):
     company = Column(String(200), nullable=False)
     job_url = Column(String(500))
     job_description = Column(Text)
+    # Description as sent to the LLM: cleaned and fitted to JOB_DESCRIPTION_MAX_TOKENS (see ingest.py)
+    clean_description = Column(Text, nullable=True)
+    description_tokens = Column(Integer, nullable=True)
     
     # LLM analysis fields
-    has_visa_sponsorship = Column(Boolean, nullable=True)
+    has_visa_sponsorship = Column(Boolean, nullable=True, index=True)
     sponsorship_analysis = Column(Text, nullable=True)
-    resume_match_percentage = Column(Integer, nullable=True)
+    resume_match_percentage = Column(Integer, nullable=True, index=True)
     match_analysis = Column(Text, nullable=True)
     
+    # Keyword match score computed locally before the LLM call, 0-100 (see scoring.py)
+    local_match_score = Column(Integer, nullable=True)
+    
+    # Background analysis: pending / running / done / failed / skipped (local score below
+    # LOCAL_MATCH_THRESHOLD) / extracted (tiered mode, reasoning not requested yet) /
+    # batched (waiting for a Batch API result) (None - nothing to analyze)
+    analysis_status = Column(String(20), nullable=True, index=True)
+    
+    # What the stored analysis was based on (see analysis_queue.current_version); a job whose
+    # values differ from the current resume / prompt is stale. None - unknown or description edited
+    analysis_resume_hash = Column(String(16), nullable=True)
+    analysis_prompt_version = Column(String(16), nullable=True)
+    
+    # Batch API analysis (batch.py): AnalysisBatch the job was last submitted in
+    analysis_batch_id = Column(Integer, nullable=True, index=True)
+    
+    # Near-duplicate detection (MinHash signature, see dedup.py)
+    description_signature = Column(LargeBinary, nullable=True)
+    duplicate_of_id = Column(Integer, nullable=True)
+    
     # Status and workflow
-    status = Column(String(50), default="new")
+    status = Column(String(50), default="new", index=True)
     cover_letter = Column(Text, nullable=True)
     
     # Dates
     applied_date = Column(DateTime, nullable=True)
     response_date = Column(DateTime, nullable=True)
     days_to_response = Column(Integer, nullable=True)
+    created_at = Column(DateTime, server_default=func.now(), index=True)
+    updated_at = Column(DateTime, onupdate=func.now(), index=True)
+    
+    # Delta sync (sync.py): ChangeSequence value of the last insert or update
+    change_seq = Column(Integer, nullable=True, index=True)
+    
+    # Covering indexes for the analytics GROUP BY queries (analytics.py): answered without reading table rows
+    __table_args__ = (
+        Index("ix_jobs_status_dates", "status", "applied_date", "response_date"),
+        Index("ix_jobs_applied_date", "applied_date"),
+        Index("ix_jobs_response_days", "days_to_response", "status"),
+        Index("ix_jobs_match_status", "resume_match_percentage", "status"),
+    )
+
+
+class JobDeletion(Base):
+    """Tombstone of a deleted job: lets delta sync clients drop it (see sync.py)"""
+    __tablename__ = "job_deletions"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    job_id = Column(Integer, nullable=False)
+    change_seq = Column(Integer, nullable=False, index=True)
+    deleted_at = Column(DateTime, server_default=func.now(), index=True)
+
+
+class ChangeSequence(Base):
+    """Single-row counter: every transaction that writes jobs takes the next value (see sync.py)"""
+    __tablename__ = "change_sequence"
+    
+    id = Column(Integer, primary_key=True)
+    value = Column(Integer, nullable=False, default=0)
+    # Highest change_seq of pruned tombstones: older cursors can no longer be synced
+    pruned_value = Column(Integer, nullable=False, default=0)
+
+
+class AnalysisBatch(Base):
+    """OpenAI Batch API job with analyze_job_complete requests for many jobs (see batch.py)"""
+    __tablename__ = "analysis_batches"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    provider_batch_id = Column(String(100), nullable=True, index=True)
+    input_file_id = Column(String(100), nullable=True)
+    output_file_id = Column(String(100), nullable=True)
+    error_file_id = Column(String(100), nullable=True)
+    # Open: submitting / validating / in_progress / finalizing / cancelling (provider status);
+    # closed: applied (results saved, also for expired / cancelled batches) / failed (nothing came back)
+    status = Column(String(20), nullable=False, index=True)
+    job_count = Column(Integer, nullable=False, default=0)
+    completed_count = Column(Integer, nullable=False, default=0)
+    failed_count = Column(Integer, nullable=False, default=0)
+    prompt_tokens = Column(Integer, nullable=False, default=0)
+    cached_tokens = Column(Integer, nullable=False, default=0)
+    completion_tokens = Column(Integer, nullable=False, default=0)
+    cost = Column(Float, nullable=False, default=0)  # USD with the Batch API discount
+    # Version the requests were built for (see analysis_queue.current_version)
+    resume_hash = Column(String(16), nullable=True)
+    prompt_version = Column(String(16), nullable=True)
+    error_message = Column(Text, nullable=True)
     created_at = Column(DateTime, server_default=func.now())
-    updated_at = Column(DateTime, onupdate=func.now())
+    completed_at = Column(DateTime, nullable=True)
 
 
 class LLMLog(Base):
@@ -38,9 +119,50 @@ class LLMLog(Base):
     
     id = Column(Integer, primary_key=True, index=True)
     function_name = Column(String(100), nullable=False)
+    model = Column(String(100), nullable=True)
     status = Column(String(50), nullable=False)
-    execution_time = Column(Float)
+    execution_time = Column(Float)  # Total latency including rate limit wait, seconds
+    ttfb = Column(Float, nullable=True)  # Request sent -> first response byte, seconds
     tokens_used = Column(Integer, nullable=True)
+    prompt_tokens = Column(Integer, nullable=True)
+    cached_tokens = Column(Integer, nullable=True)  # Prompt tokens served from the provider's prompt cache
+    completion_tokens = Column(Integer, nullable=True)
+    retry_count = Column(Integer, nullable=True)
+    cost = Column(Float, nullable=True)  # USD, priced with MODEL_PRICING when logged
     error_message = Column(Text, nullable=True)
     created_at = Column(DateTime, server_default=func.now())
 
+
+class LLMUsageDaily(Base):
+    """Per-function, per-day totals of llm_logs, updated together with the log rows"""
+    __tablename__ = "llm_usage_daily"
+    __table_args__ = (UniqueConstraint("function_name", "day"),)
+    
+    id = Column(Integer, primary_key=True, index=True)
+    function_name = Column(String(100), nullable=False)
+    day = Column(Date, nullable=False, index=True)
+    call_count = Column(Integer, nullable=False, default=0)
+    success_count = Column(Integer, nullable=False, default=0)
+    cache_hit_count = Column(Integer, nullable=False, default=0)
+    tokens_used = Column(Integer, nullable=False, default=0)
+    execution_time_total = Column(Float, nullable=False, default=0)
+    prompt_tokens = Column(Integer, default=0)
+    cached_tokens = Column(Integer, default=0)
+    completion_tokens = Column(Integer, default=0)
+    retry_count = Column(Integer, default=0)
+    cost_total = Column(Float, default=0)
+    latency_sketch = Column(LargeBinary)  # sketch.QuantileSketch of execution_time
+    ttfb_sketch = Column(LargeBinary)
+
+
+class LLMCache(Base):
+    """Cached LLM responses keyed by a hash of model, temperature, prompt template and inputs"""
+    __tablename__ = "llm_cache"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    cache_key = Column(String(64), nullable=False, unique=True, index=True)
+    function_name = Column(String(100), nullable=False)
+    response = Column(Text, nullable=False)
+    hit_count = Column(Integer, default=0)
+    created_at = Column(DateTime, nullable=False)
+    last_used_at = Column(DateTime, nullable=False, index=True)
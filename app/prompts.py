@@ -2,33 +2,15 @@
 Prompts for LLM functions
 """
 
-PROMPTS = {
-    "analyze_job_complete": """Analyze the following job description and provide a comprehensive analysis.
-Extract job information, analyze visa sponsorship, and calculate resume match.
-
-Return ONLY a valid JSON object with this exact format:
-{{
-    "title": "job title here",
-    "company": "company name here",
-    "visa_sponsorship": true/false/null,
-    "visa_analysis": "text string with detailed explanation",
-    "match_percentage": calculated match percentage,
-    "match_analysis": "text string with structured analysis"
-}}
-
-CRITICAL JSON FORMATTING:
+# Parts shared by the complete analysis and the reasoning tier prompt
+ANALYSIS_JSON_FORMATTING = """CRITICAL JSON FORMATTING:
 - visa_analysis and match_analysis MUST be plain text strings, NOT nested objects or arrays!
 - Use \\n (double backslash n) for line breaks inside strings, NOT actual newline characters
 - Make sure all string values are properly escaped for JSON
 
-CRITICAL for visa_sponsorship field - BE VERY STRICT:
-- Use `true` ONLY if the job posting EXPLICITLY STATES they offer/provide visa sponsorship (words like "visa sponsorship available", "will sponsor")
-- Use `false` ONLY if it EXPLICITLY STATES they do NOT sponsor (e.g., "must be authorized to work", "no visa sponsorship", "citizenship required")
-- Use `null` in ALL OTHER CASES - even if you think the company could afford it or typically sponsors. If it's not explicitly mentioned, it's `null`
-
-DO NOT infer true/false from company size or industry - ONLY from explicit statements in the job posting!
+"""
 
-CRITICAL for visa_analysis field - YOU MUST PROVIDE ALL 4 SECTIONS BELOW:
+ANALYSIS_SECTIONS = """CRITICAL for visa_analysis field - YOU MUST PROVIDE ALL 4 SECTIONS BELOW:
 
 SECTION 1 - Direct Statement: [What job explicitly says about sponsorship OR "The job posting does not mention visa sponsorship."]\\n\\n
 
@@ -55,30 +37,103 @@ FINAL REMINDER:
 - match_analysis MUST contain both STRENGTHS and GAPS sections with multiple bullet points
 - DO NOT write short/incomplete analysis - be thorough!
 
-Job Description:
+"""
+
+ANALYSIS_INPUTS = """Job Description:
 {job_description}
 
 Resume:
 {resume}
-""",
+"""
+
+PROMPTS = {
+    "analyze_job_complete": """Analyze the following job description and provide a comprehensive analysis.
+Extract job information, analyze visa sponsorship, and calculate resume match.
+
+Return ONLY a valid JSON object with this exact format:
+{{
+    "title": "job title here",
+    "company": "company name here",
+    "visa_sponsorship": true/false/null,
+    "visa_analysis": "text string with detailed explanation",
+    "match_percentage": calculated match percentage,
+    "match_analysis": "text string with structured analysis"
+}}
+
+""" + ANALYSIS_JSON_FORMATTING + """CRITICAL for visa_sponsorship field - BE VERY STRICT:
+- Use `true` ONLY if the job posting EXPLICITLY STATES they offer/provide visa sponsorship (words like "visa sponsorship available", "will sponsor")
+- Use `false` ONLY if it EXPLICITLY STATES they do NOT sponsor (e.g., "must be authorized to work", "no visa sponsorship", "citizenship required")
+- Use `null` in ALL OTHER CASES - even if you think the company could afford it or typically sponsors. If it's not explicitly mentioned, it's `null`
+
+DO NOT infer true/false from company size or industry - ONLY from explicit statements in the job posting!
+
+""" + ANALYSIS_SECTIONS + ANALYSIS_INPUTS,
     
-    "cover_letter": """Generate a personalized cover letter based on the resume, base template, and job description.
+    # Reasoning tier of the tiered mode: title, company and the explicit visa statement come from the extraction tier
+    "analyze_job_reasoning": """Analyze visa sponsorship and resume match for the job below.
+Title, company and what the posting states about visa sponsorship were already extracted:
+
+Job Title: {job_title}
+Company: {company}
+Visa sponsorship stated in the posting: {visa_sponsorship}
 
-IMPORTANT: Return ONLY the cover letter text, no JSON, no markdown, no extra formatting.
+Return ONLY a valid JSON object with this exact format:
+{{
+    "visa_analysis": "text string with detailed explanation",
+    "match_percentage": calculated match percentage,
+    "match_analysis": "text string with structured analysis"
+}}
+
+""" + ANALYSIS_JSON_FORMATTING + ANALYSIS_SECTIONS + ANALYSIS_INPUTS,
+    
+    "extract_job_info": """Extract basic information from the job posting below.
 
+Return ONLY a valid JSON object with this exact format:
+{{
+    "title": "job title, or null if not stated",
+    "company": "company name, or null if not stated",
+    "visa_sponsorship": true/false/null,
+    "visa_statement": "the sentence about visa sponsorship quoted from the posting, or null"
+}}
+
+visa_sponsorship: `true` ONLY if the posting EXPLICITLY offers visa sponsorship, `false` ONLY if it EXPLICITLY excludes it (e.g. "no visa sponsorship", "must be authorized to work"), `null` in all other cases. Do not infer from company size or industry.
+
+Job Description:
+{job_description}
+""",
+    
+    "repair_json": """The JSON below is a response to another request, but it is malformed or cut off.
+Return the same content as one valid JSON object. Keep every value that is present exactly as written.
+Fields missing or cut off: {missing}. Complete cut-off text briefly in the same style, use null or an empty string when a value cannot be inferred.
+
+JSON:
+{text}
+""",
+    
+    # Cover letter: the system message is identical for every job (instructions, resume, template) so the
+    # provider's prompt cache serves it; only the job part in the user message changes
+    "cover_letter_system": """You write the job-specific part of a cover letter. The greeting, introduction and closing come from the applicant's base template below and are filled in by the application.
+
+Write ONLY the text that replaces [CUSTOM_CONTENT] in the template: 1-3 short paragraphs that connect the most relevant skills and achievements from the resume to the job requirements.
+- Do not repeat the greeting, the introduction or the closing of the template
+- Use the real company name and job title, no placeholders
+- Plain text only: no JSON, no markdown, no extra formatting
+{placeholder_instructions}
 Resume:
 {resume}
 
 Base Template:
 {template}
-
-Job Title: {job_title}
+""",
+    
+    "cover_letter_placeholders": """- Start with one line per placeholder in the form "[NAME]: value" for these placeholders: {placeholders}
+  then a line "[CUSTOM_CONTENT]:" and then the text
+""",
+    
+    "cover_letter": """Job Title: {job_title}
 Company: {company}
 
 Job Description:
 {job_description}
-
-Generate a professional cover letter that highlights relevant skills from the resume that match the job requirements.
 """
 }
-
@@ -0,0 +1,67 @@
+"""
+Token-bucket limiter for OpenAI requests-per-minute and tokens-per-minute quotas.
+
+Every LLM call waits here before hitting the API, so concurrent analyses
+(worker pool, bulk import) slow down instead of producing 429 errors.
+"""
+import asyncio
+import time
+
+from app.config import OPENAI_RPM_LIMIT, OPENAI_TPM_LIMIT, logger
+
+
+class TokenBucket:
+    """Bucket refilled continuously up to `per_minute` units"""
+
+    def __init__(self, per_minute: int):
+        self.capacity = per_minute
+        self.rate = per_minute / 60
+        self.available = per_minute
+        self.updated_at = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.available = min(self.capacity, self.available + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` units are available (0 if available now)"""
+        self._refill()
+        if self.available >= amount:
+            return 0
+        return (amount - self.available) / self.rate
+
+
+class RateLimiter:
+    """Requests-per-minute and tokens-per-minute buckets acquired together"""
+
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self._lock = None
+
+    async def acquire(self, estimated_tokens: int):
+        """Wait until one request and `estimated_tokens` tokens fit into the quotas"""
+        # Requests larger than the whole bucket would wait forever
+        estimated_tokens = min(estimated_tokens, self.tokens.capacity)
+
+        # Lock keeps waiters in FIFO order so big requests are not starved
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            while True:
+                delay = max(self.requests.wait_time(1), self.tokens.wait_time(estimated_tokens))
+                if delay == 0:
+                    break
+                logger.info(f"Rate limit | waiting {delay:.1f}s for OpenAI quota")
+                await asyncio.sleep(delay)
+            self.requests.available -= 1
+            self.tokens.available -= estimated_tokens
+
+
+def estimate_tokens(prompt: str, max_tokens: int) -> int:
+    """OpenAI counts prompt tokens plus max_tokens against the TPM quota (~4 chars per token)"""
+    return len(prompt) // 4 + max_tokens
+
+
+rate_limiter = RateLimiter(OPENAI_RPM_LIMIT, OPENAI_TPM_LIMIT)
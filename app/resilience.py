@@ -0,0 +1,204 @@
+"""
+Resilience layer for OpenAI calls.
+
+- one shared httpx connection pool (keep-alive, HTTP/2) behind the client
+- a deadline per call covering all attempts, so a slow upstream can't hold
+  a worker or request handler indefinitely; a streamed response is read
+  within what is left of it and with at most OPENAI_TIMEOUT between chunks
+- retries of transient errors (connection, timeout, 429, 5xx) with
+  exponential backoff and full jitter; Retry-After headers take precedence
+- a circuit breaker: after CIRCUIT_FAILURE_THRESHOLD consecutive calls that
+  failed with all their retries, calls fail immediately for
+  CIRCUIT_RECOVERY_SECONDS, then a single trial call decides whether to close
+  it again. Retried attempts don't count: with concurrent callers they would
+  add up to the threshold while every call still succeeds on retry
+"""
+import asyncio
+import random
+import time
+from email.utils import parsedate_to_datetime
+
+import httpx
+import openai
+
+from app.config import (
+    OPENAI_TIMEOUT, OPENAI_CONNECT_TIMEOUT, OPENAI_CALL_DEADLINE, OPENAI_MAX_RETRIES,
+    OPENAI_BACKOFF_BASE, OPENAI_BACKOFF_MAX, OPENAI_HTTP2, OPENAI_MAX_CONNECTIONS,
+    OPENAI_KEEPALIVE_CONNECTIONS, OPENAI_KEEPALIVE_EXPIRY, CIRCUIT_FAILURE_THRESHOLD,
+    CIRCUIT_RECOVERY_SECONDS, logger
+)
+
+
+class LLMCallError(Exception):
+    """Final failure of an OpenAI call
+
+    outcome ("error" / "timeout" / "circuit_open") is logged as the LLMLog status, retries as retry_count.
+    """
+
+    def __init__(self, message: str, outcome: str = "error", retries: int = 0):
+        super().__init__(message)
+        self.outcome = outcome
+        self.retries = retries
+
+
+def make_http_client() -> httpx.AsyncClient:
+    """Connection pool shared by all OpenAI requests"""
+    return openai.DefaultAsyncHttpxClient(
+        http2=OPENAI_HTTP2,
+        limits=httpx.Limits(
+            max_connections=OPENAI_MAX_CONNECTIONS,
+            max_keepalive_connections=OPENAI_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=OPENAI_KEEPALIVE_EXPIRY
+        ),
+        timeout=httpx.Timeout(OPENAI_TIMEOUT, connect=OPENAI_CONNECT_TIMEOUT)
+    )
+
+
+def is_transient(error: Exception) -> bool:
+    """Errors worth retrying: the same request may succeed later"""
+    if isinstance(error, openai.APIConnectionError):  # Includes APITimeoutError
+        return True
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code in (408, 409, 429) or error.status_code >= 500
+    return False
+
+
+def retry_after(error: Exception):
+    """Seconds the server asked us to wait (retry-after-ms / retry-after headers), None if not given"""
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    headers = response.headers
+    try:
+        if "retry-after-ms" in headers:
+            return float(headers["retry-after-ms"]) / 1000
+        if "retry-after" in headers:
+            value = headers["retry-after"]
+            try:
+                return float(value)
+            except ValueError:
+                return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        pass
+    return None
+
+
+def backoff_delay(attempt: int) -> float:
+    """Full jitter: uniform in [0, min(OPENAI_BACKOFF_MAX, OPENAI_BACKOFF_BASE * 2^attempt)]"""
+    return random.uniform(0, min(OPENAI_BACKOFF_MAX, OPENAI_BACKOFF_BASE * 2 ** attempt))
+
+
+class CircuitBreaker:
+    """Closed -> open after `failure_threshold` consecutive failed calls -> half-open after `recovery_seconds`"""
+
+    def __init__(self, failure_threshold: int, recovery_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.recovery_seconds = recovery_seconds
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at < self.recovery_seconds:
+            return "open"
+        return "half_open"
+
+    def allow(self) -> bool:
+        """May a request be sent now? In half-open state only one trial request at a time"""
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "open" or self.trial_in_flight:
+            return False
+        self.trial_in_flight = True
+        return True
+
+    def record_success(self):
+        if self.opened_at is not None:
+            logger.info("Circuit breaker | OpenAI recovered, circuit closed")
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self.trial_in_flight or (self.opened_at is None and self.failures >= self.failure_threshold):
+            logger.warning(f"Circuit breaker | {self.failures} consecutive OpenAI failures, "
+                           f"failing fast for {self.recovery_seconds:.0f}s")
+            self.opened_at = time.monotonic()
+        self.trial_in_flight = False
+
+    def release_trial(self):
+        """Trial request cancelled without an outcome"""
+        self.trial_in_flight = False
+
+
+circuit_breaker = CircuitBreaker(CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RECOVERY_SECONDS)
+
+
+def circuit_open() -> int:
+    """1 while calls are failed fast (open or half-open), for the metrics gauge"""
+    return int(circuit_breaker.state != "closed")
+
+
+async def call(request):
+    """Await request() with deadline, retries and circuit breaker: (result, retries taken)
+
+    Raises LLMCallError when the call finally fails.
+    """
+    deadline = time.monotonic() + OPENAI_CALL_DEADLINE
+    attempt = 0
+    while True:
+        trial = circuit_breaker.state == "half_open"  # This attempt decides whether the circuit closes
+        if not circuit_breaker.allow():
+            raise LLMCallError("OpenAI circuit open: failing fast after repeated errors", "circuit_open", attempt)
+        try:
+            result = await asyncio.wait_for(request(), deadline - time.monotonic())
+        except asyncio.TimeoutError:
+            circuit_breaker.record_failure()
+            raise LLMCallError(f"No response within the {OPENAI_CALL_DEADLINE}s deadline", "timeout", attempt)
+        except asyncio.CancelledError:
+            circuit_breaker.release_trial()
+            raise
+        except Exception as e:
+            if not is_transient(e):
+                # Upstream answered (e.g. 400 bad request): healthy, but retrying won't help
+                circuit_breaker.record_success()
+                raise LLMCallError(str(e), "error", attempt) from e
+            delay = retry_after(e)
+            delay = backoff_delay(attempt) if delay is None else delay
+            if trial or attempt >= OPENAI_MAX_RETRIES or time.monotonic() + delay >= deadline:
+                # Only a call that gives up counts as a failure; a failed trial reopens the circuit at once
+                circuit_breaker.record_failure()
+                outcome = "timeout" if isinstance(e, openai.APITimeoutError) else "error"
+                raise LLMCallError(str(e), outcome, attempt) from e
+            attempt += 1
+            logger.warning(f"OpenAI | {type(e).__name__}: {e} | retry {attempt}/{OPENAI_MAX_RETRIES} in {delay:.1f}s")
+            await asyncio.sleep(delay)
+            continue
+        circuit_breaker.record_success()
+        return result, attempt
+
+
+async def read_stream(stream, deadline: float, retries: int = 0):
+    """Chunks of a streamed response until time.monotonic() reaches deadline, OPENAI_TIMEOUT at most between two
+
+    call() only covers opening the stream. Raises LLMCallError ("timeout") when the upstream stalls.
+    """
+    chunks = stream.__aiter__()
+    while True:
+        timeout = min(OPENAI_TIMEOUT, deadline - time.monotonic())
+        try:
+            chunk = await asyncio.wait_for(chunks.__anext__(), timeout)
+        except StopAsyncIteration:
+            return
+        except asyncio.TimeoutError:
+            if hasattr(stream, "close"):
+                await stream.close()  # openai AsyncStream: release the connection
+            if timeout < OPENAI_TIMEOUT:
+                raise LLMCallError("Stream not finished within the call deadline", "timeout", retries)
+            raise LLMCallError(f"No stream data for {OPENAI_TIMEOUT}s", "timeout", retries)
+        yield chunk
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
 
@@ -30,10 +30,14 @@ class JobResponse(BaseModel):
     company: str
     job_url: Optional[str]
     job_description: Optional[str]
+    description_tokens: Optional[int] = None
     has_visa_sponsorship: Optional[bool]
     sponsorship_analysis: Optional[str]
     resume_match_percentage: Optional[int]
+    local_match_score: Optional[int] = None
     match_analysis: Optional[str]
+    analysis_status: Optional[str]
+    duplicate_of_id: Optional[int]
     status: str
     cover_letter: Optional[str]
     applied_date: Optional[datetime]
@@ -45,3 +49,76 @@ class JobResponse(BaseModel):
     class Config:
         from_attributes = True
 
+
+class JobListItem(BaseModel):
+    """Job in list responses - large text fields only when requested via include="""
+    id: int
+    title: str
+    company: str
+    job_url: Optional[str]
+    has_visa_sponsorship: Optional[bool]
+    resume_match_percentage: Optional[int]
+    local_match_score: Optional[int] = None
+    analysis_status: Optional[str]
+    duplicate_of_id: Optional[int]
+    status: str
+    applied_date: Optional[datetime]
+    response_date: Optional[datetime]
+    days_to_response: Optional[int]
+    created_at: datetime
+    updated_at: Optional[datetime]
+    job_description: Optional[str] = None
+    sponsorship_analysis: Optional[str] = None
+    match_analysis: Optional[str] = None
+    cover_letter: Optional[str] = None
+
+
+class JobSearchResult(JobListItem):
+    """Search hit: matched text fragment with <mark> around matching terms, BM25 rank (lower is better)"""
+    snippet: Optional[str] = None
+    rank: float
+
+
+class JobChanges(BaseModel):
+    """Delta sync: jobs written and ids of jobs deleted after a cursor
+
+    reset: the changes are not available (too many, or tombstones already pruned) - reload the full list
+    """
+    cursor: int
+    reset: bool
+    jobs: List[JobListItem]
+    deleted: List[int]
+
+
+class AnalysisStatusResponse(BaseModel):
+    """Background analysis progress for a job"""
+    id: int
+    analysis_status: Optional[str]
+
+    class Config:
+        from_attributes = True
+
+
+class JobAnalysis(BaseModel):
+    """Fields returned by analyze_job_complete (JSON schema sent to the API as structured output)"""
+    title: str
+    company: str
+    visa_sponsorship: Optional[bool]
+    visa_analysis: str
+    match_percentage: int
+    match_analysis: str
+
+
+class JobReasoning(BaseModel):
+    """Fields returned by the reasoning tier (analyze_job_complete with the extracted fields given)"""
+    visa_analysis: str
+    match_percentage: int
+    match_analysis: str
+
+
+class JobExtraction(BaseModel):
+    """Fields returned by extract_job_info (extraction tier)"""
+    title: Optional[str]
+    company: Optional[str]
+    visa_sponsorship: Optional[bool]
+    visa_statement: Optional[str]
@@ -0,0 +1,196 @@
+"""
+Local resume match scoring.
+
+Before spending an LLM call, every job gets a quick keyword score: the share
+of the job's TF-IDF weight carried by terms that also appear in the resume
+(0-100). Term counts of all stored jobs are kept in memory as a sparse
+matrix, so scoring the whole table after a resume edit is one sparse
+matrix-vector product instead of re-reading and re-tokenizing descriptions.
+"""
+import re
+import threading
+
+import numpy as np
+from scipy import sparse
+
+from app.config import logger
+from app.database import SessionLocal
+from app.models import Job
+
+
+RESUME_PATH = "templates/user_resume.txt"
+MIN_RESUME_TERMS = 20  # Shorter resume (missing or template placeholder): no scores, nothing skipped
+RESCORE_BATCH_SIZE = 900  # Job ids per UPDATE ... WHERE id IN (...)
+
+_TOKEN_PATTERN = re.compile(r"[a-z][a-z0-9+#]*")
+_STOPWORDS = frozenset("""
+a an and are as at be been but by can do for from has have how if in into is it its
+more must not of on or our over per such that the their them then there these they this
+to up us was we were what when where which while who will with within you your
+""".split())
+
+
+def tokenize(text: str) -> list:
+    """Lowercase words without stopwords; keeps "c++", "c#" style terms"""
+    return [token for token in _TOKEN_PATTERN.findall(text.lower()) if token not in _STOPWORDS]
+
+
+class ScoringIndex:
+    """Term counts per job plus document frequencies, scored against a resume term set"""
+
+    def __init__(self):
+        self.vocabulary = {}
+        self.document_frequency = np.zeros(1024, dtype=np.int32)
+        self.rows = {}  # job_id -> (term indices, counts)
+        self.matrix = None  # CSR built from rows on demand
+        self.matrix_ids = None
+        self.lock = threading.Lock()
+
+    def _term_vector(self, text: str, grow: bool):
+        """Sorted term indices and counts; unknown terms are added only when grow=True"""
+        indices = []
+        for token in tokenize(text):
+            index = self.vocabulary.get(token)
+            if index is None:
+                if not grow:
+                    continue
+                index = self.vocabulary[token] = len(self.vocabulary)
+            indices.append(index)
+        terms, counts = np.unique(np.array(indices, dtype=np.int32), return_counts=True)
+        return terms, counts.astype(np.float32)
+
+    def add(self, job_id: int, text: str):
+        """Insert or replace the job's term counts"""
+        with self.lock:
+            self._remove(job_id)
+            terms, counts = self._term_vector(text or "", grow=True)
+            if len(self.vocabulary) > len(self.document_frequency):
+                self.document_frequency = np.concatenate(
+                    [self.document_frequency, np.zeros(len(self.document_frequency), dtype=np.int32)]
+                )
+            self.document_frequency[terms] += 1
+            self.rows[job_id] = (terms, counts)
+            self.matrix = None
+
+    def remove(self, job_id: int):
+        with self.lock:
+            self._remove(job_id)
+
+    def _remove(self, job_id: int):
+        row = self.rows.pop(job_id, None)
+        if row is not None:
+            self.document_frequency[row[0]] -= 1
+            self.matrix = None
+
+    def _build_matrix(self):
+        """CSR matrix (jobs x vocabulary) of raw term counts"""
+        self.matrix_ids = np.fromiter(self.rows.keys(), dtype=np.int64, count=len(self.rows))
+        rows = list(self.rows.values())
+        lengths = np.fromiter((len(terms) for terms, _ in rows), dtype=np.int64, count=len(rows))
+        indptr = np.concatenate([[0], np.cumsum(lengths)])
+        indices = np.concatenate([terms for terms, _ in rows]) if rows else np.zeros(0, dtype=np.int32)
+        data = np.concatenate([counts for _, counts in rows]) if rows else np.zeros(0, dtype=np.float32)
+        self.matrix = sparse.csr_matrix(
+            (data, indices, indptr), shape=(len(rows), len(self.document_frequency))
+        )
+
+    def _idf(self) -> np.ndarray:
+        jobs = max(len(self.rows), 1)
+        return np.log((1 + jobs) / (1 + self.document_frequency)).astype(np.float32) + 1
+
+    def _resume_mask(self, resume: str) -> np.ndarray:
+        terms, _ = self._term_vector(resume, grow=False)
+        mask = np.zeros(len(self.document_frequency), dtype=np.float32)
+        mask[terms] = 1
+        return mask
+
+    def score_all(self, resume: str) -> dict:
+        """{job_id: score 0-100} for every indexed job in one vectorized pass"""
+        with self.lock:
+            if not self.rows:
+                return {}
+            if self.matrix is None:
+                self._build_matrix()
+            weights = self.matrix.multiply(self._idf()).tocsr()
+            totals = np.asarray(weights.sum(axis=1)).ravel()
+            covered = weights @ self._resume_mask(resume)
+            scores = np.divide(covered, totals, out=np.zeros_like(covered), where=totals > 0)
+            return dict(zip(self.matrix_ids.tolist(), np.rint(scores * 100).astype(int).tolist()))
+
+    def score(self, job_id: int, resume: str):
+        """Score of one indexed job (None if the job is not indexed)"""
+        with self.lock:
+            row = self.rows.get(job_id)
+            if row is None:
+                return None
+            terms, counts = row
+            weights = counts * self._idf()[terms]
+            total = weights.sum()
+            if not total:
+                return 0
+            covered = (weights * self._resume_mask(resume)[terms]).sum()
+            return int(round(covered / total * 100))
+
+    def __len__(self):
+        return len(self.rows)
+
+
+scoring_index = ScoringIndex()
+
+
+def read_resume():
+    """Resume text, None if the file is missing or too short to score against"""
+    try:
+        with open(RESUME_PATH, "r") as f:
+            resume = f.read()
+    except FileNotFoundError:
+        return None
+    return resume if len(set(tokenize(resume))) >= MIN_RESUME_TERMS else None
+
+
+def load_index():
+    """Index all stored job descriptions and refresh scores (the resume may have changed)"""
+    db = SessionLocal()
+    try:
+        rows = db.query(Job.id, Job.job_description).filter(Job.job_description.isnot(None)).all()
+    finally:
+        db.close()
+    for row in rows:
+        scoring_index.add(row.id, row.job_description)
+    logger.info(f"Scoring index | {len(scoring_index)} jobs indexed, {len(scoring_index.vocabulary)} terms")
+    rescore_all()
+
+
+def rescore_all() -> int:
+    """Recompute local_match_score for every job; returns number of changed rows"""
+    resume = read_resume()
+    scores = scoring_index.score_all(resume) if resume else dict.fromkeys(scoring_index.rows)
+    db = SessionLocal()
+    try:
+        current = dict(db.query(Job.id, Job.local_match_score).filter(Job.job_description.isnot(None)).all())
+        changed = {}  # score -> job ids
+        for job_id, score in scores.items():
+            if job_id in current and current[job_id] != score:
+                changed.setdefault(score, []).append(job_id)
+        # One UPDATE per score (at most 102) through query(Job).update(): unlike bulk_update_mappings it
+        # goes through the session events that stamp the change sequence (sync.py) and clear the analytics cache
+        for score, job_ids in changed.items():
+            for start in range(0, len(job_ids), RESCORE_BATCH_SIZE):
+                db.query(Job).filter(Job.id.in_(job_ids[start:start + RESCORE_BATCH_SIZE])).update(
+                    {"local_match_score": score}, synchronize_session=False
+                )
+        db.commit()
+        return sum(len(job_ids) for job_ids in changed.values())
+    finally:
+        db.close()
+
+
+def score_job(job: Job):
+    """Index a new/edited job (before commit, id must be assigned) and set local_match_score"""
+    if not job.job_description:
+        scoring_index.remove(job.id)
+        job.local_match_score = None
+        return
+    scoring_index.add(job.id, job.job_description)
+    resume = read_resume()
+    job.local_match_score = scoring_index.score(job.id, resume) if resume else None
@@ -0,0 +1,75 @@
+"""
+Streaming quantile sketch for LLM latencies.
+
+DDSketch-style: a value x is counted in bucket ceil(log_gamma(x)), so every
+quantile is returned with at most RELATIVE_ACCURACY relative error. Sketches
+of any number of rollup rows merge by adding bucket counts, so percentiles
+over a date range never need the raw log rows.
+"""
+import math
+from array import array
+
+
+RELATIVE_ACCURACY = 0.01
+_GAMMA = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+_LOG_GAMMA = math.log(_GAMMA)
+MIN_VALUE = 1e-4  # Seconds; smaller values are counted as zero
+
+
+class QuantileSketch:
+    """Bucket counts keyed by log-scaled index"""
+
+    def __init__(self):
+        self.buckets = {}
+        self.zero_count = 0
+        self.count = 0
+
+    def add(self, value: float):
+        if value is None:
+            return
+        self.count += 1
+        if value < MIN_VALUE:
+            self.zero_count += 1
+            return
+        index = math.ceil(math.log(value) / _LOG_GAMMA)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+
+    def merge(self, other: "QuantileSketch"):
+        self.count += other.count
+        self.zero_count += other.zero_count
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+
+    def quantile(self, q: float):
+        """Value at quantile q (0..1), None for an empty sketch"""
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return 0.0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if rank < seen:
+                return 2 * _GAMMA ** index / (_GAMMA + 1)
+        return 2 * _GAMMA ** max(self.buckets) / (_GAMMA + 1)
+
+    def to_bytes(self) -> bytes:
+        """Flat int32 array: zero_count, then (index, count) pairs"""
+        values = array("i", [self.zero_count])
+        for index, count in self.buckets.items():
+            values.extend((index, count))
+        return values.tobytes()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "QuantileSketch":
+        sketch = cls()
+        if not data:
+            return sketch
+        values = array("i", data)
+        sketch.zero_count = values[0]
+        sketch.count = values[0]
+        for i in range(1, len(values), 2):
+            sketch.buckets[values[i]] = values[i + 1]
+            sketch.count += values[i + 1]
+        return sketch
@@ -1,5 +1,5 @@
 // Global state for filtering and sorting
-let allJobs = []; // Full list of jobs
+let allJobs = []; // Jobs of the loaded pages: filtered and sorted by the server
 let activeFilters = {
     status: [],
     visa: [],
@@ -17,6 +17,7 @@ function loadFiltersFromStorage() {
         try {
             const parsed = JSON.parse(saved);
             activeFilters = parsed.filters || activeFilters;
+            activeFilters.match = activeFilters.match.slice(0, 1);  // One threshold (several were allowed before)
             sortConfig = parsed.sort || sortConfig;
             applyFilterUIState();
             applySortUIState();
@@ -84,147 +85,356 @@ function hideLoading(button) {
     button.textContent = button.dataset.originalText;
 }
 
-// Load all jobs
-async function loadJobs() {
+// Jobs are loaded page by page with the active filters and sort applied by the server (keyset pages,
+// "Load more" fetches the next one); analysis texts are fetched only when a tooltip is shown
+const JOBS_PAGE_SIZE = 100;
+
+// Table header -> sort field of GET /api/jobs; without a header sort the list is newest first
+const SORT_FIELDS = {
+    title: 'title',
+    company: 'company',
+    visa: 'has_visa_sponsorship',
+    match: 'resume_match_percentage',
+    status: 'status',
+    applied_date: 'applied_date',
+    response_date: 'response_date',
+    days: 'days_to_response'
+};
+
+// Filter and sort parameters shared by GET /api/jobs and GET /api/jobs/search
+function listParams() {
+    const params = new URLSearchParams();
+    activeFilters.status.forEach(status => params.append('status', status));
+    activeFilters.visa.forEach(visa => params.append('visa', visa));
+    const match = activeFilters.match[0];
+    if (match === '0') {
+        params.set('max_match', 39);
+    } else if (match) {
+        params.set('min_match', match);
+    }
+    return params;
+}
+
+function jobsUrl(cursor) {
+    const params = listParams();
+    if (sortConfig.field) {
+        params.set('sort', SORT_FIELDS[sortConfig.field]);
+        params.set('order', sortConfig.direction);
+    }
+    params.set('limit', JOBS_PAGE_SIZE);
+    if (cursor) params.set('cursor', cursor);
+    return `/api/jobs?${params}`;
+}
+
+// Pages of the last load by URL: requested with If-None-Match, a 304 reuses the page
+const jobsPageCache = new Map();
+
+async function fetchJobsPage(cursor) {
+    const url = jobsUrl(cursor);
+    const cached = jobsPageCache.get(url);
+    const response = await fetch(url, {
+        cache: 'no-store',
+        headers: cached ? { 'If-None-Match': cached.etag } : {}
+    });
+    if (response.status === 304) return { ...cached, changed: false };
+    if (!response.ok) throw new Error(`GET /api/jobs: ${response.status}`);
+    const page = {
+        etag: response.headers.get('ETag'),
+        jobs: await response.json(),
+        cursor: response.headers.get('X-Next-Cursor'),
+        changeCursor: Number(response.headers.get('X-Change-Cursor'))
+    };
+    jobsPageCache.set(url, page);
+    return { ...page, changed: true };
+}
+
+// Loaded view: the first pagesLoaded pages; nextCursor is null when the last page is loaded
+let pagesLoaded = 1;
+let nextCursor = null;
+let changeCursor = null;
+let loadedView = null;  // URL of the first page: pages from the cache may belong to another filter or sort
+
+// (Re)load the view: on page open, after a filter or sort change (pages = 1) and when the server
+// cannot send the changes since changeCursor
+async function loadJobs(pages = pagesLoaded) {
+    const view = jobsUrl(null);
     try {
-        const response = await fetch('/api/jobs');
-        allJobs = await response.json();
-        applyFiltersAndSort();
+        let jobs = [];
+        let cursor = null;
+        let changed = false;
+        let listChangeCursor = null;
+        let count = 0;
+        do {
+            const page = await fetchJobsPage(cursor);
+            // First page: changes after it are fetched by syncJobs (later pages may already contain some)
+            if (listChangeCursor === null) listChangeCursor = page.changeCursor;
+            changed = changed || page.changed;
+            jobs = jobs.concat(page.jobs);
+            cursor = page.cursor;
+            count += 1;
+        } while (cursor && count < pages);
+        if (view !== jobsUrl(null)) return;  // Filters changed meanwhile: the newer load shows them
+        
+        pagesLoaded = count;
+        nextCursor = cursor;
+        changeCursor = listChangeCursor;
+        if (changed || loadedView !== view || allJobs.length !== jobs.length) {
+            loadedView = view;
+            allJobs = jobs;
+            showJobs();
+        }
+        watchPendingAnalyses();
     } catch (error) {
         console.error('Error loading jobs:', error);
         showToast('❌ Error loading jobs', 'error');
     }
 }
 
-// Apply filters and sorting
-function applyFiltersAndSort() {
-    let filtered = filterJobs(allJobs);
-    let sorted = sortJobs(filtered);
-    renderJobs(sorted);
-    updateJobCount(filtered.length, allJobs.length);
+// Filters or sort changed: back to the first page (search results are fetched again with the new filters)
+function reloadJobs() {
+    const query = document.getElementById('searchInput').value;
+    if (query.trim()) runSearch(query);
+    return loadJobs(1);
 }
 
-// Update jobs counter
-function updateJobCount(filtered, total) {
-    const countEl = document.getElementById('jobCount');
-    if (filtered === total) {
-        countEl.textContent = total;
-    } else {
-        countEl.textContent = `${filtered} / ${total}`;
+async function loadMoreJobs(button) {
+    if (!nextCursor) return;
+    const view = loadedView;
+    showLoading(button);
+    try {
+        const page = await fetchJobsPage(nextCursor);
+        if (view !== loadedView) return;
+        const loaded = new Set(allJobs.map(job => job.id));
+        allJobs = allJobs.concat(page.jobs.filter(job => !loaded.has(job.id)));
+        nextCursor = page.cursor;
+        pagesLoaded += 1;
+        showJobs();
+        watchPendingAnalyses();
+    } catch (error) {
+        console.error('Error loading jobs:', error);
+        showToast('❌ Error loading jobs', 'error');
+    } finally {
+        hideLoading(button);
     }
 }
 
-// Filter jobs based on active filters
-function filterJobs(jobs) {
-    console.log('Filtering', jobs.length, 'jobs with filters:', activeFilters);
-    
-    const filtered = jobs.filter(job => {
-        // Filter by status
-        if (activeFilters.status.length > 0) {
-            if (!activeFilters.status.includes(job.status)) {
-                console.log(`Job "${job.title}" filtered out by status: ${job.status} not in`, activeFilters.status);
-                return false;
-            }
-        }
+// Delta sync after an edit: only jobs changed since changeCursor are downloaded and re-rendered.
+// Calls are chained, so two syncs never apply the same changes twice
+let syncQueue = Promise.resolve();
+
+function syncJobs() {
+    syncQueue = syncQueue.then(applyServerChanges);
+    return syncQueue;
+}
+
+async function applyServerChanges() {
+    if (changeCursor === null) return loadJobs();
+    try {
+        const response = await fetch(`/api/jobs/changes?since=${changeCursor}`);
+        const changes = await response.json();
+        if (!response.ok || changes.reset) return loadJobs();
         
-        // Filter by visa
-        if (activeFilters.visa.length > 0) {
-            const visaValue = String(job.has_visa_sponsorship);
-            if (!activeFilters.visa.includes(visaValue)) {
-                console.log(`Job "${job.title}" filtered out by visa: ${visaValue} not in`, activeFilters.visa);
-                return false;
-            }
+        // Deletions first: a new job may reuse the id of a deleted one.
+        // Changed jobs stay or join only if they pass the filters and sort within the loaded pages
+        const deleted = new Set(changes.deleted);
+        const changed = new Map(changes.jobs.map(job => [job.id, job]));
+        allJobs = allJobs.filter(job => !deleted.has(job.id) && !changed.has(job.id));
+        const last = allJobs[allJobs.length - 1];
+        const joining = changes.jobs.filter(job =>
+            matchesFilters(job) && (!nextCursor || (last && compareJobs(job, last) < 0)));
+        allJobs = allJobs.concat(joining).sort(compareJobs);
+        if (searchResults) {
+            searchResults.forEach((result, id) => {
+                if (deleted.has(id)) searchResults.delete(id);
+                else if (changed.has(id)) searchResults.set(id, { ...changed.get(id), snippet: result.snippet });
+            });
         }
+        [...deleted, ...changed.keys()].forEach(id => analysisTexts.delete(id));
+        changeCursor = changes.cursor;
         
-        // Filter by match percentage
-        if (activeFilters.match.length > 0) {
-            const matchPct = job.resume_match_percentage || 0;
-            let matchesFilter = false;
-            
-            for (const threshold of activeFilters.match) {
-                const thresholdNum = parseInt(threshold);
-                if (thresholdNum === 0) {
-                    // <40%
-                    if (matchPct < 40) matchesFilter = true;
-                } else if (matchPct >= thresholdNum) {
-                    matchesFilter = true;
-                }
-            }
-            
-            if (!matchesFilter) {
-                console.log(`Job "${job.title}" filtered out by match: ${matchPct}% doesn't match thresholds`, activeFilters.match);
-                return false;
-            }
+        if (changed.size > 0 || deleted.size > 0) {
+            showJobs(new Set(changed.keys()));
         }
-        
-        return true;
-    });
-    
-    console.log('Filtered result:', filtered.length, 'jobs remaining');
-    return filtered;
+        watchPendingAnalyses();
+    } catch (error) {
+        console.error('Error syncing jobs:', error);
+        showToast('❌ Error loading jobs', 'error');
+    }
+}
+
+// Analysis texts (sponsorship_analysis, match_analysis) by job id: the list rows leave them out,
+// the job is fetched the first time one of its tooltips is shown
+const analysisTexts = new Map();
+
+async function showAnalysisText(tooltip) {
+    const jobId = Number(tooltip.dataset.jobId);
+    if (!analysisTexts.has(jobId)) {
+        analysisTexts.set(jobId, fetch(`/api/jobs/${jobId}`).then(response => {
+            if (!response.ok) throw new Error(`GET /api/jobs/${jobId}: ${response.status}`);
+            return response.json();
+        }));
+    }
+    try {
+        const job = await analysisTexts.get(jobId);
+        tooltip.innerHTML = escapeHtmlKeepNewlines(job[tooltip.dataset.field] || tooltip.dataset.fallback);
+        delete tooltip.dataset.field;
+    } catch (error) {
+        console.error('Error loading analysis:', error);
+        analysisTexts.delete(jobId);
+        tooltip.textContent = tooltip.dataset.fallback;
+    }
+}
+
+// Poll background analysis status until all pending jobs are done
+let analysisPollTimer = null;
+
+function isAnalyzing(job) {
+    return job.analysis_status === 'pending' || job.analysis_status === 'running';
+}
+
+// Submitted to the Batch API: results arrive within hours, not polled here
+function isBatched(job) {
+    return job.analysis_status === 'batched';
 }
 
-// Sort jobs based on sort config
-function sortJobs(jobs) {
-    if (!sortConfig.field) return jobs;
+function watchPendingAnalyses() {
+    if (analysisPollTimer || !allJobs.some(isAnalyzing)) return;
+    analysisPollTimer = setInterval(pollAnalysisStatus, 2000);
+}
+
+async function pollAnalysisStatus() {
+    const pendingIds = allJobs.filter(isAnalyzing).map(job => job.id);
+    if (pendingIds.length === 0) {
+        clearInterval(analysisPollTimer);
+        analysisPollTimer = null;
+        return;
+    }
     
-    const sorted = [...jobs].sort((a, b) => {
-        let aVal, bVal;
+    try {
+        const response = await fetch(`/api/jobs/analysis-status?ids=${pendingIds.join(',')}`);
+        const statuses = await response.json();
+        const finished = statuses.filter(s => s.analysis_status !== 'pending' && s.analysis_status !== 'running');
         
-        switch (sortConfig.field) {
-            case 'title':
-            case 'company':
-                aVal = (a[sortConfig.field] || '').toLowerCase();
-                bVal = (b[sortConfig.field] || '').toLowerCase();
-                break;
-            
-            case 'visa':
-                // Yes > N/A > No
-                const visaOrder = { 'true': 3, 'null': 2, 'false': 1 };
-                aVal = visaOrder[String(a.has_visa_sponsorship)] || 0;
-                bVal = visaOrder[String(b.has_visa_sponsorship)] || 0;
-                break;
-            
-            case 'match':
-                aVal = a.resume_match_percentage || 0;
-                bVal = b.resume_match_percentage || 0;
-                break;
-            
-            case 'status':
-                // New → Applied → Interview → Offer/Rejected
-                const statusOrder = { 'new': 1, 'applied': 2, 'interview': 3, 'offer': 4, 'rejected': 5 };
-                aVal = statusOrder[a.status] || 0;
-                bVal = statusOrder[b.status] || 0;
-                break;
-            
-            case 'applied_date':
-            case 'response_date':
-                aVal = a[sortConfig.field] ? new Date(a[sortConfig.field]).getTime() : 0;
-                bVal = b[sortConfig.field] ? new Date(b[sortConfig.field]).getTime() : 0;
-                break;
-            
-            case 'days':
-                aVal = a.days_to_response || 0;
-                bVal = b.days_to_response || 0;
-                break;
-            
-            default:
-                return 0;
+        if (finished.length > 0 || statuses.length < pendingIds.length) {
+            clearInterval(analysisPollTimer);
+            analysisPollTimer = null;
+            if (finished.some(s => s.analysis_status === 'failed')) {
+                showToast('⚠️ Some job analyses failed', 'error');
+            }
+            syncJobs();
         }
-        
-        if (aVal < bVal) return sortConfig.direction === 'asc' ? -1 : 1;
-        if (aVal > bVal) return sortConfig.direction === 'asc' ? 1 : -1;
-        return 0;
-    });
-    
-    return sorted;
+    } catch (error) {
+        console.error('Error polling analysis status:', error);
+    }
+}
+
+// Server-side full-text search with the active filters: Map of job id -> job with snippet,
+// in rank order (null when no query)
+let searchResults = null;
+let searchTimer = null;
+
+document.getElementById('searchInput').addEventListener('input', (e) => {
+    clearTimeout(searchTimer);
+    searchTimer = setTimeout(() => runSearch(e.target.value), 250);
+});
+
+async function runSearch(query) {
+    if (!query.trim()) {
+        searchResults = null;
+        showJobs();
+        return;
+    }
+    try {
+        const params = listParams();
+        params.set('q', query);
+        params.set('limit', 200);
+        const response = await fetch(`/api/jobs/search?${params}`);
+        const results = response.ok ? await response.json() : [];
+        searchResults = new Map(results.map(result => [result.id, result]));
+        showJobs();
+    } catch (error) {
+        console.error('Error searching jobs:', error);
+        showToast('❌ Search failed', 'error');
+    }
+}
+
+// Snippet text is escaped; only the <mark> tags added by the server are kept
+function highlightSnippet(snippet) {
+    return escapeHtml(snippet)
+        .replaceAll('&lt;mark&gt;', '<mark>')
+        .replaceAll('&lt;/mark&gt;', '</mark>');
+}
+
+// Show the loaded jobs, or the search results (best matches first unless a column sort is selected);
+// changedIds (delta sync): only these rows are rendered again
+function showJobs(changedIds = null) {
+    let jobs = allJobs;
+    if (searchResults) {
+        jobs = [...searchResults.values()];
+        if (sortConfig.field) jobs.sort(compareJobs);
+    }
+    if (changedIds) {
+        patchJobRows(jobs, changedIds);
+    } else {
+        renderJobs(jobs);
+    }
+    updateJobCount(jobs.length);
+}
+
+// Update jobs counter: "+" while more pages can be loaded
+function updateJobCount(shown) {
+    const more = !searchResults && nextCursor;
+    document.getElementById('jobCount').textContent = shown + (more ? '+' : '');
+    document.getElementById('loadMoreButton').style.display = more ? '' : 'none';
+}
+
+// Same filters as the server applies (listParams): decides whether a changed job belongs to the view
+function matchesFilters(job) {
+    if (activeFilters.status.length > 0 && !activeFilters.status.includes(job.status)) return false;
+    if (activeFilters.visa.length > 0 && !activeFilters.visa.includes(String(job.has_visa_sponsorship))) return false;
+    const match = activeFilters.match[0];
+    if (match) {
+        const matchPct = job.resume_match_percentage;
+        if (matchPct === null) return false;
+        if (match === '0' ? matchPct >= 40 : matchPct < parseInt(match)) return false;
+    }
+    return true;
+}
+
+// Sort value as the server computes it (SORT_COLUMNS in app/main.py)
+const STATUS_ORDER = { 'new': 1, 'applied': 2, 'interview': 3, 'offer': 4, 'rejected': 5 };
+
+function sortValue(job, field) {
+    switch (field) {
+        case 'status':
+            return STATUS_ORDER[job.status] ?? null;
+        case 'has_visa_sponsorship':
+            // No < N/A < Yes
+            return job.has_visa_sponsorship === false ? 1 : job.has_visa_sponsorship === true ? 3 : 2;
+        default:
+            return job[field] ?? null;
+    }
+}
+
+// Order of GET /api/jobs: sort field (nulls first ascending, last descending), then id
+function compareJobs(a, b) {
+    const field = sortConfig.field ? SORT_FIELDS[sortConfig.field] : 'created_at';
+    const descending = sortConfig.field ? sortConfig.direction === 'desc' : true;
+    const aVal = sortValue(a, field);
+    const bVal = sortValue(b, field);
+    let result;
+    if (aVal === bVal) result = a.id - b.id;
+    else if (aVal === null) result = -1;
+    else if (bVal === null) result = 1;
+    else result = aVal < bVal ? -1 : 1;
+    return descending ? -result : result;
 }
 
 // Render jobs in table
 function renderJobs(jobs) {
     const tbody = document.getElementById('jobsTableBody');
     
-    console.log('Rendering jobs:', jobs.length, 'filtered from', allJobs.length, 'total');
+    console.log('Rendering jobs:', jobs.length, 'of', allJobs.length, 'loaded');
     console.log('Active filters:', activeFilters);
     console.log('Sort config:', sortConfig);
     
@@ -242,47 +452,102 @@ function renderJobs(jobs) {
         return;
     }
     
-    tbody.innerHTML = jobs.map(job => {
-        console.log('Rendering job:', job.title, 'URL:', job.job_url);
-        return `
-        <tr>
-            <td>
-                ${job.job_url 
-                    ? `<a href="${escapeHtml(job.job_url)}" target="_blank" rel="noopener noreferrer" class="job-link"><strong>${escapeHtml(job.title)}</strong></a>`
-                    : `<strong>${escapeHtml(job.title)}</strong>`}
-            </td>
-            <td>${escapeHtml(job.company)}</td>
-            <td>
-                ${job.has_visa_sponsorship === true 
-                    ? '<div class="tooltip-wrapper"><span class="badge badge-yes">✓ Yes</span><span class="tooltip-text">' + escapeHtmlKeepNewlines(job.sponsorship_analysis || 'Visa sponsorship available') + '</span></div>'
-                    : job.has_visa_sponsorship === false 
-                    ? '<div class="tooltip-wrapper"><span class="badge badge-no">✗ No</span><span class="tooltip-text">' + escapeHtmlKeepNewlines(job.sponsorship_analysis || 'No visa sponsorship') + '</span></div>'
-                    : '<div class="tooltip-wrapper"><span class="badge badge-na">N/A</span><span class="tooltip-text">' + escapeHtmlKeepNewlines(job.sponsorship_analysis || 'No information about visa sponsorship in job description') + '</span></div>'}
-            </td>
-            <td>
-                ${job.resume_match_percentage !== null
-                    ? '<div class="tooltip-wrapper"><span class="match-badge match-' + getMatchClass(job.resume_match_percentage) + '">' + job.resume_match_percentage + '%</span><span class="tooltip-text">' + escapeHtmlKeepNewlines(job.match_analysis || 'Resume match analysis') + '</span></div>'
-                    : '<span class="badge badge-na">N/A</span>'}
-            </td>
-            <td>
-                <select onchange="updateStatus(${job.id}, this.value)" class="status-${job.status}">
-                    <option value="new" ${job.status === 'new' ? 'selected' : ''}>New</option>
-                    <option value="applied" ${job.status === 'applied' ? 'selected' : ''}>Applied</option>
-                    <option value="interview" ${job.status === 'interview' ? 'selected' : ''}>Interview</option>
-                    <option value="offer" ${job.status === 'offer' ? 'selected' : ''}>Offer</option>
-                    <option value="rejected" ${job.status === 'rejected' ? 'selected' : ''}>Rejected</option>
-                </select>
-            </td>
-            <td>${job.applied_date ? formatDate(job.applied_date) : '-'}</td>
-            <td>${job.response_date ? formatDate(job.response_date) : '-'}</td>
-            <td>${job.days_to_response !== null ? job.days_to_response + ' days' : '-'}</td>
-            <td>
-                <button onclick="generateCoverLetter(${job.id}, this)" class="btn-generate">Cover Letter</button>
-                <button onclick="deleteJob(${job.id})" class="btn-delete">Delete</button>
-            </td>
-        </tr>
-    `;
-    }).join('');
+    tbody.innerHTML = jobs.map(renderJobRow).join('');
+}
+
+// Bring the table in line with jobs: rows of changedIds and new jobs are rendered, the others are kept
+// (moved only if their position changed) and rows of jobs no longer shown are removed
+function patchJobRows(jobs, changedIds) {
+    const tbody = document.getElementById('jobsTableBody');
+    const rows = new Map([...tbody.querySelectorAll('tr[data-job-id]')].map(row => [Number(row.dataset.jobId), row]));
+    if (jobs.length === 0 || rows.size === 0) {
+        renderJobs(jobs);  // Empty state message involved
+        return;
+    }
+    
+    const shown = new Set(jobs.map(job => job.id));
+    rows.forEach((row, id) => { if (!shown.has(id)) row.remove(); });
+    
+    const template = document.createElement('tbody');
+    let previous = null;
+    jobs.forEach(job => {
+        let row = rows.get(job.id);
+        if (!row || changedIds.has(job.id)) {
+            template.innerHTML = renderJobRow(job);
+            const fresh = template.firstElementChild;
+            if (row) row.replaceWith(fresh);
+            row = fresh;
+        }
+        const expected = previous ? previous.nextElementSibling : tbody.firstElementChild;
+        if (row !== expected) tbody.insertBefore(row, expected);
+        previous = row;
+    });
+}
+
+// Tooltip of an analysis text: filled by showAnalysisText when first shown, fallback when the job has none
+function analysisTooltip(job, field, fallback) {
+    if (job.analysis_status === 'skipped' || job.analysis_status === 'failed') {
+        return `<span class="tooltip-text">${escapeHtml(fallback)}</span>`;
+    }
+    return `<span class="tooltip-text" data-job-id="${job.id}" data-field="${field}" data-fallback="${fallback}">Loading…</span>`;
+}
+
+function renderJobRow(job) {
+    const title = job.title || (isAnalyzing(job) || isBatched(job) ? 'Analyzing…' : 'Unknown Position');
+    return `
+    <tr data-job-id="${job.id}">
+        <td>
+            ${job.job_url 
+                ? `<a href="${escapeHtml(job.job_url)}" target="_blank" rel="noopener noreferrer" class="job-link"><strong>${escapeHtml(title)}</strong></a>`
+                : `<strong>${escapeHtml(title)}</strong>`}
+            ${job.snippet
+                ? `<div class="search-snippet">${highlightSnippet(job.snippet)}</div>`
+                : ''}
+        </td>
+        <td>${escapeHtml(job.company)}</td>
+        <td>
+            ${isAnalyzing(job)
+                ? '<span class="badge badge-pending">⏳ Analyzing</span>'
+                : isBatched(job)
+                ? '<div class="tooltip-wrapper"><span class="badge badge-pending">🌙 Batched</span><span class="tooltip-text">Analysis submitted to the Batch API, results within 24 hours</span></div>'
+                : job.has_visa_sponsorship === true 
+                ? '<div class="tooltip-wrapper"><span class="badge badge-yes">✓ Yes</span>' + analysisTooltip(job, 'sponsorship_analysis', 'Visa sponsorship available') + '</div>'
+                : job.has_visa_sponsorship === false 
+                ? '<div class="tooltip-wrapper"><span class="badge badge-no">✗ No</span>' + analysisTooltip(job, 'sponsorship_analysis', 'No visa sponsorship') + '</div>'
+                : '<div class="tooltip-wrapper"><span class="badge badge-na">N/A</span>' + analysisTooltip(job, 'sponsorship_analysis', 'No information about visa sponsorship in job description') + '</div>'}
+        </td>
+        <td>
+            ${isAnalyzing(job)
+                ? '<span class="badge badge-pending">⏳</span>'
+                : isBatched(job)
+                ? '<span class="badge badge-pending">🌙</span>'
+                : job.resume_match_percentage !== null
+                ? '<div class="tooltip-wrapper"><span class="match-badge match-' + getMatchClass(job.resume_match_percentage) + '">' + job.resume_match_percentage + '%</span>' + analysisTooltip(job, 'match_analysis', 'Resume match analysis') + '</div>'
+                : job.local_match_score !== null
+                ? '<div class="tooltip-wrapper"><span class="badge badge-na">~' + job.local_match_score + '%</span><span class="tooltip-text">Keyword match only' + (job.analysis_status === 'skipped' ? ': too low for AI analysis' : job.analysis_status === 'extracted' ? ': click Analyze for the AI analysis' : '') + '</span></div>'
+                : '<span class="badge badge-na">N/A</span>'}
+        </td>
+        <td>
+            <select onchange="updateStatus(${job.id}, this.value)" class="status-${job.status}">
+                <option value="new" ${job.status === 'new' ? 'selected' : ''}>New</option>
+                <option value="applied" ${job.status === 'applied' ? 'selected' : ''}>Applied</option>
+                <option value="interview" ${job.status === 'interview' ? 'selected' : ''}>Interview</option>
+                <option value="offer" ${job.status === 'offer' ? 'selected' : ''}>Offer</option>
+                <option value="rejected" ${job.status === 'rejected' ? 'selected' : ''}>Rejected</option>
+            </select>
+        </td>
+        <td>${job.applied_date ? formatDate(job.applied_date) : '-'}</td>
+        <td>${job.response_date ? formatDate(job.response_date) : '-'}</td>
+        <td>${job.days_to_response !== null ? job.days_to_response + ' days' : '-'}</td>
+        <td>
+            ${job.analysis_status === 'extracted' || job.analysis_status === 'skipped'
+                ? `<button onclick="requestAnalysis(${job.id}, this)" class="btn-analyze" title="Run the full AI match analysis">Analyze</button>`
+                : ''}
+            <button onclick="generateCoverLetter(${job.id}, this)" class="btn-generate">Cover Letter</button>
+            <button onclick="deleteJob(${job.id})" class="btn-delete">Delete</button>
+        </td>
+    </tr>
+`;
 }
 
 // Format date
@@ -348,9 +613,16 @@ document.getElementById('jobForm').addEventListener('submit', async (e) => {
         });
         
         if (response.ok) {
-            showToast('✅ Job added and analyzed!', 'success');
+            const created = await response.json();
+            if (created.duplicate_of_id) {
+                showToast('♻️ Looks like a job you already added - analysis copied', 'info');
+            } else if (created.analysis_status === 'skipped') {
+                showToast(`ℹ️ Job added. Keyword match ${created.local_match_score}% is low, AI analysis skipped`, 'info');
+            } else {
+                showToast(isAnalyzing(created) ? '✅ Job added, AI analysis is running...' : '✅ Job added!', 'success');
+            }
             e.target.reset();
-            loadJobs();
+            syncJobs();
         } else {
             const error = await response.json();
             showToast('❌ Error: ' + (error.detail || 'Unknown error'), 'error');
@@ -374,7 +646,7 @@ async function updateStatus(jobId, status) {
         
         if (response.ok) {
             showToast('✅ Status updated', 'success');
-            loadJobs();
+            syncJobs();
         } else {
             showToast('❌ Error updating status', 'error');
         }
@@ -384,6 +656,26 @@ async function updateStatus(jobId, status) {
     }
 }
 
+// Run the AI match analysis for a job that only has keyword score / extracted info
+async function requestAnalysis(jobId, button) {
+    showLoading(button);
+    try {
+        const response = await fetch(`/api/jobs/${jobId}/analyze`, {method: 'POST'});
+        if (response.ok) {
+            showToast('⏳ Analysis started', 'info');
+            syncJobs();
+        } else {
+            const error = await response.json();
+            showToast(`❌ ${error.detail || 'Error starting analysis'}`, 'error');
+            hideLoading(button);
+        }
+    } catch (error) {
+        console.error('Error starting analysis:', error);
+        showToast('❌ Error starting analysis', 'error');
+        hideLoading(button);
+    }
+}
+
 // Delete job
 async function deleteJob(jobId) {
     if (!confirm('Are you sure you want to delete this job?')) {
@@ -397,7 +689,7 @@ async function deleteJob(jobId) {
         
         if (response.ok) {
             showToast('✅ Job deleted', 'success');
-            loadJobs();
+            syncJobs();
         } else {
             showToast('❌ Error deleting job', 'error');
         }
@@ -414,23 +706,38 @@ function getMatchClass(percentage) {
     return 'low';
 }
 
-// Generate cover letter
-async function generateCoverLetter(jobId, button) {
+// Generate cover letter (force=true bypasses the server response cache).
+// Text is streamed via Server-Sent Events and rendered as it arrives.
+let coverLetterJobId = null;
+
+async function generateCoverLetter(jobId, button, force = false) {
     showLoading(button);
     try {
-        const response = await fetch(`/api/generate-cover-letter/${jobId}`, {
+        const response = await fetch(`/api/generate-cover-letter/${jobId}/stream?force=${force}`, {
             method: 'POST'
         });
         
-        if (response.ok) {
-            const job = await response.json();
-            showToast('✅ Cover letter generated!', 'success');
-            showCoverLetterModal(job.cover_letter);
-            loadJobs();
-        } else {
+        if (!response.ok) {
             const error = await response.json();
             showToast('❌ Error: ' + (error.detail || 'Unknown error'), 'error');
+            return;
         }
+        
+        coverLetterJobId = jobId;
+        showCoverLetterModal('');
+        const textArea = document.getElementById('coverLetterText');
+        
+        await readEventStream(response, (event, data) => {
+            if (event === 'error') {
+                showToast('❌ Error: ' + (data.detail || 'Unknown error'), 'error');
+            } else if (event === 'done') {
+                textArea.value = data.cover_letter;
+                showToast('✅ Cover letter generated!', 'success');
+            } else {
+                textArea.value += data.delta;
+                textArea.scrollTop = textArea.scrollHeight;
+            }
+        });
     } catch (error) {
         console.error('Error generating cover letter:', error);
         showToast('❌ Network error. Please try again.', 'error');
@@ -439,12 +746,46 @@ async function generateCoverLetter(jobId, button) {
     }
 }
 
+// Parse Server-Sent Events from a fetch response body: onEvent(eventName, parsedData)
+async function readEventStream(response, onEvent) {
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+            const frame = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+            
+            let event = 'message';
+            let data = '';
+            for (const line of frame.split('\n')) {
+                if (line.startsWith('event: ')) event = line.slice(7);
+                else if (line.startsWith('data: ')) data += line.slice(6);
+            }
+            if (data) onEvent(event, JSON.parse(data));
+        }
+    }
+}
+
 // Show cover letter modal window
 function showCoverLetterModal(coverLetter) {
     document.getElementById('coverLetterText').value = coverLetter;
     document.getElementById('coverLetterModal').style.display = 'block';
 }
 
+// Generate a fresh cover letter for the job shown in the modal
+function regenerateCoverLetter(button) {
+    if (coverLetterJobId !== null) {
+        generateCoverLetter(coverLetterJobId, button, true);
+    }
+}
+
 // Close modal window
 function closeCoverLetterModal() {
     document.getElementById('coverLetterModal').style.display = 'none';
@@ -476,6 +817,7 @@ document.addEventListener('mouseover', function(e) {
             tooltip.style.left = rect.left + (rect.width / 2) + 'px';
             tooltip.style.top = (rect.top - 10) + 'px';
             tooltip.style.transform = 'translate(-50%, -100%)';
+            if (tooltip.dataset.field) showAnalysisText(tooltip);
         }
     }
 });
@@ -488,7 +830,11 @@ document.addEventListener('click', function(e) {
         
         console.log('Chip clicked:', filterType, '=', value);
         
-        // Toggle chip active state
+        // Toggle chip active state; match thresholds are one choice (the server takes one range)
+        if (filterType === 'match' && !e.target.classList.contains('active')) {
+            document.querySelectorAll('.chip[data-filter="match"].active').forEach(chip => chip.classList.remove('active'));
+            activeFilters.match = [];
+        }
         e.target.classList.toggle('active');
         
         const isActive = e.target.classList.contains('active');
@@ -507,7 +853,7 @@ document.addEventListener('click', function(e) {
         
         // Save and apply
         saveFiltersToStorage();
-        applyFiltersAndSort();
+        reloadJobs();
     }
 });
 
@@ -533,9 +879,10 @@ document.addEventListener('click', function(e) {
         // Add sort class to clicked header
         th.classList.add(`sort-${sortConfig.direction}`);
         
-        // Save and apply
+        // Save and apply: the server sorts, search results are sorted here
         saveFiltersToStorage();
-        applyFiltersAndSort();
+        if (searchResults) showJobs();
+        loadJobs(1);
     }
 });
 
@@ -559,10 +906,12 @@ function resetFilters() {
     document.querySelectorAll('th.sortable').forEach(header => {
         header.classList.remove('sort-asc', 'sort-desc');
     });
+    document.getElementById('searchInput').value = '';
+    searchResults = null;
     
     // Save and apply
     saveFiltersToStorage();
-    applyFiltersAndSort();
+    loadJobs(1);
     showToast('✅ Filters reset', 'info');
 }
 
@@ -8,14 +8,23 @@ async function loadStats() {
         document.getElementById('totalCalls').textContent = data.total_calls;
         document.getElementById('successfulCalls').textContent = data.successful_calls;
         document.getElementById('totalTokens').textContent = data.total_tokens.toLocaleString();
+        document.getElementById('totalTokens').title = data.cached_tokens.toLocaleString() + ' input tokens from prompt cache';
         document.getElementById('estimatedCost').textContent = '$' + data.estimated_cost.toFixed(2);
 
+        // Response cache
+        document.getElementById('cacheHits').textContent = data.cache.hits;
+        document.getElementById('cacheMisses').textContent = data.cache.misses;
+        document.getElementById('cacheHitRate').textContent = Math.round(data.cache.hit_rate * 100) + '%';
+        document.getElementById('cacheEntries').textContent = data.cache.entries;
+
+        renderBatches(data.batches);
+
         // Breakdown by function
         const tbody = document.getElementById('functionStatsBody');
         tbody.innerHTML = '';
         
         if (data.by_function.length === 0) {
-            tbody.innerHTML = '<tr><td colspan="5" style="text-align: center; color: #999;">No data yet. Make some LLM calls first!</td></tr>';
+            tbody.innerHTML = '<tr><td colspan="6" style="text-align: center; color: #999;">No data yet. Make some LLM calls first!</td></tr>';
             return;
         }
 
@@ -24,8 +33,9 @@ async function loadStats() {
             row.innerHTML = `
                 <td><strong>${func.function_name}</strong></td>
                 <td>${func.call_count}</td>
-                <td>${func.tokens_used.toLocaleString()}</td>
+                <td title="${func.prompt_tokens.toLocaleString()} input (${func.cached_tokens.toLocaleString()} from prompt cache) / ${func.completion_tokens.toLocaleString()} output">${func.tokens_used.toLocaleString()}</td>
                 <td>${func.avg_execution_time}s</td>
+                <td>${formatSeconds(func.latency_p50)} / ${formatSeconds(func.latency_p90)} / ${formatSeconds(func.latency_p99)}</td>
                 <td>$${func.estimated_cost.toFixed(4)}</td>
             `;
             tbody.appendChild(row);
@@ -36,6 +46,92 @@ async function loadStats() {
     }
 }
 
+// Batch API analyses: progress of open batches, cost of finished ones
+function renderBatches(batches) {
+    document.getElementById('batchSummary').textContent = batches.recent.length === 0
+        ? 'No batches yet. Import with ?batch=true or POST /api/batches to analyze pending jobs at the Batch API price.'
+        : `${batches.open} open, ${batches.jobs_waiting} jobs waiting, $${batches.total_cost.toFixed(4)} total`;
+    const tbody = document.getElementById('batchBody');
+    tbody.innerHTML = '';
+    batches.recent.forEach(batch => {
+        const done = batch.completed_count + batch.failed_count;
+        const row = document.createElement('tr');
+        row.innerHTML = `
+            <td><strong>#${batch.id}</strong></td>
+            <td title="${(batch.error_message || '').replace(/"/g, '&quot;')}">${batch.status}${batch.error_message ? ' ⚠️' : ''}</td>
+            <td>${done} / ${batch.job_count}${batch.failed_count ? ` (${batch.failed_count} failed)` : ''}</td>
+            <td title="${batch.prompt_tokens.toLocaleString()} input (${batch.cached_tokens.toLocaleString()} from prompt cache) / ${batch.completion_tokens.toLocaleString()} output">${(batch.prompt_tokens + batch.completion_tokens).toLocaleString()}</td>
+            <td>$${batch.cost.toFixed(4)}</td>
+            <td>${batch.created_at ? new Date(batch.created_at + 'Z').toLocaleString() : '—'}</td>
+        `;
+        tbody.appendChild(row);
+    });
+}
+
+// Job search pipeline: aggregates computed by the server, no job list download
+async function loadAnalytics() {
+    try {
+        const response = await fetch('/api/analytics');
+        const data = await response.json();
+
+        document.getElementById('funnelCards').innerHTML = data.funnel.stages.map(stage => `
+            <div class="stat-card">
+                <div class="stat-value">${stage.count}</div>
+                <div class="stat-label">${stage.stage.charAt(0).toUpperCase() + stage.stage.slice(1)}${stage.conversion !== null ? ' (' + Math.round(stage.conversion * 100) + '%)' : ''}</div>
+            </div>
+        `).join('');
+
+        const maxWeek = Math.max(1, ...data.weekly.map(week => Math.max(week.saved, week.applied)));
+        document.getElementById('weeklyBody').innerHTML = data.weekly.slice().reverse().map(week => `
+            <tr>
+                <td title="Week of ${week.start}">${week.week}</td>
+                <td>${week.saved}</td>
+                <td>${week.applied}</td>
+                <td>${bar(week.applied, maxWeek)}</td>
+            </tr>
+        `).join('');
+
+        const times = data.response_times;
+        document.getElementById('responseSummary').textContent = times.count === 0
+            ? 'No responses yet (set when a job moves to offer or rejected).'
+            : `${times.count} responses, median ${times.median} days, 90% within ${times.p90} days` +
+              Object.entries(times.by_status).map(([status, dist]) => `, ${status}: median ${dist.median} days`).join('');
+        const maxBin = Math.max(1, ...times.histogram.map(bin => bin.count));
+        document.getElementById('responseBody').innerHTML = times.histogram.map(bin => `
+            <tr>
+                <td>${bin.days}</td>
+                <td>${bin.count}</td>
+                <td>${bar(bin.count, maxBin)}</td>
+            </tr>
+        `).join('');
+
+        document.getElementById('matchBody').innerHTML = data.match_outcomes.length === 0
+            ? '<tr><td colspan="7" style="text-align: center; color: #999;">No analyzed jobs yet</td></tr>'
+            : data.match_outcomes.map(bucket => `
+                <tr>
+                    <td>${bucket.match}%</td>
+                    <td>${bucket.jobs}</td>
+                    <td>${bucket.applied + bucket.interview + bucket.offer + bucket.rejected}</td>
+                    <td>${bucket.interview}</td>
+                    <td>${bucket.offer}</td>
+                    <td>${bucket.rejected}</td>
+                    <td>${bucket.interview_rate !== null ? Math.round(bucket.interview_rate * 100) + '%' : '—'}</td>
+                </tr>
+            `).join('');
+    } catch (error) {
+        console.error('Error loading analytics:', error);
+    }
+}
+
+function bar(value, max) {
+    return `<div style="background: #0066cc; height: 12px; border-radius: 3px; width: ${Math.round(value / max * 100)}%;"></div>`;
+}
+
+function formatSeconds(value) {
+    return value === null ? '—' : value.toFixed(2);
+}
+
 // Load on page open
 loadStats();
+loadAnalytics();
 
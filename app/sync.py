@@ -0,0 +1,93 @@
+"""
+Delta sync of the job list (GET /api/jobs/changes).
+
+Every transaction that writes jobs takes the next value of a single-row
+counter (ChangeSequence) and stamps it on the inserted and updated rows
+(Job.change_seq); a deleted job leaves a tombstone (JobDeletion) with that
+value. A client that has seen everything up to cursor N asks for the rows
+and tombstones above N instead of downloading the whole list.
+
+The counter row is written inside the job-writing transaction, so it keeps
+the database write lock until commit: values are committed in increasing
+order and a client never skips a change that commits after it synced.
+
+Stamped by session events, like the analytics cache, in processes that
+import this module: ORM writes through SessionLocal (flushed objects and
+query(Job).update()) are covered. Bulk methods (bulk_update_mappings,
+bulk_insert_mappings) and Core statements skip the events and are never
+seen by clients - write jobs with query(Job).update() instead (see
+scoring.rescore_all). query(Job).delete() leaves no tombstones - delete jobs
+with session.delete().
+"""
+from datetime import datetime, timedelta
+from itertools import chain
+
+from sqlalchemy import event, func, insert, update
+
+from app.config import SYNC_TOMBSTONE_DAYS, logger
+from app.database import SessionLocal
+from app.models import ChangeSequence, Job, JobDeletion
+
+SEQUENCE_ID = 1
+
+
+def _next_value(connection) -> int:
+    value = connection.execute(
+        update(ChangeSequence).where(ChangeSequence.id == SEQUENCE_ID)
+        .values(value=ChangeSequence.value + 1).returning(ChangeSequence.value)
+    ).scalar()
+    if value is None:  # First write to a new or upgraded database
+        value = 1
+        connection.execute(insert(ChangeSequence).values(id=SEQUENCE_ID, value=value, pruned_value=0))
+    return value
+
+
+@event.listens_for(SessionLocal, "before_flush")
+def _stamp_job_writes(session, flush_context, instances):
+    written = [obj for obj in chain(session.new, session.dirty)
+               if isinstance(obj, Job) and (obj in session.new or session.is_modified(obj))]
+    deleted = [obj for obj in session.deleted if isinstance(obj, Job)]
+    if not written and not deleted:
+        return
+    value = _next_value(session.connection())
+    for job in written:
+        job.change_seq = value
+    for job in deleted:
+        session.add(JobDeletion(job_id=job.id, change_seq=value))
+
+
+@event.listens_for(SessionLocal, "do_orm_execute")
+def _stamp_job_statements(orm_execute_state):
+    """query(Job).update() skips the flush: the value is added to the statement"""
+    mapper = orm_execute_state.bind_mapper
+    if orm_execute_state.is_update and mapper is not None and mapper.class_ is Job:
+        value = _next_value(orm_execute_state.session.connection())
+        orm_execute_state.statement = orm_execute_state.statement.values(change_seq=value)
+
+
+def sequence(db) -> tuple:
+    """(current value, pruned value): clients can sync from cursors between the two"""
+    row = db.query(ChangeSequence.value, ChangeSequence.pruned_value).filter(
+        ChangeSequence.id == SEQUENCE_ID
+    ).first()
+    return (row.value, row.pruned_value) if row else (0, 0)
+
+
+def prune_tombstones():
+    """Delete tombstones older than SYNC_TOMBSTONE_DAYS; clients last synced before them have to reload"""
+    db = SessionLocal()
+    try:
+        cutoff = datetime.utcnow() - timedelta(days=SYNC_TOMBSTONE_DAYS)
+        pruned = db.query(func.count(JobDeletion.id), func.max(JobDeletion.change_seq)).filter(
+            JobDeletion.deleted_at < cutoff
+        ).one()
+        if not pruned[0]:
+            return
+        db.query(JobDeletion).filter(JobDeletion.change_seq <= pruned[1]).delete(synchronize_session=False)
+        db.query(ChangeSequence).filter(ChangeSequence.id == SEQUENCE_ID).update(
+            {"pruned_value": pruned[1]}, synchronize_session=False
+        )
+        db.commit()
+        logger.info(f"Sync | pruned {pruned[0]} tombstones up to change {pruned[1]}")
+    finally:
+        db.close()
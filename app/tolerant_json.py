@@ -0,0 +1,166 @@
+"""
+Tolerant JSON parser for LLM responses.
+
+Parses in a single left-to-right pass and builds the Python objects
+directly, repairing the usual defects on the way instead of rewriting the
+text first:
+  - raw newlines / tabs / control characters inside strings
+  - output cut off at max_tokens (open strings, objects and arrays are closed,
+    a key without a value is dropped)
+  - markdown code fences or prose around the object
+  - trailing commas, missing commas, unescaped quotes inside strings
+"""
+import re
+
+
+_NUMBER = re.compile(r"-?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?")
+_STRING_CHUNK = re.compile(r'[^"\\]+')
+_WHITESPACE = re.compile(r"\s*")
+_BARE_WORD = re.compile(r"[^,}\]:\n]*")
+_LITERALS = {"true": True, "false": False, "null": None, "True": True, "False": False, "None": None}
+_UNICODE_ESCAPE = re.compile(r"[0-9a-fA-F]{4}")
+# \u escape cut off with the output: dropped, not decoded from the digits that made it
+_UNICODE_ESCAPE_CUT = re.compile(r"[0-9a-fA-F]{0,3}\Z")
+_ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+# Characters that may follow the closing quote of a string; any other quote is part of the text
+_AFTER_STRING = frozenset(",}]:")
+_MISSING = object()
+
+
+class _Parser:
+    def __init__(self, text: str):
+        self.text = text
+        self.pos = 0
+
+    def skip_whitespace(self):
+        self.pos = _WHITESPACE.match(self.text, self.pos).end()
+
+    def at_end(self) -> bool:
+        return self.pos >= len(self.text)
+
+    def value(self):
+        self.skip_whitespace()
+        if self.at_end():
+            return _MISSING
+        char = self.text[self.pos]
+        if char == "{":
+            return self.object()
+        if char == "[":
+            return self.array()
+        if char == '"':
+            return self.string()
+        match = _NUMBER.match(self.text, self.pos)
+        if match:
+            self.pos = match.end()
+            number = match.group()
+            return float(number) if "." in number or "e" in number.lower() else int(number)
+        return self.bare_word()
+
+    def bare_word(self):
+        """true/false/null, or unquoted text up to the next delimiter (kept as a string)"""
+        match = _BARE_WORD.match(self.text, self.pos)
+        self.pos = match.end()
+        word = match.group().strip()
+        if word in _LITERALS:
+            return _LITERALS[word]
+        if self.at_end() and any(literal.startswith(word) for literal in _LITERALS):
+            return _MISSING  # literal cut off by truncation
+        return word or _MISSING
+
+    def object(self) -> dict:
+        self.pos += 1
+        result = {}
+        while True:
+            self.skip_whitespace()
+            if self.at_end():
+                return result
+            char = self.text[self.pos]
+            if char == "}":
+                self.pos += 1
+                return result
+            if char == ",":
+                self.pos += 1
+                continue
+            key = self.string() if char == '"' else self.bare_word()
+            if key is _MISSING:
+                return result
+            self.skip_whitespace()
+            if not self.at_end() and self.text[self.pos] == ":":
+                self.pos += 1
+            value = self.value()
+            if value is _MISSING:
+                return result
+            result[str(key)] = value
+
+    def array(self) -> list:
+        self.pos += 1
+        result = []
+        while True:
+            self.skip_whitespace()
+            if self.at_end():
+                return result
+            char = self.text[self.pos]
+            if char == "]":
+                self.pos += 1
+                return result
+            if char == ",":
+                self.pos += 1
+                continue
+            value = self.value()
+            if value is _MISSING:
+                return result
+            result.append(value)
+
+    def string(self) -> str:
+        self.pos += 1
+        text = self.text
+        parts = []
+        while True:
+            match = _STRING_CHUNK.match(text, self.pos)
+            if match:
+                parts.append(match.group())
+                self.pos = match.end()
+            if self.at_end():
+                return "".join(parts)
+            if text[self.pos] == "\\":
+                self.pos += 1
+                if self.at_end():
+                    return "".join(parts)
+                char = text[self.pos]
+                if char == "u":
+                    code = _UNICODE_ESCAPE.match(text, self.pos + 1)
+                    if code:
+                        parts.append(chr(int(code.group(), 16)))
+                        self.pos = code.end()
+                    elif _UNICODE_ESCAPE_CUT.match(text, self.pos + 1):
+                        self.pos = len(text)
+                        return "".join(parts)
+                    else:
+                        parts.append(char)
+                        self.pos += 1
+                    continue
+                parts.append(_ESCAPES.get(char, char))
+                self.pos += 1
+                continue
+            # Closing quote only if followed by a delimiter (or a new line starting with a quote:
+            # missing comma), otherwise an unescaped quote in the text
+            self.pos += 1
+            after = _WHITESPACE.match(text, self.pos).end()
+            if after >= len(text) or text[after] in _AFTER_STRING or (
+                text[after] == '"' and "\n" in text[self.pos:after]
+            ):
+                return "".join(parts)
+            parts.append('"')
+
+
+def loads(text: str):
+    """Parse the first JSON object or array in text, repairing what can be repaired
+
+    Raises ValueError if there is no object or array to parse.
+    """
+    starts = [index for index in (text.find("{"), text.find("[")) if index >= 0]
+    if not starts:
+        raise ValueError("No JSON object found")
+    parser = _Parser(text)
+    parser.pos = min(starts)
+    return parser.value()
@@ -0,0 +1,156 @@
+"""
+Batch API analysis (app/batch.py) against the offline fake backend.
+
+Runs the app with LLM_BACKEND=fake, whose files / batches process the request
+file locally, through these scenarios:
+  - import:     bulk import with ?batch=true, every job is "batched" and after
+                polling "done" or "failed" (failed requests = fake error rate);
+                batch cost is BATCH_PRICE_RATIO of the list price
+  - upload:     the file upload fails, the jobs are pending again
+  - lost:       the provider no longer knows the batch, its jobs are pending again
+Each scenario checks job statuses and the AnalysisBatch row.
+
+Usage (from project root):
+    python benchmarks/batch_test.py
+"""
+import asyncio
+import json
+import os
+import sys
+import tempfile
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/batch_test.db"
+os.environ["LLM_BACKEND"] = "fake"
+os.environ["FAKE_LLM_LATENCY"] = "0.01"
+os.environ["FAKE_LLM_TOKENS_PER_SECOND"] = "100000"
+os.environ["FAKE_LLM_ERROR_RATE"] = "0.1"
+os.environ["BATCH_POLL_INTERVAL"] = "3600"  # Polled explicitly below
+
+import httpx
+
+from app import batch, llm, resilience
+from app.config import BATCH_PRICE_RATIO, OPENAI_MODEL
+from app.database import SessionLocal
+from app.llm_log import price
+from app.main import app
+from app.models import AnalysisBatch, Job
+
+resilience.OPENAI_MAX_RETRIES = 0
+
+JOB_COUNT = 60
+
+
+def job_statuses(batch_id: int) -> Counter:
+    db = SessionLocal()
+    try:
+        return Counter(row.analysis_status for row in db.query(Job.analysis_status).filter(Job.analysis_batch_id == batch_id))
+    finally:
+        db.close()
+
+
+def batch_row(batch_id: int) -> AnalysisBatch:
+    db = SessionLocal()
+    try:
+        return db.get(AnalysisBatch, batch_id)
+    finally:
+        db.close()
+
+
+async def wait_closed(batch_id: int):
+    for _ in range(100):
+        await batch.poll()
+        if batch_row(batch_id).status not in batch.OPEN_STATUSES:
+            return
+        await asyncio.sleep(0.1)
+
+
+async def import_jobs(client, count: int, offset: int = 0) -> list:
+    records = "\n".join(
+        json.dumps({"title": "", "company": "", "job_description": f"Python backend engineer {offset + index}, AWS, Django"})
+        for index in range(count)
+    )
+    response = await client.post("/api/jobs/bulk?batch=true", content=records,
+                                 headers={"Content-Type": "application/x-ndjson"})
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def report(name: str, passed: bool, details) -> bool:
+    print(f"{'PASS' if passed else 'FAIL'} | {name:8} | {details}")
+    return passed
+
+
+async def scenario_import(client) -> bool:
+    lines = await import_jobs(client, JOB_COUNT)
+    all_batched = {line["analysis_status"] for line in lines} == {"batched"}
+    batch_id = batch_row_id()
+    await wait_closed(batch_id)
+    row, statuses = batch_row(batch_id), job_statuses(batch_id)
+    expected_cost = price(OPENAI_MODEL, row.prompt_tokens, row.completion_tokens, None, row.cached_tokens) * BATCH_PRICE_RATIO
+    passed = (
+        all_batched and row.status == "applied"
+        and statuses["done"] == row.completed_count and statuses["failed"] == row.failed_count
+        and row.completed_count + row.failed_count == JOB_COUNT and row.completed_count > JOB_COUNT // 2
+        and abs(row.cost - expected_cost) < 1e-9 and row.cost > 0
+    )
+    return report("import", passed, f"{dict(statuses)} | ${row.cost:.4f}")
+
+
+async def scenario_upload(client) -> bool:
+    create = llm.client.files.create
+
+    async def failing_create(**kwargs):
+        raise resilience.LLMCallError("upload rejected")
+
+    llm.client.files.create = failing_create
+    try:
+        lines = await import_jobs(client, 5, offset=1000)
+    finally:
+        llm.client.files.create = create
+    row = batch_row(batch_row_id())
+    statuses = Counter(line["analysis_status"] for line in lines)
+    return report("upload", statuses == {"pending": 5} and row.status == "failed", f"{dict(statuses)} | {row.error_message}")
+
+
+async def scenario_lost(client) -> bool:
+    await import_jobs(client, 5, offset=2000)
+    batch_id = batch_row_id()
+    db = SessionLocal()
+    try:
+        db.query(AnalysisBatch).filter(AnalysisBatch.id == batch_id).update({"provider_batch_id": "batch_unknown"})
+        db.commit()
+    finally:
+        db.close()
+    await batch.poll()
+    row = batch_row(batch_id)
+    statuses = job_statuses(batch_id)
+    return report("lost", "batched" not in statuses and row.status == "failed", f"{dict(statuses)} | {row.error_message}")
+
+
+def batch_row_id() -> int:
+    db = SessionLocal()
+    try:
+        return db.query(AnalysisBatch.id).order_by(AnalysisBatch.id.desc()).first().id
+    finally:
+        db.close()
+
+
+async def main():
+    await app.router.startup()
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            results = [
+                await scenario_import(client),
+                await scenario_upload(client),
+                await scenario_lost(client),
+            ]
+    finally:
+        await app.router.shutdown()
+    print(f"\n{sum(results)}/{len(results)} scenarios passed")
+    return all(results)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if asyncio.run(main()) else 1)
@@ -0,0 +1,334 @@
+"""
+End-to-end throughput benchmark suite with the offline LLM backend (LLM_BACKEND=fake).
+
+For each database size a worker process seeds a fresh SQLite database
+(analyzed jobs with FTS index, one logged LLM call per job spread over a
+year) and starts the app in-process. Then it drives these scenarios at each
+concurrency level:
+  - list_jobs:     GET /api/jobs, first page as the frontend loads it
+  - stats:         GET /api/stats
+  - create_job:    POST /api/jobs with a new posting; analysis_per_s is the
+                   rate at which the background workers finish those analyses
+  - cover_letter:  POST /api/generate-cover-letter/{id}?force=true
+and reports throughput, latency percentiles and memory (process RSS). The
+fake LLM answers after --llm-latency seconds plus generation time, so LLM
+bound scenarios measure the app's overhead and pacing, not OpenAI.
+
+Results are saved as JSON (benchmarks/results/<timestamp>.json). With a
+baseline (--baseline, created with --save-baseline) every row is compared
+and the run fails (exit code 1) if throughput dropped or p95 latency grew by
+more than --tolerance.
+
+Usage (from project root):
+    python benchmarks/benchmark_suite.py --save-baseline
+    python benchmarks/benchmark_suite.py
+    python benchmarks/benchmark_suite.py --sizes 1000 --concurrency 1 8 --requests 100
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+DEFAULT_BASELINE = os.path.join(ROOT, "benchmarks", "baseline.json")
+SCENARIOS = ["list_jobs", "stats", "create_job", "cover_letter"]
+LLM_SCENARIOS = {"create_job", "cover_letter"}
+LIST_PARAMS = {"limit": 500, "include": "sponsorship_analysis,match_analysis"}  # Same as app.js
+
+SKILLS = ["python", "java", "kotlin", "golang", "rust", "react", "kubernetes", "terraform", "spark", "airflow"]
+FILLER = [f"word{i}" for i in range(5000)]
+STATUSES = ["new", "applied", "interview", "offer", "rejected"]
+FUNCTIONS = ["analyze_job_complete", "extract_job_info", "generate_cover_letter"]
+
+
+def percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def rss_mb() -> float:
+    """Current resident set size (Linux), peak RSS elsewhere"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except OSError:
+        return peak_rss_mb()
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 2 ** 10  # bytes on macOS, KiB on Linux
+
+
+# Worker: one database size, runs in its own process (fresh engine, clean memory numbers)
+
+def make_posting(rng: random.Random, words: int = 120) -> str:
+    return " ".join(rng.choice(SKILLS) if rng.random() < 0.05 else rng.choice(FILLER) for _ in range(words))
+
+
+def seed(size: int):
+    from app.database import SessionLocal, init_db
+    from app.llm_log import _write_batch
+    from app.models import Job
+
+    rng = random.Random(42)
+    init_db()
+    now = datetime.utcnow()
+    db = SessionLocal()
+    try:
+        for start in range(0, size, 5000):
+            db.bulk_insert_mappings(Job, [
+                {"title": f"{rng.choice(SKILLS).title()} Engineer", "company": f"Company {i % 1000}",
+                 "job_description": make_posting(rng), "status": rng.choice(STATUSES),
+                 "analysis_status": "done", "has_visa_sponsorship": rng.choice([True, False, None]),
+                 "resume_match_percentage": rng.randint(0, 100), "sponsorship_analysis": "Seeded",
+                 "match_analysis": "Seeded", "created_at": now - timedelta(minutes=i)}
+                for i in range(start, min(start + 5000, size))
+            ])
+            db.commit()
+    finally:
+        db.close()
+
+    for start in range(0, size, 5000):
+        _write_batch([
+            {"function_name": rng.choice(FUNCTIONS), "model": "gpt-4o", "status": "success",
+             "execution_time": rng.uniform(1, 8), "ttfb": rng.uniform(0.3, 2), "tokens_used": 2000,
+             "prompt_tokens": 1600, "completion_tokens": 400, "retry_count": 0, "cost": 0.008,
+             "error_message": None, "created_at": now - timedelta(days=rng.randint(0, 364))}
+            for _ in range(start, min(start + 5000, size))
+        ])
+
+
+async def drive(client, scenario: str, requests: int, concurrency: int, job_ids: list, rng: random.Random) -> dict:
+    """Send `requests` requests with `concurrency` in flight; latency per request in ms"""
+    from app.analysis_queue import queue_depth
+
+    pending = iter(range(requests))
+    latencies = []
+    errors = 0
+    created = []
+
+    async def send(index):
+        if scenario == "list_jobs":
+            return await client.get("/api/jobs", params=LIST_PARAMS)
+        if scenario == "stats":
+            return await client.get("/api/stats")
+        if scenario == "create_job":
+            return await client.post("/api/jobs", json={
+                "title": "", "company": "", "job_description": make_posting(rng) + f" posting{index}"
+            })
+        return await client.post(f"/api/generate-cover-letter/{rng.choice(job_ids)}?force=true")
+
+    async def worker():
+        nonlocal errors
+        for index in pending:
+            start = time.perf_counter()
+            response = await send(index)
+            latencies.append((time.perf_counter() - start) * 1000)
+            if response.status_code >= 400:
+                errors += 1
+            elif scenario == "create_job":
+                created.append(response.json()["id"])
+
+    rss_before = rss_mb()
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    result = {
+        "requests": requests,
+        "errors": errors,
+        "throughput": round(requests / elapsed, 2),
+        "p50_ms": round(statistics.median(latencies), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "max_ms": round(max(latencies), 2),
+    }
+    if scenario == "create_job":
+        # Background analyses of the created jobs (queue drained, none pending or running)
+        while True:
+            response = await client.get("/api/jobs/analysis-status", params={"ids": ",".join(map(str, created))})
+            if queue_depth() == 0 and all(item["analysis_status"] not in ("pending", "running")
+                                          for item in response.json()):
+                break
+            await asyncio.sleep(0.02)
+        result["analysis_per_s"] = round(len(created) / (time.perf_counter() - start), 2)
+    result["rss_mb"] = round(rss_mb(), 1)
+    result["rss_growth_mb"] = round(result["rss_mb"] - rss_before, 1)
+    return result
+
+
+async def run_worker(size: int, concurrency_levels: list, requests: int, llm_requests: int, output: str):
+    import httpx
+    from app.database import SessionLocal
+    from app.main import app
+    from app.models import Job
+
+    logging.disable(logging.INFO)  # Per-request log lines would dominate the measurements
+
+    start = time.perf_counter()
+    seed(size)
+    seed_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    await app.router.startup()
+    startup_seconds = time.perf_counter() - start
+    db = SessionLocal()
+    job_ids = [row.id for row in db.query(Job.id).limit(1000)]
+    db.close()
+
+    rng = random.Random(7)
+    rows = []
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)  # Server errors are counted
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=None) as client:
+            for scenario in SCENARIOS:
+                count = llm_requests if scenario in LLM_SCENARIOS else requests
+                await drive(client, scenario, min(count, 10), 1, job_ids, rng)  # Warm-up
+                for concurrency in concurrency_levels:
+                    result = await drive(client, scenario, count, concurrency, job_ids, rng)
+                    rows.append({"size": size, "scenario": scenario, "concurrency": concurrency, **result})
+                    print(f"  {size:>7} | {scenario:12} | c={concurrency:<3} | {result['throughput']:8.1f} req/s | "
+                          f"p50 {result['p50_ms']:8.2f}ms | p95 {result['p95_ms']:8.2f}ms | "
+                          f"p99 {result['p99_ms']:8.2f}ms | rss {result['rss_mb']:6.1f}MB"
+                          + (f" | {result['analysis_per_s']} analyses/s" if "analysis_per_s" in result else ""),
+                          flush=True)
+    finally:
+        await app.router.shutdown()
+
+    with open(output, "w") as f:
+        json.dump({"size": size, "seed_seconds": round(seed_seconds, 2), "startup_seconds": round(startup_seconds, 2),
+                   "peak_rss_mb": round(peak_rss_mb(), 1), "rows": rows}, f)
+
+
+# Parent: one worker process per size, results file, baseline comparison
+
+def run_size(size: int, args) -> dict:
+    workdir = tempfile.mkdtemp()
+    output = os.path.join(workdir, "result.json")
+    env = {
+        **os.environ,
+        "DATABASE_URL": f"sqlite:///{workdir}/benchmark.db",
+        "LLM_BACKEND": "fake",
+        "FAKE_LLM_LATENCY": str(args.llm_latency),
+        "FAKE_LLM_TOKENS_PER_SECOND": str(args.llm_tokens_per_second),
+        "FAKE_LLM_ERROR_RATE": str(args.llm_error_rate),
+        # The fake has no quota; the limiter would only add waiting
+        "OPENAI_RPM_LIMIT": "100000000",
+        "OPENAI_TPM_LIMIT": "100000000",
+    }
+    command = [sys.executable, os.path.abspath(__file__), "--worker", str(size), "--output", output,
+               "--requests", str(args.requests), "--llm-requests", str(args.llm_requests),
+               "--concurrency", *map(str, args.concurrency)]
+    print(f"Size {size}: seeding and running scenarios", flush=True)
+    subprocess.run(command, env=env, cwd=ROOT, check=True)
+    with open(output) as f:
+        result = json.load(f)
+    print(f"  seed {result['seed_seconds']}s | startup {result['startup_seconds']}s | "
+          f"peak rss {result['peak_rss_mb']}MB\n", flush=True)
+    return result
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """Rows whose throughput dropped or p95 grew by more than tolerance: (key, message) pairs"""
+    def by_key(report):
+        return {(row["size"], row["scenario"], row["concurrency"]): row
+                for size in report["sizes"] for row in size["rows"]}
+
+    current, previous = by_key(results), by_key(baseline)
+    regressions = []
+    print(f"Compared with baseline {baseline['created']} ({baseline.get('commit')}), tolerance {tolerance:.0%}")
+    for key in sorted(current.keys() & previous.keys()):
+        row, base = current[key], previous[key]
+        throughput = row["throughput"] / base["throughput"] - 1
+        p95 = row["p95_ms"] / base["p95_ms"] - 1 if base["p95_ms"] else 0
+        problems = []
+        if throughput < -tolerance:
+            problems.append(f"throughput {throughput:+.0%}")
+        # Sub-millisecond differences are noise
+        if p95 > tolerance and row["p95_ms"] - base["p95_ms"] > 1:
+            problems.append(f"p95 {p95:+.0%}")
+        marker = "REGRESSION" if problems else "ok"
+        print(f"  {key[0]:>7} | {key[1]:12} | c={key[2]:<3} | throughput {throughput:+6.1%} | p95 {p95:+6.1%} | {marker}")
+        if problems:
+            regressions.append((key, ", ".join(problems)))
+    missing = previous.keys() - current.keys()
+    if missing:
+        print(f"  {len(missing)} baseline rows not measured in this run")
+    return regressions
+
+
+def main(args):
+    results = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "settings": {key: getattr(args, key) for key in (
+            "requests", "llm_requests", "concurrency", "llm_latency", "llm_tokens_per_second", "llm_error_rate"
+        )},
+        "sizes": [run_size(size, args) for size in args.sizes],
+    }
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    path = os.path.join(RESULTS_DIR, datetime.now().strftime("%Y%m%d-%H%M%S") + ".json")
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results saved to {path}")
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline} (create one with --save-baseline)")
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.tolerance)
+    for (size, scenario, concurrency), message in regressions:
+        print(f"REGRESSION | {size} jobs | {scenario} | concurrency {concurrency} | {message}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000], help="Seeded jobs per run")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=200, help="Requests per level (list_jobs, stats)")
+    parser.add_argument("--llm-requests", type=int, default=50, help="Requests per level (create_job, cover_letter)")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="Fake LLM seconds to first token")
+    parser.add_argument("--llm-tokens-per-second", type=float, default=5000)
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="Store this run as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative change before failing")
+    parser.add_argument("--worker", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--output", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        sys.path.insert(0, ROOT)
+        asyncio.run(run_worker(args.worker, args.concurrency, args.requests, args.llm_requests, args.output))
+    else:
+        sys.exit(main(args))
@@ -0,0 +1,122 @@
+"""
+SQLite throughput with concurrent readers and writers: "default" vs "tuned" profile.
+
+Each profile gets a fresh database with seeded jobs. Reader threads load a
+page of the job list, writer threads insert an LLM log row and update a job
+with a commit each time (like the CRUD handlers and the log writer). Reports
+operations per second, read p99 latency and "database is locked" errors for
+both profiles.
+
+Usage (from project root):
+    python benchmarks/db_concurrency.py --readers 8 --writers 4 --seconds 5
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/db_concurrency.db"
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base, make_engine
+from app.models import Job, LLMLog
+
+SEED_JOBS = 2000
+
+
+def seed(session_factory):
+    db = session_factory()
+    db.add_all(
+        Job(title=f"Engineer {i}", company=f"Company {i % 50}", status="saved",
+            job_description="Python developer " * 200, resume_match_percentage=i % 100)
+        for i in range(SEED_JOBS)
+    )
+    db.commit()
+    db.close()
+
+
+def reader(session_factory, stop, counts, latencies):
+    while not stop.is_set():
+        db = session_factory()
+        start = time.perf_counter()
+        try:
+            db.query(Job.id, Job.title, Job.company, Job.status, Job.resume_match_percentage).order_by(
+                Job.created_at.desc(), Job.id.desc()
+            ).limit(50).all()
+            latencies.append(time.perf_counter() - start)
+            counts["reads"] += 1
+        except OperationalError:
+            counts["errors"] += 1
+        finally:
+            db.close()
+
+
+def writer(session_factory, stop, counts):
+    rng = random.Random()
+    while not stop.is_set():
+        db = session_factory()
+        try:
+            db.add(LLMLog(function_name="benchmark", status="success", execution_time=0.1, tokens_used=100))
+            db.query(Job).filter(Job.id == rng.randint(1, SEED_JOBS)).update({"cover_letter": str(time.time())})
+            db.commit()
+            counts["writes"] += 1
+        except OperationalError:
+            db.rollback()
+            counts["errors"] += 1
+        finally:
+            db.close()
+
+
+def run(profile: str, readers: int, writers: int, seconds: float) -> dict:
+    url = f"sqlite:///{tempfile.mkdtemp()}/{profile}.db"
+    engine = make_engine(url, profile)
+    Base.metadata.create_all(engine)
+    session_factory = sessionmaker(bind=engine)
+    seed(session_factory)
+
+    counts = {"reads": 0, "writes": 0, "errors": 0}
+    latencies = []
+    stop = threading.Event()
+    threads = [
+        threading.Thread(target=reader, args=(session_factory, stop, counts, latencies)) for _ in range(readers)
+    ]
+    threads += [threading.Thread(target=writer, args=(session_factory, stop, counts)) for _ in range(writers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    engine.dispose()
+    latencies.sort()
+    result = {key: value / seconds for key, value in counts.items()}
+    result["read_p99_ms"] = latencies[int(0.99 * (len(latencies) - 1))] * 1000 if latencies else 0
+    return result
+
+
+def main(readers: int, writers: int, seconds: float):
+    results = {}
+    for profile in ("default", "tuned"):
+        results[profile] = run(profile, readers, writers, seconds)
+        result = results[profile]
+        print(f"{profile:8} | reads {result['reads']:8.0f}/s | writes {result['writes']:7.0f}/s | "
+              f"read p99 {result['read_p99_ms']:6.1f}ms | lock errors {result['errors']:.1f}/s")
+    for key in ("reads", "writes"):
+        if results["default"][key]:
+            print(f"{key}: x{results['tuned'][key] / results['default'][key]:.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=5)
+    args = parser.parse_args()
+    main(args.readers, args.writers, args.seconds)
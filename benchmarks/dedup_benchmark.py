@@ -0,0 +1,105 @@
+"""
+Near-duplicate lookup: LSH index (app/dedup.py) vs naive pairwise Jaccard.
+
+Builds an in-memory index over synthetic postings and measures lookup time
+for near-duplicate and unrelated queries. The naive scan compares shingle
+sets against every stored job; it runs on a smaller sample and is
+extrapolated linearly to the full size.
+
+Usage (from project root):
+    python benchmarks/dedup_benchmark.py --jobs 100000
+"""
+import argparse
+import os
+import random
+import re
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+
+from app.dedup import DuplicateIndex, compute_signature
+
+VOCABULARY = [f"term{i}" for i in range(20000)]
+
+
+def make_posting(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(VOCABULARY) for _ in range(words))
+
+
+def make_near_duplicate(rng: random.Random, text: str) -> str:
+    """Same posting with different tracking link, whitespace and one edit per 100 words"""
+    words = text.split()
+    for _ in range(max(1, len(words) // 100)):
+        words[rng.randrange(len(words))] = rng.choice(VOCABULARY)
+    return "  ".join(words) + f"\n\nApply: https://jobs.example.com/{rng.randrange(10**6)}?utm_source=linkedin"
+
+
+def shingles(text: str) -> set:
+    words = re.findall(r"[a-z0-9]+", text.lower())
+    return {tuple(words[i:i + 5]) for i in range(len(words) - 4)}
+
+
+def jaccard(first: set, second: set) -> float:
+    return len(first & second) / len(first | second) if first or second else 0
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def main(jobs: int, words: int, queries: int, naive_jobs: int):
+    rng = random.Random(42)
+    postings = [make_posting(rng, words) for _ in range(jobs)]
+
+    index = DuplicateIndex()
+    start = time.perf_counter()
+    for job_id, text in enumerate(postings):
+        index.add(job_id, compute_signature(text))
+    print(f"Indexed {jobs} postings ({words} words) in {time.perf_counter() - start:.1f}s")
+
+    query_ids = [rng.randrange(jobs) for _ in range(queries)]
+    duplicate_queries = [make_near_duplicate(rng, postings[job_id]) for job_id in query_ids]
+    unrelated_queries = [make_posting(rng, words) for _ in range(queries)]
+
+    signature_times, lookup_times, found = [], [], 0
+    for job_id, text in zip(query_ids, duplicate_queries):
+        signature, signature_ms = timed(compute_signature, text)
+        match, lookup_ms = timed(index.find, signature)
+        signature_times.append(signature_ms)
+        lookup_times.append(lookup_ms)
+        found += bool(match and match[0] == job_id)
+
+    false_positives = 0
+    for text in unrelated_queries:
+        match, lookup_ms = timed(index.find, compute_signature(text))
+        lookup_times.append(lookup_ms)
+        false_positives += bool(match)
+
+    print(f"LSH    | signature p50 {statistics.median(signature_times):.3f}ms | "
+          f"index lookup p50 {statistics.median(lookup_times):.4f}ms, max {max(lookup_times):.4f}ms")
+    print(f"LSH    | recall {found}/{queries} | false positives {false_positives}/{queries}")
+
+    sample = [shingles(text) for text in postings[:naive_jobs]]
+    naive_times = []
+    for text in duplicate_queries[:20]:
+        query = shingles(text)
+        _, naive_ms = timed(lambda: max(jaccard(query, stored) for stored in sample))
+        naive_times.append(naive_ms)
+    naive_ms = statistics.median(naive_times)
+    print(f"Naive  | {naive_ms:.1f}ms per lookup over {naive_jobs} jobs, "
+          f"~{naive_ms * jobs / naive_jobs:.0f}ms extrapolated to {jobs}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--jobs", type=int, default=100000)
+    parser.add_argument("--words", type=int, default=150, help="Words per synthetic posting")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--naive-jobs", type=int, default=5000, help="Sample size for the naive scan")
+    args = parser.parse_args()
+    main(args.jobs, args.words, args.queries, args.naive_jobs)
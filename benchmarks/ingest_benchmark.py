@@ -0,0 +1,175 @@
+"""
+Prompt tokens per job description: old fixed 5000-character cut vs the ingestion stage (app/ingest.py).
+
+Builds a corpus of postings the way they get pasted - plain text, copied from
+a job board page (navigation, counters, "Show more"), HTML source, heavy on
+benefits and legal boilerplate, with repeated blocks, and long postings whose
+requirements come after the first 5000 characters - or reads real postings
+from a JSONL file (one JSON string, or an object with "job_description", per line).
+
+For each kind reports the mean tokens of the raw posting, of the old cut and
+of the prepared description, tokens saved against the old cut, and for the
+generated corpus how often all requirement bullets and the visa statement
+made it into the prompt.
+
+Usage (from project root):
+    python benchmarks/ingest_benchmark.py --postings 600
+    python benchmarks/ingest_benchmark.py --corpus postings.jsonl
+"""
+import argparse
+import html
+import json
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import ingest
+from app.config import JOB_DESCRIPTION_MAX_TOKENS
+
+LEGACY_MAX_CHARS = 5000  # Former MAX_JOB_DESCRIPTION_LENGTH
+WORDS = ("python django fastapi kubernetes docker aws gcp postgres kafka redis team product platform data "
+         "pipeline service customers payments search scale reliability design review mentor deliver").split()
+BENEFITS = ["30 days of paid vacation", "Learning budget of 2000 EUR per year", "Gym membership", "Company laptop",
+            "Flexible working hours", "Home office allowance", "Company pension plan", "Team events every quarter",
+            "Free lunch on Fridays", "Public transport ticket", "Parental leave top-up", "Employee stock options"]
+VISA_STATEMENTS = ["We offer visa sponsorship and relocation support.",
+                   "Unfortunately we cannot sponsor visas for this role.",
+                   "Candidates must be authorized to work in the US without sponsorship."]
+EEO = ("{company} is an equal opportunity employer. All qualified applicants will receive consideration for "
+       "employment without regard to race, color, religion, sex, sexual orientation, gender identity, national "
+       "origin, citizenship status, disability or protected veteran status. We provide reasonable accommodation "
+       "to applicants with disabilities throughout the hiring process.")
+PRIVACY = ("By applying, you agree that we process your personal data as described in our candidate privacy notice. "
+           "We do not accept unsolicited resumes from recruitment agencies or third-party recruiters.")
+NAV_TOP = ["Skip to main content", "Jobs", "Sign in", "Join now", "Promoted", "Over 200 applicants",
+           "Reposted 3 days ago", "Easy Apply", "Save", "Share this job"]
+NAV_BOTTOM = ["Show more", "Show less", "Report this job", "Similar jobs", "People also viewed", "Set alert"]
+
+
+def sentence(rng: random.Random, low: int = 8, high: int = 16) -> str:
+    return " ".join(rng.choices(WORDS, k=rng.randint(low, high))).capitalize() + "."
+
+
+def make_posting(rng: random.Random, kind: str) -> dict:
+    company = rng.choice(WORDS).capitalize() + rng.choice(["ly", "io", " Labs", " GmbH"])
+    title = f"Senior {rng.choice(WORDS).capitalize()} Engineer"
+    long = kind == "long"
+    responsibilities = ["- " + sentence(rng) for _ in range(rng.randint(45, 60) if long else rng.randint(4, 8))]
+    requirements = [f"- {rng.randint(2, 8)}+ years of {rng.choice(WORDS)} and {rng.choice(WORDS)} ({index})"
+                    for index in range(rng.randint(4, 8))]
+    benefits = ["- " + benefit for benefit in rng.sample(BENEFITS, rng.randint(6, 10))]
+    visa = rng.choice(VISA_STATEMENTS)
+    benefits.insert(rng.randint(0, len(benefits)), "- " + visa)
+    intro = " ".join(sentence(rng) for _ in range(rng.randint(12, 18) if long else rng.randint(2, 4)))
+    about = " ".join(sentence(rng) for _ in range(rng.randint(3, 6)))
+
+    blocks = [
+        [f"{title} at {company}", f"{company} · Berlin, Germany (Hybrid)"],
+        ["About the job", intro],
+        ["Responsibilities:", *responsibilities],
+        ["Requirements:", *requirements],
+        ["What we offer", *benefits],
+        [f"About {company}", about],
+    ]
+    if kind in ("boilerplate", "board", "html"):
+        blocks.append([EEO.format(company=company), PRIVACY])
+    if kind == "repeated":
+        blocks.append([f"About {company}", about])  # Pasted twice
+        blocks.append(["About the job", intro])
+    if kind == "board":
+        blocks.insert(0, NAV_TOP)
+        blocks.append(NAV_BOTTOM)
+
+    if kind == "html":
+        parts = ["<html><head><style>body{font-family:sans-serif}</style><script>window.dataLayer=[];</script></head>",
+                 "<body><nav><a href='/'>Home</a> <a href='/jobs'>Jobs</a></nav>"]
+        for block in blocks:
+            items = [line[2:] for line in block if line.startswith("- ")]
+            heading = [line for line in block if not line.startswith("- ")]
+            parts.append(f"<h3>{html.escape(heading[0])}</h3>")
+            parts.extend(f"<p>{html.escape(line)}</p>" for line in heading[1:])
+            if items:
+                parts.append("<ul>" + "".join(f"<li>{html.escape(item)}</li>" for item in items) + "</ul>")
+        parts.append("<footer>© Jobs Inc · Privacy · Terms</footer><button>Apply</button></body></html>")
+        text = "\n".join(parts)
+    else:
+        text = "\n\n".join("\n".join(block) for block in blocks)
+    return {"kind": kind, "text": text, "requirements": [line[2:] for line in requirements], "visa": visa}
+
+
+KINDS = ["plain", "board", "html", "boilerplate", "repeated", "long"]
+
+
+def make_corpus(postings: int) -> list:
+    rng = random.Random(42)
+    return [make_posting(rng, KINDS[index % len(KINDS)]) for index in range(postings)]
+
+
+def contains(text: str, fragment: str) -> bool:
+    return fragment in text
+
+
+def run(corpus: list) -> dict:
+    results = defaultdict(lambda: defaultdict(float))
+    for posting in corpus:
+        raw = posting["text"]
+        start = time.perf_counter()
+        prepared = ingest.prepare(raw)
+        elapsed = time.perf_counter() - start
+        legacy = raw[:LEGACY_MAX_CHARS]
+        for kind in (posting["kind"], "all"):
+            row = results[kind]
+            row["count"] += 1
+            row["raw"] += ingest.count_tokens(raw)
+            row["legacy"] += ingest.count_tokens(legacy)
+            row["prepared"] += prepared.tokens
+            row["seconds"] += elapsed
+            if "requirements" in posting:
+                row["legacy_requirements"] += all(contains(legacy, item) for item in posting["requirements"])
+                row["prepared_requirements"] += all(contains(prepared.text, item) for item in posting["requirements"])
+                row["legacy_visa"] += contains(legacy, posting["visa"])
+                row["prepared_visa"] += contains(prepared.text, posting["visa"])
+    return results
+
+
+def main(postings: int, corpus_path: str):
+    if corpus_path:
+        with open(corpus_path) as f:
+            records = [json.loads(line) for line in f if line.strip()]
+        corpus = [{"kind": "corpus", "text": record if isinstance(record, str) else record["job_description"]}
+                  for record in records]
+    else:
+        corpus = make_corpus(postings)
+    counter = "tiktoken" if ingest.load_encoding() is not None else "estimated (~4 chars/token, tiktoken encoding not available)"
+    print(f"{len(corpus)} postings | token budget {JOB_DESCRIPTION_MAX_TOKENS} | token counts: {counter}\n")
+
+    results = run(corpus)
+    print(f"{'kind':12} | {'raw':>6} | {'old cut':>7} | {'prepared':>8} | {'saved':>6} | "
+          f"{'requirements old/new':>20} | {'visa old/new':>13} | {'time':>7}")
+    for kind in [kind for kind in dict.fromkeys(posting["kind"] for posting in corpus)] + ["all"]:
+        row = results[kind]
+        count = row["count"]
+        saved = 1 - row["prepared"] / row["legacy"]
+        line = (f"{kind:12} | {row['raw'] / count:6.0f} | {row['legacy'] / count:7.0f} | {row['prepared'] / count:8.0f} | "
+                f"{saved:6.1%}")
+        if not corpus_path:
+            line += (f" | {row['legacy_requirements'] / count:9.0%} / {row['prepared_requirements'] / count:7.0%}"
+                     f" | {row['legacy_visa'] / count:5.0%} / {row['prepared_visa'] / count:5.0%}")
+        else:
+            line += f" | {'-':>20} | {'-':>13}"
+        print(line + f" | {row['seconds'] / count * 1000:5.2f}ms")
+    total = results["all"]
+    print(f"\n{(total['legacy'] - total['prepared']) / total['count']:.0f} prompt tokens saved per posting "
+          f"against the old cut ({(total['raw'] - total['prepared']) / total['count']:.0f} against the raw posting)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--postings", type=int, default=600)
+    parser.add_argument("--corpus", help="JSONL file with one posting (string or {\"job_description\": ...}) per line")
+    args = parser.parse_args()
+    main(args.postings, args.corpus)
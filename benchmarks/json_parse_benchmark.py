@@ -0,0 +1,154 @@
+"""
+Parse success rate and time for LLM analysis responses: old replace-and-retry vs tolerant parser.
+
+Builds a corpus of analyze_job_complete-style responses with the defects seen
+in practice (raw newlines and tabs in strings, output cut off at max_tokens,
+code fences and prose around the JSON, unescaped quotes, trailing commas) or
+reads raw responses from a JSONL file (one JSON-encoded string per line).
+
+For each strategy reports per defect kind:
+  - complete: parsed into a dict with all JobAnalysis fields (no repair call needed)
+  - partial:  parsed into a dict, some fields missing (repair call asks only for those)
+  - failed:   nothing usable (the old code returned "Unable to analyze")
+and the mean parse time.
+
+Usage (from project root):
+    python benchmarks/json_parse_benchmark.py --responses 2000
+    python benchmarks/json_parse_benchmark.py --corpus raw_responses.jsonl
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import tolerant_json
+from app.schemas import JobAnalysis
+
+FIELDS = list(JobAnalysis.model_fields)
+WORDS = "python django kubernetes team remote senior backend data cloud aws product growth visa relocation".split()
+
+
+def make_analysis(rng: random.Random) -> dict:
+    def text(sentences):
+        return " ".join(" ".join(rng.choices(WORDS, k=rng.randint(6, 14))).capitalize() + "." for _ in range(sentences))
+
+    return {
+        "title": "Senior " + rng.choice(WORDS).capitalize() + " Engineer",
+        "company": rng.choice(WORDS).capitalize() + " Inc",
+        "visa_sponsorship": rng.choice([True, False, None]),
+        "visa_analysis": "Direct Statement: " + text(1) + "\n\nCompany Analysis: " + text(3)
+                         + "\n\nSponsorship Likelihood: Likely\nReasoning: " + text(3)
+                         + "\n\nKey Indicators Found: " + text(2),
+        "match_percentage": rng.randint(0, 100),
+        "match_analysis": "✅ STRENGTHS:\n" + "\n".join("- " + text(1) for _ in range(5))
+                          + "\n\n❌ GAPS:\n" + "\n".join("- " + text(1) for _ in range(4)),
+    }
+
+
+def raw_newlines(text: str) -> str:
+    return text.replace("\\n", "\n")
+
+
+DEFECTS = {
+    "valid": lambda text, rng: text,
+    "raw newlines": lambda text, rng: raw_newlines(text),
+    "raw tabs": lambda text, rng: raw_newlines(text).replace(". ", ".\t", 3),
+    "truncated": lambda text, rng: text[:rng.randint(len(text) // 3, len(text) - 2)],
+    "truncated + newlines": lambda text, rng: raw_newlines(text)[:rng.randint(len(text) // 3, len(text) - 2)],
+    "code fence": lambda text, rng: "```json\n" + text + "\n```",
+    "prose around": lambda text, rng: "Here is the analysis:\n" + text + "\nLet me know if you need more.",
+    "unescaped quotes": lambda text, rng: text.replace("Direct Statement: ", 'Direct Statement: "', 1).replace(
+        "\\n\\nCompany", '"\\n\\nCompany', 1),
+    "trailing comma": lambda text, rng: text[:-1].rstrip() + ",\n}",
+}
+
+
+def make_corpus(responses: int) -> list:
+    rng = random.Random(42)
+    kinds = list(DEFECTS)
+    corpus = []
+    for index in range(responses):
+        kind = kinds[index % len(kinds)]
+        text = json.dumps(make_analysis(rng), ensure_ascii=False, indent=4)
+        corpus.append((kind, DEFECTS[kind](text, rng)))
+    return corpus
+
+
+def legacy_parse(text: str):
+    """Previous analyze_job_complete parsing: json.loads, then replace newlines/tabs and retry"""
+    text = text.strip()
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        fixed = text.replace("\r\n", "\\n")
+        fixed = fixed.replace("\n", "\\n")
+        fixed = fixed.replace("\r", "\\n")
+        fixed = fixed.replace("\t", " ")
+        return json.loads(fixed)
+
+
+def tolerant_parse(text: str):
+    """Current parsing: json.loads, then the single-pass tolerant parser"""
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        return tolerant_json.loads(text)
+
+
+def classify(result) -> str:
+    if not isinstance(result, dict) or not result:
+        return "failed"
+    return "complete" if all(field in result for field in FIELDS) else "partial"
+
+
+def run(strategy, corpus: list) -> dict:
+    counts = defaultdict(lambda: defaultdict(int))
+    total_time = 0.0
+    for kind, text in corpus:
+        start = time.perf_counter()
+        try:
+            result = strategy(text)
+        except ValueError:
+            result = None
+        total_time += time.perf_counter() - start
+        counts[kind][classify(result)] += 1
+        counts["all"][classify(result)] += 1
+    return {"counts": counts, "mean_us": total_time / len(corpus) * 1e6}
+
+
+def main(responses: int, corpus_path: str):
+    if corpus_path:
+        with open(corpus_path) as f:
+            corpus = [("corpus", json.loads(line)) for line in f if line.strip()]
+    else:
+        corpus = make_corpus(responses)
+    print(f"{len(corpus)} responses\n")
+
+    results = {name: run(strategy, corpus) for name, strategy in (("legacy", legacy_parse), ("tolerant", tolerant_parse))}
+    kinds = [kind for kind in dict.fromkeys(kind for kind, _ in corpus)] + ["all"]
+    print(f"{'defect':22} | {'legacy complete/partial/failed':>31} | {'tolerant complete/partial/failed':>33}")
+    for kind in kinds:
+        row = []
+        for name in ("legacy", "tolerant"):
+            counts = results[name]["counts"][kind]
+            row.append(f"{counts['complete']:>9} / {counts['partial']:>7} / {counts['failed']:>6}")
+        print(f"{kind:22} | {row[0]:>31} | {row[1]:>33}")
+    print()
+    for name, result in results.items():
+        counts = result["counts"]["all"]
+        usable = (counts["complete"] + counts["partial"]) / len(corpus)
+        print(f"{name:8} | usable {usable:6.1%} | complete {counts['complete'] / len(corpus):6.1%} | "
+              f"{result['mean_us']:7.1f}µs per response")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--responses", type=int, default=2000)
+    parser.add_argument("--corpus", help="JSONL file with one raw response string per line")
+    args = parser.parse_args()
+    main(args.responses, args.corpus)
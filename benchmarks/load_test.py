@@ -0,0 +1,118 @@
+"""
+Load test: GET /api/jobs latency while LLM analyses are in flight.
+
+Runs the app in-process (startup: analysis workers, log writer) with the
+offline LLM backend (LLM_BACKEND=fake) answering after the configured
+latency, so no API key or network is needed. POST /api/jobs returns before
+the analysis runs: the list is timed while the worker pool works through the
+queued analyses, until the last one has finished.
+
+Usage (from project root):
+    python benchmarks/load_test.py --analyses 20 --latency 2
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def measure_list_latency(client, until) -> list:
+    """GET /api/jobs back to back until until() is true"""
+    latencies = []
+    while not await until():
+        start = time.perf_counter()
+        response = await client.get("/api/jobs")
+        response.raise_for_status()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def report(label: str, latencies: list):
+    print(
+        f"{label:<22} requests={len(latencies):<5} "
+        f"p50={statistics.median(latencies):7.2f}ms "
+        f"p99={percentile(latencies, 99):7.2f}ms "
+        f"max={max(latencies):7.2f}ms"
+    )
+
+
+def make_posting(resume_words: list, rng: random.Random) -> str:
+    """Resume vocabulary in random order: passes the local match filter, not a duplicate of another posting"""
+    return " ".join(rng.sample(resume_words, min(len(resume_words), 150)))
+
+
+async def main(analyses: int, latency: float):
+    os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/load_test.db"
+    os.environ["LLM_BACKEND"] = "fake"
+    os.environ["FAKE_LLM_LATENCY"] = str(latency)
+    # Latency of the app under load, not the account quota: the rate limiter must not pace the analyses
+    os.environ.setdefault("OPENAI_RPM_LIMIT", "100000")
+    os.environ.setdefault("OPENAI_TPM_LIMIT", "100000000")
+
+    import httpx
+    from app.analysis_queue import queue_depth, read_resume
+    from app.main import app
+
+    rng = random.Random(42)
+    resume_words = (read_resume() or "python developer django aws docker kubernetes postgres").split()
+
+    await app.router.startup()
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=None) as client:
+            idle_until = time.perf_counter() + latency
+
+            async def idle_done():
+                return time.perf_counter() >= idle_until
+
+            idle = await measure_list_latency(client, idle_done)
+
+            posts = await asyncio.gather(*[
+                client.post("/api/jobs", json={"title": "", "company": "",
+                                               "job_description": make_posting(resume_words, rng)})
+                for _ in range(analyses)
+            ])
+            job_ids = ",".join(str(response.json()["id"]) for response in posts)
+            queued = sum(response.json()["analysis_status"] == "pending" for response in posts)
+            start = time.perf_counter()
+            last_check = 0.0
+
+            async def analyses_done():
+                # Status polled every 100ms (as the frontend does), not on every request
+                nonlocal last_check
+                if time.perf_counter() - last_check < 0.1:
+                    return False
+                last_check = time.perf_counter()
+                if queue_depth():
+                    return False
+                statuses = (await client.get("/api/jobs/analysis-status", params={"ids": job_ids})).json()
+                return all(item["analysis_status"] not in ("pending", "running") for item in statuses)
+
+            busy = await measure_list_latency(client, analyses_done)
+            elapsed = time.perf_counter() - start
+    finally:
+        await app.router.shutdown()
+
+    report("idle", idle)
+    report(f"{queued} analyses running", busy)
+    print(f"{queued} analyses finished in {elapsed:.2f}s ({queued / elapsed:.1f}/s)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--analyses", type=int, default=20, help="Jobs created at once (analyzed by the worker pool)")
+    parser.add_argument("--latency", type=float, default=2.0, help="Simulated LLM latency, seconds")
+    args = parser.parse_args()
+    asyncio.run(main(args.analyses, args.latency))
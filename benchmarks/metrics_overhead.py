@@ -0,0 +1,102 @@
+"""
+Overhead of /metrics instrumentation per request and per SQL statement.
+
+Calls a minimal FastAPI app directly through ASGI (no HTTP client in the
+measurement) with and without MetricsMiddleware, and runs SELECT 1 on an
+in-memory SQLite engine with and without the query timing hooks from
+app/database.py. The difference of the medians is the instrumentation cost.
+
+Usage (from project root):
+    python benchmarks/metrics_overhead.py --requests 20000
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/metrics_overhead.db"
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+
+from fastapi import FastAPI
+from sqlalchemy import create_engine, event, text
+
+from app.database import _query_started, _query_finished
+from app.metrics import MetricsMiddleware
+
+ROUNDS = 5
+
+
+def make_app(instrumented: bool) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/api/items/{item_id}")
+    async def get_item(item_id: int):
+        return {"id": item_id}
+
+    if instrumented:
+        app.add_middleware(MetricsMiddleware)
+    return app
+
+
+async def time_requests(app, requests: int) -> float:
+    """Microseconds per request"""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": "/api/items/1", "raw_path": b"/api/items/1", "query_string": b"",
+        "root_path": "", "headers": [], "client": ("127.0.0.1", 1), "server": ("test", 80)
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    await app(dict(scope), receive, send)  # Build middleware stack and route table
+    start = time.perf_counter()
+    for _ in range(requests):
+        await app(dict(scope), receive, send)
+    return (time.perf_counter() - start) / requests * 1e6
+
+
+def time_queries(instrumented: bool, queries: int) -> float:
+    """Microseconds per SELECT 1"""
+    engine = create_engine("sqlite://")
+    if instrumented:
+        event.listen(engine, "before_cursor_execute", _query_started)
+        event.listen(engine, "after_cursor_execute", _query_finished)
+    with engine.connect() as conn:
+        statement = text("SELECT 1")
+        conn.execute(statement)
+        start = time.perf_counter()
+        for _ in range(queries):
+            conn.execute(statement)
+        return (time.perf_counter() - start) / queries * 1e6
+
+
+async def main(requests: int):
+    plain_app, metrics_app = make_app(False), make_app(True)
+    plain, instrumented = [], []
+    for _ in range(ROUNDS):
+        plain.append(await time_requests(plain_app, requests))
+        instrumented.append(await time_requests(metrics_app, requests))
+    plain_us, metrics_us = statistics.median(plain), statistics.median(instrumented)
+    print(f"Request | plain {plain_us:.1f}us | with metrics {metrics_us:.1f}us | "
+          f"overhead {metrics_us - plain_us:.1f}us")
+
+    plain = [time_queries(False, requests) for _ in range(ROUNDS)]
+    instrumented = [time_queries(True, requests) for _ in range(ROUNDS)]
+    plain_us, metrics_us = statistics.median(plain), statistics.median(instrumented)
+    print(f"Query   | plain {plain_us:.1f}us | with hooks {metrics_us:.1f}us | "
+          f"overhead {metrics_us - plain_us:.1f}us")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=20000)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests))
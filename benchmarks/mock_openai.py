@@ -0,0 +1,81 @@
+"""
+Local mock of the OpenAI chat completions API with injectable faults.
+
+Faults are set with POST /mock/config (JSON, all optional):
+    {"error_rate": 0.3, "fail_next": 0, "error_status": 503, "retry_after": 0.5, "latency": 0.05}
+error_rate - share of requests answered with error_status (1.0 = outage)
+fail_next - number of next requests that fail regardless of error_rate
+retry_after - Retry-After header sent with errors (seconds, omitted if null)
+latency - seconds before answering (large values simulate a hanging upstream)
+
+GET /mock/stats returns the number of requests and errors served.
+
+Usage (from project root):
+    uvicorn benchmarks.mock_openai:app --port 8100
+    OPENAI_BASE_URL=http://127.0.0.1:8100/v1 ./run.sh
+"""
+import asyncio
+import json
+import random
+import time
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+app = FastAPI(title="Mock OpenAI")
+
+ANALYSIS = {
+    "title": "Backend Engineer",
+    "company": "Mock Corp",
+    "visa_sponsorship": None,
+    "visa_analysis": "Direct Statement: The job posting does not mention visa sponsorship.",
+    "match_percentage": 70,
+    "match_analysis": "✅ STRENGTHS:\n- Python\n\n❌ GAPS:\n- Go",
+}
+
+config = {"error_rate": 0.0, "fail_next": 0, "error_status": 503, "retry_after": None, "latency": 0.05}
+stats = {"requests": 0, "errors": 0}
+
+
+@app.post("/mock/config")
+async def set_config(request: Request):
+    config.update(await request.json())
+    stats.update(requests=0, errors=0)
+    return config
+
+
+@app.get("/mock/stats")
+async def get_stats():
+    return stats
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    stats["requests"] += 1
+    await asyncio.sleep(config["latency"])
+
+    if config["fail_next"] > 0 or random.random() < config["error_rate"]:
+        config["fail_next"] = max(0, config["fail_next"] - 1)
+        stats["errors"] += 1
+        headers = {}
+        if config["retry_after"] is not None:
+            headers["retry-after"] = str(config["retry_after"])
+        return JSONResponse(
+            {"error": {"message": "Mock upstream error", "type": "server_error", "code": None}},
+            status_code=config["error_status"],
+            headers=headers
+        )
+
+    return {
+        "id": f"chatcmpl-mock-{stats['requests']}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "gpt-4o"),
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": json.dumps(ANALYSIS)},
+            "finish_reason": "stop",
+        }],
+        "usage": {"prompt_tokens": 1500, "completion_tokens": 400, "total_tokens": 1900},
+    }
@@ -0,0 +1,145 @@
+"""
+OpenAI resilience layer against a local mock server (benchmarks/mock_openai.py).
+
+Starts the mock in a background thread, points the app's OpenAI client at it
+and runs analyze_job_complete through these scenarios:
+  - healthy:      every call succeeds without retries
+  - flaky:        30% of requests fail with 500/429, calls succeed after retries
+  - retry-after:  429 with "Retry-After: 1", the wait is honored
+  - outage:       every request fails, the circuit opens and later calls fail fast
+  - recovery:     upstream healthy again, the half-open trial closes the circuit
+  - slow:         upstream hangs, calls end at the deadline
+Each scenario checks the outcomes recorded in llm_logs (status, retry_count).
+
+Usage (from project root):
+    python benchmarks/resilience_test.py
+"""
+import asyncio
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+PORT = free_port()
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/resilience_test.db"
+os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{PORT}/v1"
+os.environ["OPENAI_API_KEY"] = "sk-mock"
+os.environ["OPENAI_RPM_LIMIT"] = os.environ["OPENAI_TPM_LIMIT"] = "100000000"  # Not what is tested here
+
+import httpx
+import uvicorn
+
+from app import llm, resilience
+from app.database import SessionLocal, init_db
+from app.models import LLMLog
+from benchmarks import mock_openai
+
+# Short timings so the whole run takes seconds
+resilience.OPENAI_BACKOFF_BASE = 0.05
+resilience.OPENAI_BACKOFF_MAX = 0.5
+resilience.OPENAI_CALL_DEADLINE = 2
+resilience.circuit_breaker.recovery_seconds = 1
+MOCK_URL = f"http://127.0.0.1:{PORT}"
+
+
+def start_mock_server():
+    server = uvicorn.Server(uvicorn.Config(mock_openai.app, port=PORT, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    for _ in range(100):
+        if server.started:
+            return server
+        time.sleep(0.05)
+    raise RuntimeError("Mock server did not start")
+
+
+async def configure(**faults):
+    defaults = {"error_rate": 0.0, "fail_next": 0, "error_status": 503, "retry_after": None, "latency": 0.05}
+    async with httpx.AsyncClient() as client:
+        await client.post(f"{MOCK_URL}/mock/config", json={**defaults, **faults})
+
+
+def logged_outcomes(since_id: int) -> list:
+    db = SessionLocal()
+    try:
+        rows = db.query(LLMLog.status, LLMLog.retry_count).filter(LLMLog.id > since_id).all()
+        return [(row.status, row.retry_count or 0) for row in rows]
+    finally:
+        db.close()
+
+
+def last_log_id() -> int:
+    db = SessionLocal()
+    try:
+        row = db.query(LLMLog.id).order_by(LLMLog.id.desc()).first()
+        return row.id if row else 0
+    finally:
+        db.close()
+
+
+async def run_calls(count: int, concurrency: int = 5) -> list:
+    """Latency of each analyze_job_complete call"""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(index):
+        async with semaphore:
+            start = time.perf_counter()
+            await llm.analyze_job_complete(f"Job {index} {time.time()}", "Resume", use_cache=False)
+            return time.perf_counter() - start
+
+    return await asyncio.gather(*(one(index) for index in range(count)))
+
+
+async def scenario(name: str, calls: int, check, concurrency: int = 5, **faults) -> bool:
+    await configure(**faults)
+    since = last_log_id()
+    latencies = await run_calls(calls, concurrency)
+    outcomes = logged_outcomes(since)
+    statuses = {}
+    for status, _ in outcomes:
+        statuses[status] = statuses.get(status, 0) + 1
+    retries = sum(retry_count for _, retry_count in outcomes)
+    passed = check(statuses, retries, latencies)
+    print(f"{'PASS' if passed else 'FAIL'} | {name:12} | {statuses} | retries {retries:3} | "
+          f"max latency {max(latencies):5.2f}s | circuit {resilience.circuit_breaker.state}")
+    return passed
+
+
+async def main():
+    start_mock_server()
+    init_db()
+    results = [
+        await scenario("healthy", 20, lambda s, r, l: s == {"success": 20} and r == 0),
+        await scenario("flaky", 40, lambda s, r, l: s.get("success", 0) >= 38 and r > 0,
+                       error_rate=0.3, error_status=500),
+        await scenario("retry-after", 1, lambda s, r, l: s == {"success": 1} and r == 1 and l[0] >= 1,
+                       concurrency=1, fail_next=1, error_status=429, retry_after=1),
+    ]
+    results.append(await scenario(
+        "outage", 20,
+        lambda s, r, l: s.get("circuit_open", 0) >= 15 and sorted(l)[10] < 0.05,
+        concurrency=1, error_rate=1.0
+    ))
+    await asyncio.sleep(resilience.circuit_breaker.recovery_seconds)
+    results.append(await scenario("recovery", 5, lambda s, r, l: s == {"success": 5}, concurrency=1))
+    results.append(await scenario(
+        "slow", 3, lambda s, r, l: s.get("timeout") == 3 and max(l) < resilience.OPENAI_CALL_DEADLINE + 0.5,
+        concurrency=3, latency=10
+    ))
+    await llm.client.close()
+    print(f"\n{sum(results)}/{len(results)} scenarios passed")
+    return all(results)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if asyncio.run(main()) else 1)
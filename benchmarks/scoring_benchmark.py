@@ -0,0 +1,86 @@
+"""
+Local match scoring: re-score every stored job after a resume edit.
+
+Seeds a temporary database with synthetic postings, builds the scoring index
+(app/scoring.py) and times:
+  - score_all: one sparse matrix-vector pass over all jobs
+  - rescore_all: score_all + writing changed scores to the database
+
+Usage (from project root):
+    python benchmarks/scoring_benchmark.py --jobs 10000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/scoring_benchmark.db"
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+
+from app import scoring
+from app.database import SessionLocal, init_db
+from app.models import Job
+
+SKILLS = [
+    "python", "django", "fastapi", "flask", "java", "spring", "kotlin", "go", "rust", "c++", "c#",
+    "javascript", "typescript", "react", "vue", "angular", "node", "sql", "postgresql", "mysql",
+    "mongodb", "redis", "kafka", "docker", "kubernetes", "terraform", "aws", "gcp", "azure", "linux",
+    "pandas", "numpy", "pytorch", "tensorflow", "spark", "airflow", "graphql", "grpc", "ci", "cd",
+]
+FILLER = [f"word{i}" for i in range(5000)]
+
+
+def make_posting(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(SKILLS) if rng.random() < 0.15 else rng.choice(FILLER) for _ in range(words))
+
+
+def make_resume(rng: random.Random) -> str:
+    return " ".join(rng.sample(SKILLS, 15) + rng.sample(FILLER, 200))
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def main(jobs: int, words: int):
+    rng = random.Random(42)
+    init_db()
+    db = SessionLocal()
+    db.bulk_insert_mappings(Job, [
+        {"title": f"Job {i}", "company": "ACME", "status": "new", "job_description": make_posting(rng, words)}
+        for i in range(jobs)
+    ])
+    db.commit()
+    db.close()
+
+    resume_file = os.path.join(tempfile.mkdtemp(), "resume.txt")
+    scoring.RESUME_PATH = resume_file
+    with open(resume_file, "w") as f:
+        f.write(make_resume(rng))
+
+    _, load_ms = timed(scoring.load_index)
+    print(f"Indexed {jobs} jobs ({words} words) and scored them in {load_ms:.0f}ms")
+
+    resume = make_resume(rng)
+    with open(resume_file, "w") as f:
+        f.write(resume)
+    scores, score_ms = timed(scoring.scoring_index.score_all, resume)
+    print(f"score_all   | {score_ms:.1f}ms for {len(scores)} jobs")
+
+    with open(resume_file, "w") as f:
+        f.write(make_resume(rng))
+    changed, rescore_ms = timed(scoring.rescore_all)
+    print(f"rescore_all | {rescore_ms:.1f}ms ({changed} scores written)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--jobs", type=int, default=10000)
+    parser.add_argument("--words", type=int, default=300, help="Words per synthetic posting")
+    args = parser.parse_args()
+    main(args.jobs, args.words)
@@ -0,0 +1,86 @@
+"""
+Full-text search latency on a large job table (SQLite FTS5).
+
+Seeds a temporary database with synthetic postings (the FTS index is filled
+by the triggers from app/database.py) and times GET /api/jobs/search with
+rare, common and multi-word queries, with and without filters. The first line times
+a plain GET /api/jobs page: the request overhead every search includes.
+
+Usage (from project root):
+    python benchmarks/search_benchmark.py --jobs 50000
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/search_benchmark.db"
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+
+import httpx
+
+from app.database import SessionLocal, init_db
+from app.main import app
+from app.models import Job
+
+SKILLS = ["python", "java", "kotlin", "golang", "rust", "react", "kubernetes", "terraform", "spark", "airflow"]
+FILLER = [f"word{i}" for i in range(20000)]
+STATUSES = ["new", "applied", "interview", "offer", "rejected"]
+QUERIES = [
+    ("list (no search)", "/api/jobs", {}),
+    ("rare term", "/api/jobs/search", {"q": "word19999"}),
+    ("common term", "/api/jobs/search", {"q": "python"}),
+    ("two terms", "/api/jobs/search", {"q": "python kubernetes"}),
+    ("prefix", "/api/jobs/search", {"q": "terra"}),
+    ("common + filters", "/api/jobs/search", {"q": "python", "status": "applied", "visa": "true"}),
+]
+
+
+def make_posting(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(SKILLS) if rng.random() < 0.02 else rng.choice(FILLER) for _ in range(words))
+
+
+def seed(jobs: int, words: int):
+    rng = random.Random(42)
+    init_db()
+    db = SessionLocal()
+    for start in range(0, jobs, 5000):
+        db.bulk_insert_mappings(Job, [
+            {"title": f"{rng.choice(SKILLS).title()} Engineer", "company": f"Company {i % 500}",
+             "status": rng.choice(STATUSES), "has_visa_sponsorship": rng.choice([True, False, None]),
+             "job_description": make_posting(rng, words)}
+            for i in range(start, min(start + 5000, jobs))
+        ])
+        db.commit()
+    db.close()
+
+
+async def main(jobs: int, words: int, repeats: int):
+    start = time.perf_counter()
+    seed(jobs, words)
+    print(f"Seeded {jobs} jobs ({words} words) with FTS triggers in {time.perf_counter() - start:.1f}s")
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        for label, path, params in QUERIES:
+            latencies = []
+            for _ in range(repeats):
+                request_start = time.perf_counter()
+                response = await client.get(path, params={**params, "limit": 20})
+                latencies.append((time.perf_counter() - request_start) * 1000)
+            print(f"{label:17} | {len(response.json()):2} results | p50 {statistics.median(latencies):6.2f}ms | "
+                  f"max {max(latencies):6.2f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--jobs", type=int, default=50000)
+    parser.add_argument("--words", type=int, default=200, help="Words per synthetic posting")
+    parser.add_argument("--repeats", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.jobs, args.words, args.repeats))